@@ -7,3 +7,7 @@ class ApiConfig(AppConfig):
     """Конфигурация приложения API."""
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        """Подключение сигналов приложения."""
+        from . import signals  # noqa: F401
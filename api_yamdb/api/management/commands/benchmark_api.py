@@ -0,0 +1,351 @@
+"""Нагрузочный прогон эндпоинтов /api/v1 через тестовый клиент."""
+
+import json
+import math
+import time
+
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.v1.cache import get_cache
+from reviews.models import ROLE_LIST, Comment, Review, Title, User
+
+BENCH_USERNAME = 'benchmark_admin'
+
+TITLE_PAYLOAD = {
+    'name': 'Benchmark', 'year': 2000, 'description': 'benchmark',
+    'genre': ['{genre}'], 'category': '{category}',
+}
+TITLE_URL = '/api/v1/titles/{title}/'
+REVIEW_URL = '/api/v1/titles/{title}/reviews/{review}/'
+COMMENT_URL = (
+    '/api/v1/titles/{title}/reviews/{review}/comments/{comment}/'
+)
+
+# Имя сценария, метод, шаблон url, клиент, шаблон тела запроса (для GET —
+# параметров запроса). Покрывает все маршруты api/v1/urls.py.
+SCENARIOS = (
+    ('titles-list', 'get', '/api/v1/titles/', 'anon', None),
+    ('titles-detail', 'get', TITLE_URL, 'anon', None),
+    ('titles-top', 'get', '/api/v1/titles/top/', 'anon', None),
+    ('titles-stats', 'get', f'{TITLE_URL}stats/', 'anon', None),
+    ('titles-similar', 'get', f'{TITLE_URL}similar/', 'anon', None),
+    ('categories-list', 'get', '/api/v1/categories/', 'anon', None),
+    ('genres-list', 'get', '/api/v1/genres/', 'anon', None),
+    ('reviews-list', 'get', f'{TITLE_URL}reviews/', 'anon', None),
+    ('reviews-detail', 'get', REVIEW_URL, 'anon', None),
+    ('comments-list', 'get', f'{REVIEW_URL}comments/', 'anon', None),
+    ('comments-detail', 'get', COMMENT_URL, 'anon', None),
+    ('search', 'get', '/api/v1/search/', 'anon', {'q': '{query}'}),
+    ('users-list', 'get', '/api/v1/users/', 'admin', None),
+    ('users-detail', 'get', '/api/v1/users/{username}/', 'admin', None),
+    ('users-me', 'get', '/api/v1/users/me/', 'admin', None),
+    (
+        'recommendations', 'get', '/api/v1/users/me/recommendations/',
+        'admin', None
+    ),
+    ('cache-stats', 'get', '/api/v1/cache/stats/', 'admin', None),
+    ('export-titles', 'get', '/api/v1/export/titles/', 'admin', None),
+    ('export-reviews', 'get', '/api/v1/export/reviews/', 'admin', None),
+    ('export-comments', 'get', '/api/v1/export/comments/', 'admin', None),
+    ('titles-create', 'post', '/api/v1/titles/', 'admin', TITLE_PAYLOAD),
+    (
+        'titles-bulk', 'post', '/api/v1/titles/bulk/', 'admin',
+        [TITLE_PAYLOAD] * 10
+    ),
+    ('titles-update', 'patch', TITLE_URL, 'admin', {'name': 'Benchmark'}),
+    ('titles-delete', 'delete', TITLE_URL, 'admin', None),
+    (
+        'categories-create', 'post', '/api/v1/categories/', 'admin',
+        {'name': 'Benchmark', 'slug': 'benchmark'}
+    ),
+    (
+        'categories-delete', 'delete', '/api/v1/categories/{category}/',
+        'admin', None
+    ),
+    (
+        'genres-create', 'post', '/api/v1/genres/', 'admin',
+        {'name': 'Benchmark', 'slug': 'benchmark'}
+    ),
+    ('genres-delete', 'delete', '/api/v1/genres/{genre}/', 'admin', None),
+    (
+        'reviews-create', 'post', f'{TITLE_URL}reviews/',
+        'admin', {'text': 'benchmark', 'score': 7}
+    ),
+    (
+        'reviews-update', 'patch', REVIEW_URL, 'admin',
+        {'text': 'benchmark', 'score': 7}
+    ),
+    ('reviews-delete', 'delete', REVIEW_URL, 'admin', None),
+    (
+        'comments-create', 'post', f'{REVIEW_URL}comments/',
+        'admin', {'text': 'benchmark'}
+    ),
+    ('comments-update', 'patch', COMMENT_URL, 'admin', {'text': 'benchmark'}),
+    ('comments-delete', 'delete', COMMENT_URL, 'admin', None),
+    (
+        'users-create', 'post', '/api/v1/users/', 'admin',
+        {'username': 'benchmark_user', 'email': 'user@benchmark.fake'}
+    ),
+    (
+        'users-update', 'patch', '/api/v1/users/{user}/', 'admin',
+        {'bio': 'benchmark'}
+    ),
+    ('users-delete', 'delete', '/api/v1/users/{user}/', 'admin', None),
+    (
+        'users-me-update', 'patch', '/api/v1/users/me/', 'admin',
+        {'bio': 'benchmark'}
+    ),
+    (
+        'auth-signup', 'post', '/api/v1/auth/signup/', 'anon',
+        {'username': 'benchmark_signup', 'email': 'signup@benchmark.fake'}
+    ),
+    (
+        'auth-token', 'post', '/api/v1/auth/token/', 'anon',
+        {'username': '{username}', 'confirmation_code': '{code}'}
+    ),
+)
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def fill(template, context):
+    """Подставляет значения контекста в шаблон тела запроса."""
+    if isinstance(template, str):
+        return template.format(**context)
+    if isinstance(template, list):
+        return [fill(item, context) for item in template]
+    if isinstance(template, dict):
+        return {key: fill(value, context) for key, value in template.items()}
+    return template
+
+
+def count_rows(response, body=None):
+    """
+    Количество объектов в ответе: длина страницы, строки потоковой
+    выгрузки или один объект.
+    """
+    if body is not None:
+        return body.count(b'\n')
+    data = getattr(response, 'data', None)
+    if isinstance(data, dict) and isinstance(data.get('results'), list):
+        return len(data['results'])
+    return 1 if data else 0
+
+
+class Command(BaseCommand):
+    """Замеряет задержки и число запросов к БД для каждого маршрута API."""
+
+    help = (
+        'Прогоняет маршруты api/v1 через тестовый клиент и выводит p50/p95, '
+        'число запросов к БД и строк в секунду. Все изменения в базе '
+        'откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--only', nargs='*', default=None,
+            help='Имена сценариев для прогона.'
+        )
+        parser.add_argument(
+            '--limit', type=int, default=None,
+            help='Размер страницы для списочных эндпоинтов.'
+        )
+        parser.add_argument(
+            '--warm', action='store_true',
+            help=(
+                'Не очищать кеш API перед запросами. По умолчанию кеш '
+                'очищается перед каждым запросом, чтобы замерять работу '
+                'с БД, а не попадания в кеш.'
+            )
+        )
+        parser.add_argument(
+            '--reads-only', action='store_true',
+            help='Пропустить сценарии, изменяющие данные.'
+        )
+        parser.add_argument(
+            '--output', help='Сохранить результаты в JSON как baseline.'
+        )
+        parser.add_argument(
+            '--baseline', help='Сравнить с ранее сохранённым JSON.'
+        )
+        parser.add_argument(
+            '--max-regression', type=float, default=None,
+            help='Допустимый рост p95 в процентах относительно baseline.'
+        )
+
+    def handle(self, *args, **options):
+        scenarios = [
+            scenario for scenario in SCENARIOS
+            if (options['only'] is None or scenario[0] in options['only'])
+            and not (options['reads_only'] and scenario[1] != 'get')
+        ]
+        with transaction.atomic():
+            context, clients = self.prepare()
+            results = {}
+            for name, method, url, client_kind, payload in scenarios:
+                if not self.is_available((url, payload), context):
+                    self.stdout.write(f'{name}: нет данных, пропущен')
+                    continue
+                results[name] = self.run_scenario(
+                    clients[client_kind], method, url.format(**context),
+                    fill(payload, context), options
+                )
+            transaction.set_rollback(True)
+        self.report(results)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(results, file, indent=2, sort_keys=True)
+        if options['baseline']:
+            self.compare(results, options['baseline'],
+                         options['max_regression'])
+
+    def prepare(self):
+        """Создаёт администратора для прогона и выбирает объекты для url."""
+        admin = User(
+            username=BENCH_USERNAME,
+            email=f'{BENCH_USERNAME}@yamdb.fake',
+            role=ROLE_LIST.admin.value,
+            confirmation_code='123456789',
+        )
+        admin.set_unusable_password()
+        admin.save()
+        title = Title.objects.order_by('-review_count', 'pk').first()
+        comment = (
+            Comment.objects.filter(review__title=title)
+            .select_related('review').order_by('pk').first()
+        )
+        review = comment.review if comment else (
+            Review.objects.filter(title=title).order_by('pk').first()
+        )
+        genre = title.genre.first() if title else None
+        context = {
+            'title': title.pk if title else None,
+            'review': review.pk if review else None,
+            'comment': comment.pk if comment else None,
+            'genre': genre.slug if genre else None,
+            'category': (
+                title.category.slug if title and title.category else None
+            ),
+            'query': title.name.split()[0] if title else None,
+            'user': (
+                User.objects.exclude(pk=admin.pk).order_by('pk')
+                .values_list('username', flat=True).first()
+            ),
+            'username': admin.username,
+            'code': admin.confirmation_code,
+        }
+        admin_client = APIClient()
+        admin_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}'
+        )
+        return context, {'anon': APIClient(), 'admin': admin_client}
+
+    @staticmethod
+    def is_available(templates, context):
+        """Все ли объекты, нужные для url и тела запроса, есть в базе."""
+        return all(
+            context[key] is not None for key in context
+            if '{%s}' % key in str(templates)
+        )
+
+    def run_scenario(self, client, method, url, payload, options):
+        """Выполняет сценарий и возвращает сводные метрики."""
+        params = dict(payload or {}) if method == 'get' else {}
+        if method == 'get' and options['limit']:
+            params['limit'] = options['limit']
+        send = getattr(client, method)
+        timings, queries, rows = [], [], 0
+        for iteration in range(options['warmup'] + options['iterations']):
+            if not options['warm']:
+                get_cache().clear()
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    if method == 'get':
+                        response = send(url, params)
+                    else:
+                        response = send(url, payload, format='json')
+                    # Потоковая выгрузка читает базу во время отдачи.
+                    body = (
+                        b''.join(response.streaming_content)
+                        if response.streaming else None
+                    )
+                    elapsed = time.perf_counter() - started
+                transaction.set_rollback(True)
+            if response.status_code >= 400:
+                raise CommandError(
+                    f'{method.upper()} {url}: {response.status_code} '
+                    f'{getattr(response, "data", "")}'
+                )
+            if iteration < options['warmup']:
+                continue
+            timings.append(elapsed)
+            queries.append(len(captured))
+            rows += count_rows(response, body)
+        total = sum(timings)
+        return {
+            'requests': len(timings),
+            'p50_ms': round(percentile(timings, 50) * 1000, 3),
+            'p95_ms': round(percentile(timings, 95) * 1000, 3),
+            'queries': round(sum(queries) / len(queries), 2),
+            'rows_per_sec': round(rows / total, 1) if total else 0,
+            'cache': 'warm' if options['warm'] else 'cold',
+        }
+
+    def report(self, results):
+        """Печатает таблицу результатов."""
+        self.stdout.write(
+            f'{"сценарий":<18}{"p50, мс":>10}{"p95, мс":>10}'
+            f'{"запросов":>10}{"строк/с":>12}'
+        )
+        for name, metrics in results.items():
+            self.stdout.write(
+                f'{name:<18}{metrics["p50_ms"]:>10.2f}'
+                f'{metrics["p95_ms"]:>10.2f}{metrics["queries"]:>10}'
+                f'{metrics["rows_per_sec"]:>12.1f}'
+            )
+
+    def compare(self, results, path, max_regression):
+        """Сравнивает результаты с baseline и проверяет допуск."""
+        with open(path) as file:
+            baseline = json.load(file)
+        failures = []
+        for name, metrics in results.items():
+            base = baseline.get(name)
+            if base is None:
+                continue
+            # Baseline без поля cache снят до появления холодного режима.
+            base_cache = base.get('cache', 'warm')
+            if base_cache != metrics['cache']:
+                self.stdout.write(
+                    f'{name:<18}baseline с кешем {base_cache}, прогон — '
+                    f'{metrics["cache"]}: пропущен'
+                )
+                continue
+            change = (
+                (metrics['p95_ms'] - base['p95_ms']) / base['p95_ms'] * 100
+                if base['p95_ms'] else 0
+            )
+            self.stdout.write(
+                f'{name:<18}p95 {base["p95_ms"]:.2f} -> '
+                f'{metrics["p95_ms"]:.2f} мс ({change:+.1f}%), '
+                f'запросов {base["queries"]} -> {metrics["queries"]}'
+            )
+            if metrics['queries'] > base['queries']:
+                failures.append(f'{name}: выросло число запросов')
+            if max_regression is not None and change > max_regression:
+                failures.append(f'{name}: p95 вырос на {change:.1f}%')
+        if failures:
+            raise CommandError('; '.join(failures))
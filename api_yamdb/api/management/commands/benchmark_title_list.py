@@ -0,0 +1,63 @@
+"""Сравнение TitlesGetSerializer и быстрого пути для списка произведений."""
+
+import time
+
+from rest_framework.renderers import JSONRenderer
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.v1.serializers import TitlesGetSerializer, TitlesListFastSerializer
+from api.v1.views import TitlesViewSet
+
+from .benchmark_api import percentile
+
+
+class Command(BaseCommand):
+    """Замеряет построение и рендеринг одной страницы произведений."""
+
+    help = (
+        'Строит JSON страницы произведений через TitlesGetSerializer и '
+        'через TitlesListFastSerializer, проверяет, что байты совпадают, '
+        'и выводит медиану и p95 времени каждого пути.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=100)
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def handle(self, *args, **options):
+        queryset = TitlesViewSet.queryset.order_by('pk')
+        limit = options['limit']
+        paths = {
+            'serializer': lambda: TitlesGetSerializer(
+                queryset[:limit], many=True
+            ).data,
+            'fast': lambda: TitlesListFastSerializer.to_representation(
+                TitlesListFastSerializer.rows(queryset)[:limit]
+            ),
+        }
+        renderer = JSONRenderer()
+        rendered = {
+            name: renderer.render(build()) for name, build in paths.items()
+        }
+        if rendered['serializer'] != rendered['fast']:
+            raise CommandError('Быстрый путь отличается от сериализатора.')
+        timings = {}
+        for name, build in paths.items():
+            timings[name] = []
+            for _ in range(options['iterations']):
+                started = time.perf_counter()
+                renderer.render(build())
+                timings[name].append(time.perf_counter() - started)
+            self.stdout.write(
+                f'{name:<12}p50 {percentile(timings[name], 50) * 1000:8.2f} '
+                f'мс  p95 {percentile(timings[name], 95) * 1000:8.2f} мс'
+            )
+        speedup = (
+            percentile(timings['serializer'], 50)
+            / percentile(timings['fast'], 50)
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Ускорение по медиане: {speedup:.1f}x '
+            f'({len(rendered["fast"])} байт на странице)'
+        ))
@@ -0,0 +1,50 @@
+"""Middleware приложения API."""
+
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCounter:
+    """Обёртка для connection.execute_wrapper, считающая запросы к БД."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started
+
+
+class QueryCountMiddleware:
+    """
+    Добавляет к ответу заголовки X-DB-Queries и X-DB-Time и пишет в лог
+    запросы, превысившие бюджет QUERY_COUNT_BUDGET.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.budget = getattr(settings, 'QUERY_COUNT_BUDGET', None)
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        response['X-DB-Queries'] = str(counter.count)
+        response['X-DB-Time'] = f'{counter.duration * 1000:.3f}'
+        if self.budget is not None and counter.count > self.budget:
+            logger.warning(
+                '%s %s: %d запросов к БД (бюджет %d), %.1f мс',
+                request.method, request.path, counter.count, self.budget,
+                counter.duration * 1000
+            )
+        return response
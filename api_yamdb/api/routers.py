@@ -0,0 +1,83 @@
+"""Маршрутизация чтения на реплики базы данных."""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Разрешено ли текущему запросу читать с реплики.
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def pin_key(user_id):
+    return f'db:pin:{user_id}'
+
+
+def get_pin_cache():
+    """
+    Кеш закреплений из REPLICA_PIN_CACHE_ALIAS или None. Общий кеш
+    ответов API не годится: он бывает своим у каждого процесса, а
+    страницы списков вытесняют из него закрепления.
+    """
+    alias = getattr(settings, 'REPLICA_PIN_CACHE_ALIAS', None)
+    if alias is None or alias == settings.API_CACHE_ALIAS:
+        return None
+    return caches[alias]
+
+
+def pin_primary(user):
+    """
+    После записи пользователь читает с основной базы REPLICA_PIN_SECONDS
+    секунд, пока реплики догоняют: он видит свои отзывы и комментарии.
+    """
+    cache = get_pin_cache()
+    if cache is not None:
+        cache.set(
+            pin_key(user.pk), True, timeout=settings.REPLICA_PIN_SECONDS
+        )
+
+
+def is_pinned(user):
+    """
+    Должен ли пользователь читать с основной базы. Без кеша закреплений
+    собственные записи не проверить, и с основной читают все.
+    """
+    cache = get_pin_cache()
+    if cache is None:
+        return True
+    return bool(user.is_authenticated and cache.get(pin_key(user.pk)))
+
+
+def allow_replica_reads():
+    """Разрешает чтение с реплик; токен передаётся в reset_replica_reads."""
+    return _replica_reads.set(True)
+
+
+def reset_replica_reads(token):
+    _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Запись и чтение по умолчанию идут в основную базу. Чтение уходит
+    на случайную реплику из DATABASE_REPLICAS только после
+    allow_replica_reads() и вне транзакции: в транзакции нужно видеть
+    собственные изменения.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', ())
+        if (
+            not replicas or not _replica_reads.get()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
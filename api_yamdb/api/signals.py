@@ -0,0 +1,91 @@
+"""Сигналы приложения API."""
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.signals import changed_user_fields
+
+from .v1.authentication import revoke_claims
+from .v1.cache import comments_namespace, invalidate_on_commit
+
+CACHE_NAMESPACES = {
+    Category: 'categories',
+    Genre: 'genres',
+}
+
+
+def invalidate_list_cache(sender, using, **kwargs):
+    """Сбрасывает кеш списка при изменении категории или жанра."""
+    invalidate_on_commit(CACHE_NAMESPACES[sender], using)
+
+
+for model in CACHE_NAMESPACES:
+    post_save.connect(
+        invalidate_list_cache, sender=model,
+        dispatch_uid=f'invalidate_{model._meta.model_name}_save'
+    )
+    post_delete.connect(
+        invalidate_list_cache, sender=model,
+        dispatch_uid=f'invalidate_{model._meta.model_name}_delete'
+    )
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def invalidate_titles(sender, using, **kwargs):
+    """Новый ETag списка произведений."""
+    invalidate_on_commit('titles', using)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_titles_on_genres(sender, action, using, **kwargs):
+    """Жанры выводятся в списке произведений."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_on_commit('titles', using)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_reviews(sender, instance, using, **kwargs):
+    """
+    Отзыв меняет рейтинг в списке произведений и список комментариев:
+    в нём выводится текст отзыва. Ответы о самом произведении и его
+    отзывах сверяются по версии произведения.
+    """
+    invalidate_on_commit('titles', using)
+    invalidate_on_commit(comments_namespace(instance.pk), using)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comments(sender, instance, using, **kwargs):
+    invalidate_on_commit(comments_namespace(instance.review_id), using)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_name(sender, instance, created, using, raw=False,
+                           **kwargs):
+    """
+    Комментарии показывают имя автора: при его смене сбрасываются ETag
+    списков с комментариями пользователя. Отзывы сверяются по версии
+    произведения, её увеличивает bump_version_on_username.
+    """
+    if created or raw or 'username' not in changed_user_fields(instance):
+        return
+    for review_id in Comment.objects.filter(
+            author=instance).values_list('review_id', flat=True).distinct():
+        invalidate_on_commit(comments_namespace(review_id), using)
+
+
+@receiver(post_save, sender=User)
+def revoke_changed_claims(sender, instance, created, raw=False, **kwargs):
+    """Отзывает claims токенов при смене роли, прав или блокировке."""
+    if not created and not raw and changed_user_fields(instance):
+        revoke_claims(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user_claims(sender, instance, **kwargs):
+    """Отзывает claims токенов удалённого пользователя."""
+    revoke_claims(instance.pk)
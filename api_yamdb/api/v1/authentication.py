@@ -0,0 +1,81 @@
+"""Аутентификация."""
+
+import time
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from django.conf import settings
+from django.core.cache import caches
+
+from reviews.models import TOKEN_CLAIMS, User
+
+
+def revocation_key(user_id):
+    return f'api:auth:revoked:{user_id}'
+
+
+def get_revocation_cache():
+    """
+    Кеш меток отзыва из AUTH_REVOCATION_CACHE_ALIAS или None. Общий кеш
+    ответов API не годится: страницы списков вытесняют из него метки.
+    """
+    alias = getattr(settings, 'AUTH_REVOCATION_CACHE_ALIAS', None)
+    if alias is None or alias == settings.API_CACHE_ALIAS:
+        return None
+    return caches[alias]
+
+
+def revoke_claims(user_id):
+    """
+    Помечает выданные ранее токены пользователя как устаревшие: их claims
+    больше не используются, пользователь загружается из БД. Метка живёт
+    не дольше access-токена с claims.
+    """
+    cache = get_revocation_cache()
+    if cache is not None:
+        cache.set(
+            revocation_key(user_id),
+            int(time.time()),
+            timeout=settings.CLAIMS_ACCESS_TOKEN_LIFETIME.total_seconds()
+        )
+
+
+def claims_revoked(user_id, issued_at):
+    """
+    Выдан ли токен раньше последней смены роли пользователя. Без кеша
+    меток отзыв проверить нельзя, и claims считаются отозванными.
+    """
+    cache = get_revocation_cache()
+    if cache is None:
+        return True
+    revoked_at = cache.get(revocation_key(user_id))
+    return revoked_at is not None and issued_at <= revoked_at
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация без запроса к БД: пользователь собирается из claims
+    username, role и is_superuser. Токены без этих claims, живущие дольше
+    CLAIMS_ACCESS_TOKEN_LIFETIME или выданные до смены роли проверяются
+    по БД.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        issued_at = validated_token.get('iat', 0)
+        lifetime = validated_token.get('exp', 0) - issued_at
+        if (
+            user_id is None
+            or any(claim not in validated_token for claim in TOKEN_CLAIMS)
+            or lifetime > settings.CLAIMS_ACCESS_TOKEN_LIFETIME.total_seconds()
+            or claims_revoked(user_id, issued_at)
+        ):
+            return super().get_user(validated_token)
+        user = User(
+            **{api_settings.USER_ID_FIELD: user_id},
+            **{claim: validated_token[claim] for claim in TOKEN_CLAIMS}
+        )
+        user._state.adding = False
+        user._state.db = User.objects.db
+        return user
@@ -0,0 +1,124 @@
+"""Кеширование ответов API."""
+
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import quote_etag
+
+STATS_KEYS = ('hits', 'misses')
+
+
+def get_cache():
+    """Кеш, выбранный в настройке API_CACHE_ALIAS."""
+    return caches[getattr(settings, 'API_CACHE_ALIAS', 'default')]
+
+
+def generation_key(namespace):
+    return f'api:{namespace}:generation'
+
+
+def get_generation(namespace):
+    """Текущее поколение кеша пространства имён."""
+    return get_cache().get_or_set(
+        generation_key(namespace), time.time_ns(), timeout=None
+    )
+
+
+def comments_namespace(review_id):
+    return f'review:{review_id}:comments'
+
+
+def invalidate(namespace):
+    """
+    Сбрасывает все ключи пространства имён за O(1): новое поколение
+    делает старые ключи недостижимыми, они истекут по таймауту.
+    """
+    get_cache().set(generation_key(namespace), time.time_ns(), timeout=None)
+
+
+def invalidate_on_commit(namespace, using=None):
+    """
+    Сбрасывает пространство имён после фиксации текущей транзакции: GET,
+    пришедший до неё, не сохранит старые данные под новым поколением.
+    Вне транзакции сбрасывает сразу, при откате — не сбрасывает.
+    """
+    transaction.on_commit(partial(invalidate, namespace), using=using)
+
+
+def request_part(request):
+    """Хост, путь и отсортированные параметры запроса для ключа кеша."""
+    params = '&'.join(
+        f'{key}={value}'
+        for key, values in sorted(request.query_params.lists())
+        for value in values
+    )
+    return f'{request.get_host()}{request.path}?{params}'
+
+
+def response_key(namespace, request):
+    """Ключ кеша ответа: поколение, хост и отсортированные параметры."""
+    return (
+        f'api:{namespace}:{get_generation(namespace)}:'
+        f'{request_part(request)}'
+    )
+
+
+def title_key(title_id, version, request):
+    """
+    Ключ кеша ответа о произведении или его отзывах. Любое изменение под
+    произведением увеличивает версию, поэтому сброс точен и стоит O(1):
+    старые ключи становятся недостижимыми и истекают по таймауту.
+    """
+    return f'api:title:{title_id}:{version}:{request_part(request)}'
+
+
+def validators(namespaces, request):
+    """
+    ETag и Last-Modified ответа без его построения: ответ меняется
+    только вместе с поколением одного из пространств имён.
+    """
+    generations = [get_generation(namespace) for namespace in namespaces]
+    etag = hashlib.md5(
+        f'{generations}:{request.get_full_path()}'.encode()
+    ).hexdigest()
+    return quote_etag(etag), max(generations) // 10 ** 9
+
+
+def version_validators(title, request):
+    """
+    ETag ответа о произведении или его отзывах по версии произведения,
+    прочитанной из той же базы, что и ответ: ETag не опережает данные ни
+    до фиксации записи, ни на отстающей реплике. Last-Modified нет:
+    версия не несёт времени изменения.
+    """
+    etag = hashlib.md5(
+        f'{title.pk}:{title.version}:{request.get_full_path()}'.encode()
+    ).hexdigest()
+    return quote_etag(etag), None
+
+
+def record(namespace, hit):
+    """Увеличивает счётчик попаданий или промахов."""
+    cache = get_cache()
+    key = f'api:{namespace}:{STATS_KEYS[0] if hit else STATS_KEYS[1]}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def get_stats(namespaces):
+    """Счётчики попаданий и промахов по пространствам имён."""
+    cache = get_cache()
+    return {
+        namespace: {
+            name: cache.get(f'api:{namespace}:{name}', 0)
+            for name in STATS_KEYS
+        }
+        for namespace in namespaces
+    }
@@ -0,0 +1,154 @@
+"""
+Потоковая выгрузка таблиц для внешних потребителей.
+
+Строки читаются пачками по EXPORT_CHUNK_SIZE с пагинацией по ключу
+(`WHERE (pub_date, id) > последней строки пачки`), поэтому память не
+зависит от размера таблицы, а каждый запрос идёт по индексу. Порядок
+выгрузки совпадает с ключом: по последней строке клиент продолжает
+выгрузку с `?since=<pub_date>&since_id=<id>`.
+"""
+
+from datetime import datetime
+from functools import reduce
+
+from rest_framework import serializers
+
+from django.db.models import Q
+
+from reviews.models import Comment, Review, Title
+
+DATETIME = serializers.DateTimeField()
+
+
+def after(keys, cursor):
+    """Условие «ключ строки больше cursor» в лексикографическом порядке."""
+    conditions = []
+    for position, key in enumerate(keys):
+        equal = {
+            keys[previous]: cursor[previous] for previous in range(position)
+        }
+        conditions.append(Q(**equal, **{f'{key}__gt': cursor[position]}))
+    return reduce(Q.__or__, conditions)
+
+
+class Export:
+    """Выгрузка одной таблицы: колонки, ключ пагинации и чтение пачками."""
+
+    model = None
+    # Колонка выгрузки: путь поля для values().
+    columns = {}
+    keys = ('pub_date', 'id')
+
+    def __init__(self, using, chunk_size):
+        self.using = using
+        self.chunk_size = chunk_size
+
+    @property
+    def fields(self):
+        return list(self.columns)
+
+    def queryset(self):
+        return self.model.objects.using(self.using).values(
+            *self.keys, *self.columns.values()
+        ).order_by(*self.keys)
+
+    def chunks(self, since=None, since_id=None):
+        """Пачки строк values() после курсора."""
+        queryset = self.queryset()
+        if since_id is not None:
+            cursor = (since, since_id) if len(self.keys) > 1 else (since_id,)
+            queryset = queryset.filter(after(self.keys, cursor))
+        elif since is not None:
+            queryset = queryset.filter(**{f'{self.keys[0]}__gte': since})
+        while True:
+            chunk = list(queryset[:self.chunk_size])
+            if chunk:
+                yield chunk
+            if len(chunk) < self.chunk_size:
+                return
+            queryset = self.queryset().filter(after(
+                self.keys, [chunk[-1][key] for key in self.keys]
+            ))
+
+    def complete(self, chunk):
+        """Дополняет пачку данными из других таблиц."""
+        return chunk
+
+    def rows(self, since=None, since_id=None):
+        for chunk in self.chunks(since, since_id):
+            for row in self.complete(chunk):
+                yield {
+                    column: self.represent(row[path])
+                    for column, path in self.columns.items()
+                }
+
+    @staticmethod
+    def represent(value):
+        if isinstance(value, datetime):
+            return DATETIME.to_representation(value)
+        return value
+
+
+class TitleExport(Export):
+    """Произведения с категорией, жанрами и рейтингом; ключ — id."""
+
+    model = Title
+    columns = {
+        'id': 'id',
+        'name': 'name',
+        'year': 'year',
+        'description': 'description',
+        'category': 'category__slug',
+        'genre': 'genre',
+        'rating': 'rating',
+        'review_count': 'review_count',
+    }
+    keys = ('id',)
+
+    def queryset(self):
+        return self.model.objects.using(self.using).values(
+            'id', 'name', 'year', 'description', 'category__slug', 'rating',
+            'review_count',
+        ).order_by('id')
+
+    def complete(self, chunk):
+        """Жанры всей пачки — одним запросом."""
+        genres = {row['id']: [] for row in chunk}
+        for title_id, slug in Title.genre.through.objects.using(
+                self.using).filter(title_id__in=list(genres)).order_by(
+                'genre_id').values_list('title_id', 'genre__slug'):
+            genres[title_id].append(slug)
+        for row in chunk:
+            row['genre'] = genres[row['id']]
+        return chunk
+
+
+class ReviewExport(Export):
+    model = Review
+    columns = {
+        'id': 'id',
+        'title': 'title_id',
+        'author': 'author__username',
+        'text': 'text',
+        'score': 'score',
+        'pub_date': 'pub_date',
+    }
+
+
+class CommentExport(Export):
+    model = Comment
+    columns = {
+        'id': 'id',
+        'title': 'review__title_id',
+        'review': 'review_id',
+        'author': 'author__username',
+        'text': 'text',
+        'pub_date': 'pub_date',
+    }
+
+
+EXPORTS = {
+    'titles': TitleExport,
+    'reviews': ReviewExport,
+    'comments': CommentExport,
+}
@@ -1,11 +1,208 @@
 """Кастомные миксины и вьюсеты."""
 
-from rest_framework import filters, mixins, viewsets
+from rest_framework import filters, mixins, permissions, viewsets
+from rest_framework.response import Response
 
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from reviews.models import Title
+
+from ..routers import (
+    allow_replica_reads, is_pinned, pin_primary, reset_replica_reads,
+)
+from .cache import (
+    get_cache, record, response_key, title_key, validators, version_validators,
+)
 from .permissions import OnlyAdminPermission
 
 
-class DestroyCreateListMixins(mixins.CreateModelMixin,
+class ReplicaReadMixin:
+    """
+    Безопасные запросы читают с реплик, если пользователь недавно ничего
+    не записывал; успешная запись закрепляет его за основной базой.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        self.replica_token = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self.replica_token is not None:
+                reset_replica_reads(self.replica_token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            request.method in permissions.SAFE_METHODS
+            and not is_pinned(request.user)
+        ):
+            self.replica_token = allow_replica_reads()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (
+            request.method not in permissions.SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            pin_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ConditionalListMixin:
+    """
+    ETag и Last-Modified по поколениям кеша из get_etag_namespaces():
+    на If-None-Match/If-Modified-Since отвечает 304, не обращаясь к БД и
+    не запуская сериализатор.
+    """
+
+    cache_namespace = None
+
+    def get_etag_namespaces(self):
+        return (self.cache_namespace,)
+
+    def get_validators(self, request):
+        """ETag и Last-Modified (или None) ответа."""
+        return validators(self.get_etag_namespaces(), request)
+
+    def conditional(self, request, respond):
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            return response
+        response = respond()
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(
+            request, lambda: super(ConditionalListMixin, self).list(
+                request, *args, **kwargs
+            )
+        )
+
+
+class ConditionalGetMixin(ConditionalListMixin):
+    """Условные GET-запросы к списку и к отдельному объекту."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(
+            request, lambda: super(ConditionalGetMixin, self).retrieve(
+                request, *args, **kwargs
+            )
+        )
+
+
+class TitleVersionCacheMixin:
+    """
+    Кеширует ответы о произведении и его отзывах по ключу с версией
+    произведения: попадание стоит одного запроса за версией, а при
+    промахе загруженное произведение переиспользует get_queryset.
+    """
+
+    title_lookup_kwarg = 'title_id'
+
+    def get_title(self):
+        """Произведение из url (только id и версия), один запрос за вызов."""
+        if not hasattr(self, '_title'):
+            self._title = Title.objects.only('id', 'version').filter(
+                pk=self.kwargs.get(self.title_lookup_kwarg)
+            ).first()
+        return self._title
+
+    def get_version_validators(self, request):
+        """ETag по версии произведения; без произведения — никакого."""
+        title = self.get_title()
+        if title is None:
+            return None, None
+        return version_validators(title, request)
+
+    def cached(self, request, respond):
+        if self.title_lookup_kwarg not in self.kwargs:
+            return respond()
+        title = self.get_title()
+        if title is None:
+            return respond()
+        cache = get_cache()
+        key = title_key(title.pk, title.version, request)
+        data = cache.get(key)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        response = respond()
+        if response.status_code == 200:
+            cache.set(
+                key, response.data, timeout=settings.API_CACHE_TIMEOUT
+            )
+            response['X-Cache'] = 'MISS'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(
+            request, lambda: super(TitleVersionCacheMixin, self).list(
+                request, *args, **kwargs
+            )
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(
+            request, lambda: super(TitleVersionCacheMixin, self).retrieve(
+                request, *args, **kwargs
+            )
+        )
+
+
+class FastListMixin:
+    """
+    Список через fast_list_serializer_class: пагинация по строкам
+    values() без создания моделей и вложенных сериализаторов.
+    """
+
+    fast_list_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        fast = self.fast_list_serializer_class
+        rows = fast.rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(fast.to_representation(page))
+        return Response(fast.to_representation(rows))
+
+
+class CachedListMixin:
+    """
+    Кеширует сериализованные страницы списка по параметрам запроса.
+    Кеш пространства имён cache_namespace сбрасывается сигналами модели.
+    """
+
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        cache = get_cache()
+        key = response_key(self.cache_namespace, request)
+        data = cache.get(key)
+        record(self.cache_namespace, hit=data is not None)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, timeout=settings.API_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class DestroyCreateListMixins(ReplicaReadMixin,
+                              ConditionalListMixin,
+                              CachedListMixin,
+                              mixins.CreateModelMixin,
                               mixins.DestroyModelMixin,
                               mixins.ListModelMixin,
                               viewsets.GenericViewSet):
@@ -22,4 +219,8 @@ class RetrieveUpdateViewSet(mixins.RetrieveModelMixin, mixins.UpdateModelMixin,
     """Кастомный родительский ViewSet для наследования."""
 
     def get_object(self):
-        return self.request.user
+        """
+        Текущий пользователь из БД: при аутентификации по claims
+        request.user содержит только поля из токена.
+        """
+        return self.get_queryset().get(pk=self.request.user.pk)
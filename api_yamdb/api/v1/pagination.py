@@ -1,9 +1,66 @@
 """Кастомная пагинация."""
 
-from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+CURSOR_MODE = 'cursor'
 
 
 class GenresAndCategoriesPagination(LimitOffsetPagination):
     """Кастомный класс пагинации для жанров и категорий."""
 
     default_limit = 2
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Курсорная пагинация по стабильным индексированным ключам.
+    Не выполняет COUNT(*) и не использует OFFSET на глубоких страницах.
+    """
+
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    ordering = ('id',)
+
+
+class LimitOffsetOrCursorPagination(LimitOffsetPagination):
+    """
+    Пагинация limit/offset по умолчанию и курсорная по запросу.
+
+    Курсорный режим включается параметром `?pagination=cursor` или
+    передачей курсора `?cursor=...`. Порядок ключей берётся из атрибута
+    `cursor_ordering` вьюсета.
+    """
+
+    mode_query_param = 'pagination'
+    cursor_class = KeysetPagination
+
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def is_cursor_mode(self, request):
+        """Проверка, запрошен ли курсорный режим."""
+        return (
+            request.query_params.get(self.mode_query_param) == CURSOR_MODE
+            or self.cursor_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_cursor_mode(request):
+            return super().paginate_queryset(queryset, request, view)
+        self.cursor_paginator = self.cursor_class()
+        ordering = getattr(view, 'cursor_ordering', None)
+        if ordering is not None:
+            self.cursor_paginator.ordering = ordering
+        return self.cursor_paginator.paginate_queryset(
+            queryset, request, view
+        )
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_html_context(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_html_context()
+        return super().get_html_context()
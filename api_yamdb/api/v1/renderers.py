@@ -0,0 +1,52 @@
+"""Рендереры потоковой выгрузки."""
+
+import csv
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Одна строка JSON на объект."""
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Обычный ответ (например, ошибка) — одна строка."""
+        return b''.join(self.stream(data.keys(), [data]))
+
+    def stream(self, fields, rows):
+        for row in rows:
+            yield json.dumps(
+                row, ensure_ascii=False, separators=(',', ':'), default=str
+            ).encode() + b'\n'
+
+
+class Echo:
+    """Файлоподобный объект для csv.writer: возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+class CSVRenderer(BaseRenderer):
+    """Строка заголовков, затем по строке на объект; списки через запятую."""
+
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Обычный ответ (например, ошибка) — заголовок и одна строка."""
+        return b''.join(self.stream(list(data), [data]))
+
+    def stream(self, fields, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(fields).encode()
+        for row in rows:
+            yield writer.writerow([
+                ','.join(value) if isinstance(value, list) else value
+                for value in (row[field] for field in fields)
+            ]).encode()
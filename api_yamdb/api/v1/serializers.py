@@ -4,12 +4,19 @@ import datetime as dt
 
 from rest_framework import serializers
 
+from django.conf import settings
 from django.core.validators import RegexValidator
 from django.shortcuts import get_object_or_404
 
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import (
+    Category, Comment, Genre, Review, Title, TitleStats, User,
+)
+from reviews.search import KINDS
 from reviews.validators import validate_username
 
+# Что можно встроить в ответ о произведении через `?expand=`.
+TITLE_EXPANSIONS = ('reviews', 'score_histogram')
+
 
 class CategoriesSerializer(serializers.ModelSerializer):
     """Сериалайзер для модели Categories."""
@@ -49,6 +56,55 @@ class TitlesPostSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'year', 'description', 'genre', 'category')
 
 
+class PreloadedSlugRelatedField(serializers.SlugRelatedField):
+    """
+    SlugRelatedField, который ищет объект в заранее загруженном словаре
+    context['preloaded'][модель] вместо запроса на каждое значение.
+    """
+
+    def to_internal_value(self, data):
+        try:
+            return self.context['preloaded'][self.queryset.model][data]
+        except KeyError:
+            self.fail(
+                'does_not_exist', slug_name=self.slug_field, value=data
+            )
+        except TypeError:
+            self.fail('invalid')
+
+
+class TitlesBulkSerializer(TitlesPostSerializer):
+    """
+    Элемент `POST /titles/bulk/`: поля как у TitlesPostSerializer, но
+    категории и жанры всего списка загружаются заранее методом preload.
+    """
+
+    category = PreloadedSlugRelatedField(
+        queryset=Category.objects.all(), slug_field='slug'
+    )
+    genre = PreloadedSlugRelatedField(
+        queryset=Genre.objects.all(), slug_field='slug', many=True
+    )
+
+    @staticmethod
+    def preload(items):
+        """Категории и жанры всех элементов — по одному запросу на модель."""
+        slugs = {Category: set(), Genre: set()}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            if isinstance(item.get('category'), str):
+                slugs[Category].add(item['category'])
+            if isinstance(item.get('genre'), list):
+                slugs[Genre].update(
+                    slug for slug in item['genre'] if isinstance(slug, str)
+                )
+        return {
+            model: model.objects.in_bulk(values, field_name='slug')
+            for model, values in slugs.items()
+        }
+
+
 class TitlesGetSerializer(serializers.ModelSerializer):
     """Сериализатор для GET-запросов к произведениям."""
 
@@ -62,7 +118,8 @@ class TitlesGetSerializer(serializers.ModelSerializer):
     class Meta:
         model = Title
         fields = (
-            'id', 'name', 'year', 'rating', 'description', 'genre', 'category'
+            'id', 'name', 'year', 'rating', 'description', 'genre',
+            'category', 'version',
         )
 
     def validate_year(self, value):
@@ -73,6 +130,51 @@ class TitlesGetSerializer(serializers.ModelSerializer):
         return value
 
 
+class TitlesListFastSerializer:
+    """
+    Быстрый путь для списка произведений: строки из values() и один
+    запрос за жанрами страницы вместо вложенных сериализаторов на каждую
+    строку. Результат совпадает с TitlesGetSerializer(many=True).
+    """
+
+    fields = (
+        'id', 'name', 'year', 'rating', 'description', 'version',
+        'category__name', 'category__slug',
+    )
+
+    @classmethod
+    def rows(cls, queryset):
+        """Кверисет строк для пагинации."""
+        return queryset.prefetch_related(None).values(*cls.fields)
+
+    @classmethod
+    def to_representation(cls, rows):
+        rows = list(rows)
+        genres = {row['id']: [] for row in rows}
+        for title_id, name, slug in Title.genre.through.objects.filter(
+                title_id__in=genres).order_by('genre_id').values_list(
+                    'title_id', 'genre__name', 'genre__slug'):
+            genres[title_id].append({'name': name, 'slug': slug})
+        return [
+            {
+                'id': row['id'],
+                'name': row['name'],
+                'year': row['year'],
+                'rating': (
+                    None if row['rating'] is None else int(row['rating'])
+                ),
+                'description': row['description'],
+                'genre': genres[row['id']],
+                'category': None if row['category__slug'] is None else {
+                    'name': row['category__name'],
+                    'slug': row['category__slug'],
+                },
+                'version': row['version'],
+            }
+            for row in rows
+        ]
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     """Сериализатор для модели Review."""
 
@@ -83,6 +185,7 @@ class ReviewSerializer(serializers.ModelSerializer):
     class Meta:
         model = Review
         fields = ('id', 'title', 'text', 'author', 'score', 'pub_date')
+        read_only_fields = ('title',)
 
     def validate_score(self, value):
         """Валидация оценки в промежутке от 1 до 10."""
@@ -90,18 +193,57 @@ class ReviewSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('Оценка от 1 до 10')
         return value
 
-    def validate(self, data):
-        if self.context['request'].method != 'POST':
-            return data
-        title = self.context['view'].kwargs.get('title_id')
-        author = self.context['request'].user
-        if Review.objects.filter(
-                author=author, title=title).exists():
-            raise serializers.ValidationError(
-                'Отзыв на произведение уже написан.'
-            )
+
+class TitlesExpandedSerializer(TitlesGetSerializer):
+    """
+    Произведение с гистограммой оценок и первыми отзывами: страница
+    произведения строится одним запросом к API. Что встроить, задаёт
+    `expand` из контекста.
+    """
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        expand = self.context.get('expand', ())
+        if 'score_histogram' in expand:
+            data['score_histogram'] = self.get_score_histogram(instance)
+        if 'reviews' in expand:
+            data['reviews'] = self.get_reviews(instance)
         return data
 
+    @staticmethod
+    def get_score_histogram(instance):
+        """Гистограмма из статистики, загруженной select_related('stats')."""
+        stats = getattr(instance, 'stats', None)
+        if stats is None:
+            stats = TitleStats(title_id=instance.pk)
+        return stats.histogram
+
+    def get_reviews(self, instance):
+        """Первые TITLE_EXPAND_REVIEWS отзывов с авторами, один запрос."""
+        reviews = instance.reviews.select_related('author').order_by(
+            'pub_date', 'id'
+        )[:settings.TITLE_EXPAND_REVIEWS]
+        return {
+            'count': instance.review_count,
+            'results': ReviewSerializer(
+                reviews, many=True, context=self.context
+            ).data,
+        }
+
+
+class TitleStatsSerializer(serializers.ModelSerializer):
+    """Статистика оценок произведения."""
+
+    count = serializers.IntegerField(source='review_count')
+    mean = serializers.FloatField()
+    variance = serializers.FloatField()
+    score_histogram = serializers.DictField(source='histogram')
+
+    class Meta:
+        model = TitleStats
+        fields = ('title', 'count', 'mean', 'variance', 'score_histogram')
+        read_only_fields = fields
+
 
 class CommentSerializer(serializers.ModelSerializer):
     """Сериализатор для модели Comment."""
@@ -116,6 +258,12 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ('id', 'review', 'text', 'author', 'pub_date')
 
 
+class CommentCompactSerializer(CommentSerializer):
+    """Сериализатор комментария со ссылкой на отзыв по id вместо текста."""
+
+    review = serializers.PrimaryKeyRelatedField(read_only=True)
+
+
 class RegistrationSerializer(serializers.ModelSerializer):
     """Регистрация нового пользователя."""
 
@@ -202,3 +350,64 @@ class UserSerializer(serializers.ModelSerializer):
         model = User
         fields = ('username', 'email', 'first_name', 'last_name', 'bio',
                   'role')
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    """Параметры запроса к полнотекстовому поиску."""
+
+    q = serializers.CharField()
+    type = serializers.MultipleChoiceField(choices=KINDS, required=False)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=100, default=20
+    )
+
+    def to_internal_value(self, data):
+        """Типы передаются через запятую: `?type=title,review`."""
+        if 'type' in data:
+            data = {**data.dict(), 'type': data['type'].split(',')}
+        return super().to_internal_value(data)
+
+
+class TopTitlesQuerySerializer(serializers.Serializer):
+    """Параметры запроса к рейтингу лучших произведений."""
+
+    category = serializers.SlugField(required=False)
+    genre = serializers.SlugField(required=False)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=100, default=10
+    )
+
+
+class SimilarTitlesQuerySerializer(serializers.Serializer):
+    """Параметры запроса к похожим произведениям."""
+
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+
+class RecommendationsQuerySerializer(serializers.Serializer):
+    """Параметры запроса к рекомендациям пользователя."""
+
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
+class ExportQuerySerializer(serializers.Serializer):
+    """
+    Курсор выгрузки: `since` — дата публикации (включительно), вместе с
+    `since_id` — строго после строки (since, since_id). У произведений нет
+    даты публикации, их курсор — только `since_id`.
+    """
+
+    since = serializers.DateTimeField(required=False)
+    since_id = serializers.IntegerField(min_value=0, required=False)
+
+    def validate(self, data):
+        keyed_by_id = self.context['keys'] == ('id',)
+        if keyed_by_id and 'since' in data:
+            raise serializers.ValidationError(
+                {'since': 'Произведения выгружаются только по since_id.'}
+            )
+        if not keyed_by_id and 'since_id' in data and 'since' not in data:
+            raise serializers.ValidationError(
+                {'since_id': 'since_id передаётся вместе с since.'}
+            )
+        return data
@@ -6,9 +6,11 @@ from django.urls import include, path
 
 from .routers import CustomRetrieveUpdateUserRouter
 from .views import (
-    CategoriesViewSet, CommentViewSet, GenresViewSet, GetTokenAPIView,
+    CacheStatsAPIView, CategoriesViewSet, CommentViewSet, ExportAPIView,
+    GenresViewSet, GetTokenAPIView, RecommendationsAPIView,
     RegistrationAPIView, RetrieveUpdateUserViewSet, ReviewViewSet,
-    TitlesViewSet, UserViewSet,
+    SearchAPIView, SimilarTitlesAPIView, TitleStatsAPIView, TitlesViewSet,
+    TopTitlesAPIView, UserViewSet,
 )
 
 router = DefaultRouter()
@@ -29,8 +31,16 @@ router.register(
 )
 
 urlpatterns = [
+    path('users/me/recommendations/', RecommendationsAPIView.as_view()),
     path('users/', include(router_me.urls)),
+    # Раньше маршрутов роутера: иначе `top` примется за id произведения.
+    path('titles/top/', TopTitlesAPIView.as_view()),
     path('', include(router.urls)),
     path('auth/signup/', RegistrationAPIView.as_view()),
     path('auth/token/', GetTokenAPIView.as_view()),
+    path('cache/stats/', CacheStatsAPIView.as_view()),
+    path('search/', SearchAPIView.as_view()),
+    path('export/<str:kind>/', ExportAPIView.as_view()),
+    path('titles/<int:title_id>/stats/', TitleStatsAPIView.as_view()),
+    path('titles/<int:title_id>/similar/', SimilarTitlesAPIView.as_view()),
 ]
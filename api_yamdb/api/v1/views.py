@@ -2,53 +2,379 @@
 
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, status, viewsets
-from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 
-from django.db.models import Avg
+from django.conf import settings
+from django.db import IntegrityError, router, transaction
+from django.db.models import Case, IntegerField, Prefetch, Q, When
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 
-from reviews.models import Category, Genre, Review, Title, User
+from reviews import search
+from reviews.models import (
+    Category, Comment, Genre, Review, Title, TitleRanking, TitleSimilarity,
+    TitleStats, User, UserRecommendation,
+)
 
+from .cache import comments_namespace, get_stats, invalidate
+from .export import EXPORTS
 from .filters import TitleFilter
-from .mixins import DestroyCreateListMixins, RetrieveUpdateViewSet
-from .pagination import GenresAndCategoriesPagination
+from .mixins import (
+    ConditionalGetMixin, DestroyCreateListMixins, FastListMixin,
+    ReplicaReadMixin, RetrieveUpdateViewSet, TitleVersionCacheMixin,
+)
+from .pagination import (
+    GenresAndCategoriesPagination, LimitOffsetOrCursorPagination,
+)
 from .permissions import AdminPermission, CustomPermission, OnlyAdminPermission
+from .renderers import CSVRenderer, NDJSONRenderer
 from .serializers import (
-    CategoriesSerializer, CommentSerializer, GenresSerializer,
-    GetTokenSerializer, RegistrationSerializer, RetrieveUpdateUserSerializer,
-    ReviewSerializer, TitlesGetSerializer, TitlesPostSerializer,
+    TITLE_EXPANSIONS, CategoriesSerializer, CommentCompactSerializer,
+    CommentSerializer, ExportQuerySerializer, GenresSerializer,
+    GetTokenSerializer, RecommendationsQuerySerializer, RegistrationSerializer,
+    RetrieveUpdateUserSerializer, ReviewSerializer, SearchQuerySerializer,
+    SimilarTitlesQuerySerializer, TitlesBulkSerializer,
+    TitlesExpandedSerializer, TitlesGetSerializer, TitlesListFastSerializer,
+    TitlesPostSerializer, TitleStatsSerializer, TopTitlesQuerySerializer,
     UserSerializer,
 )
 
 
-class TitlesViewSet(viewsets.ModelViewSet):
+class TitlesViewSet(ReplicaReadMixin, ConditionalGetMixin,
+                    TitleVersionCacheMixin, FastListMixin,
+                    viewsets.ModelViewSet):
     """Вьюсет модели Titles."""
 
-    queryset = (
-        Title.objects.annotate(rating=Avg('reviews__score'))
-        .select_related('category')
-        .prefetch_related('genre')
+    queryset = Title.objects.select_related('category').prefetch_related(
+        Prefetch('genre', queryset=Genre.objects.order_by('pk'))
     )
+    fast_list_serializer_class = TitlesListFastSerializer
     permission_classes = (OnlyAdminPermission,)
     filter_backends = (filters.SearchFilter, DjangoFilterBackend)
     filterset_class = TitleFilter
     ordering_fields = ('name', 'year')
-    pagination_class = LimitOffsetPagination
+    pagination_class = LimitOffsetOrCursorPagination
+    cursor_ordering = ('id',)
+    cache_namespace = 'titles'
+    title_lookup_kwarg = 'pk'
+
+    def get_etag_namespaces(self):
+        """Список произведений показывает названия категорий и жанров."""
+        return (self.cache_namespace, 'categories', 'genres')
+
+    def get_validators(self, request):
+        """
+        Версия произведения учитывает его категорию, жанры и отзывы, в том
+        числе встраиваемые через `?expand=`.
+        """
+        if self.action == 'retrieve':
+            return self.get_version_validators(request)
+        return super().get_validators(request)
+
+    def get_expand(self):
+        """Встраиваемые в ответ о произведении данные из `?expand=`."""
+        value = self.request.query_params.get('expand')
+        if self.action != 'retrieve' or not value:
+            return ()
+        expand = tuple(dict.fromkeys(
+            part.strip() for part in value.split(',') if part.strip()
+        ))
+        unknown = [part for part in expand if part not in TITLE_EXPANSIONS]
+        if unknown:
+            raise ValidationError({'expand': [
+                f'Неизвестные значения: {", ".join(unknown)}. '
+                f'Допустимы: {", ".join(TITLE_EXPANSIONS)}.'
+            ]})
+        return expand
 
     def get_serializer_class(self):
         """Выбор сериализатора в зависимости от типа запроса."""
         if self.request.method == 'GET':
+            if self.get_expand():
+                return TitlesExpandedSerializer
             return TitlesGetSerializer
         return TitlesPostSerializer
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = self.get_expand()
+        return context
+
+    def get_queryset(self):
+        """
+        С `?q=` список ограничен найденными произведениями по рангу;
+        с `?expand=` статистика оценок загружается вместе с произведением.
+        """
+        queryset = super().get_queryset()
+        if self.get_expand():
+            queryset = queryset.select_related('stats')
+        query = self.request.query_params.get('q')
+        if self.action != 'list' or not search.parse_query(query):
+            return queryset
+        found = [
+            pk for _, pk in search.search(
+                query, kinds=('title',), limit=settings.SEARCH_LIMIT
+            )
+        ]
+        if not found:
+            return queryset.none()
+        return queryset.filter(pk__in=found).order_by(Case(
+            *[When(pk=pk, then=rank) for rank, pk in enumerate(found)],
+            output_field=IntegerField(),
+        ))
+
+    @action(detail=False, methods=('post',), url_path='bulk')
+    def bulk(self, request):
+        """
+        Создаёт произведения из списка: категории и жанры всех элементов —
+        по запросу на модель, вставка — пачками в одной транзакции.
+        Ошибочные элементы возвращаются в `errors` с индексом, остальные
+        создаются; с `?atomic=true` любая ошибка отменяет весь список.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                'Ожидается непустой список произведений.'
+            ]})
+        if len(items) > settings.TITLES_BULK_LIMIT:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                f'Не больше {settings.TITLES_BULK_LIMIT} произведений '
+                f'за запрос.'
+            ]})
+        context = {
+            **self.get_serializer_context(),
+            'preloaded': TitlesBulkSerializer.preload(items),
+        }
+        checked = [
+            TitlesBulkSerializer(data=item, context=context) for item in items
+        ]
+        errors = [
+            {'index': index, 'errors': serializer.errors}
+            for index, serializer in enumerate(checked)
+            if not serializer.is_valid()
+        ]
+        valid = [serializer for serializer in checked if not serializer.errors]
+        atomic = request.query_params.get('atomic', '').lower() in (
+            'true', '1'
+        )
+        if errors and (atomic or not valid):
+            return Response(
+                {'created': [], 'errors': errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        titles = [
+            Title(**{
+                field: value
+                for field, value in serializer.validated_data.items()
+                if field != 'genre'
+            })
+            for serializer in valid
+        ]
+        with transaction.atomic():
+            Title.objects.bulk_create_with_genres(titles, [
+                serializer.validated_data['genre'] for serializer in valid
+            ])
+            search.index_objects(titles)
+        # Сигналы post_save при bulk_create не срабатывают.
+        invalidate(self.cache_namespace)
+        created = [
+            serializer.to_representation({
+                'id': title.pk, 'description': title.description,
+                **serializer.validated_data,
+            })
+            for title, serializer in zip(titles, valid)
+        ]
+        return Response(
+            {'created': created, 'errors': errors},
+            status=status.HTTP_201_CREATED
+        )
+
+
+class TitleStatsAPIView(ReplicaReadMixin, APIView):
+    """Статистика оценок произведения: одна строка по первичному ключу."""
+
+    permission_classes = (permissions.AllowAny,)
+
+    def get(self, request, title_id):
+        """Гистограмма, среднее и дисперсия оценок."""
+        stats = TitleStats.objects.filter(title_id=title_id).first()
+        if stats is None:
+            if not Title.objects.filter(pk=title_id).exists():
+                raise Http404
+            stats = TitleStats(title_id=title_id)
+        return Response(TitleStatsSerializer(stats).data)
+
+
+class SimilarTitlesAPIView(ReplicaReadMixin, APIView):
+    """
+    Похожие произведения из индекса TitleSimilarity, который строит
+    команда refresh_similar_titles; чтение — один запрос по title_id.
+    """
+
+    permission_classes = (permissions.AllowAny,)
+
+    def get(self, request, title_id):
+        """Соседи произведения по убыванию сходства."""
+        params = SimilarTitlesQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        rows = list(
+            TitleSimilarity.objects.filter(title_id=title_id).values(
+                'similar_id', 'similar__name', 'similar__year',
+                'similar__category__name', 'similar__category__slug',
+                'score',
+            )[:params.validated_data['limit']]
+        )
+        if not rows and not Title.objects.filter(pk=title_id).exists():
+            raise Http404
+        results = [
+            {
+                'id': row['similar_id'],
+                'name': row['similar__name'],
+                'year': row['similar__year'],
+                'category': (
+                    None if row['similar__category__slug'] is None else {
+                        'name': row['similar__category__name'],
+                        'slug': row['similar__category__slug'],
+                    }
+                ),
+                'score': row['score'],
+            }
+            for row in rows
+        ]
+        return Response({'count': len(results), 'results': results})
+
+
+class ExportAPIView(ReplicaReadMixin, APIView):
+    """
+    Потоковая выгрузка произведений, отзывов или комментариев в NDJSON
+    (по умолчанию) или CSV (`?format=csv`) для администраторов. Строки
+    читаются пачками по EXPORT_CHUNK_SIZE уже во время отдачи ответа.
+    """
+
+    permission_classes = (AdminPermission,)
+    renderer_classes = (NDJSONRenderer, CSVRenderer)
+
+    def get(self, request, kind):
+        """Все строки таблицы kind после курсора `?since=`/`?since_id=`."""
+        if kind not in EXPORTS:
+            raise Http404
+        export_class = EXPORTS[kind]
+        params = ExportQuerySerializer(
+            data=request.query_params, context={'keys': export_class.keys}
+        )
+        params.is_valid(raise_exception=True)
+        # База выбирается сейчас: ответ читается после выхода из dispatch,
+        # когда разрешение читать с реплики уже сброшено.
+        export = export_class(
+            router.db_for_read(export_class.model),
+            settings.EXPORT_CHUNK_SIZE,
+        )
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(
+                export.fields, export.rows(**params.validated_data)
+            ),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}',
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{kind}.{renderer.format}"'
+        )
+        return response
+
+
+class RecommendationsAPIView(ReplicaReadMixin, APIView):
+    """
+    Персональные рекомендации из UserRecommendation, которые строит
+    команда build_recommendations; чтение — один запрос по user_id.
+    """
+
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request):
+        """Непрочитанные произведения по убыванию предсказанной оценки."""
+        params = RecommendationsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        rows = UserRecommendation.objects.filter(
+            user_id=request.user.pk
+        ).values(
+            'title_id', 'title__name', 'title__year',
+            'title__category__name', 'title__category__slug', 'score',
+        )[:params.validated_data['limit']]
+        results = [
+            {
+                'id': row['title_id'],
+                'name': row['title__name'],
+                'year': row['title__year'],
+                'category': (
+                    None if row['title__category__slug'] is None else {
+                        'name': row['title__category__name'],
+                        'slug': row['title__category__slug'],
+                    }
+                ),
+                'score': row['score'],
+            }
+            for row in rows
+        ]
+        return Response({'count': len(results), 'results': results})
+
+
+class TopTitlesAPIView(ReplicaReadMixin, APIView):
+    """
+    Лучшие произведения по байесовской оценке из TitleRanking: один
+    запрос по индексу рейтинга вместо сортировки агрегатов.
+    """
+
+    permission_classes = (permissions.AllowAny,)
+
+    def get(self, request):
+        """Лидеры рейтинга, можно ограничить категорией и жанром."""
+        params = TopTitlesQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        rankings = TitleRanking.objects.all()
+        if 'category' in params.validated_data:
+            rankings = rankings.filter(
+                category__slug=params.validated_data['category']
+            )
+        if 'genre' in params.validated_data:
+            rankings = rankings.filter(
+                title__genre__slug=params.validated_data['genre']
+            )
+        rows = rankings.values(
+            'title_id', 'title__name', 'title__year', 'title__rating',
+            'category__name', 'category__slug', 'review_count', 'score',
+        )[:params.validated_data['limit']]
+        results = [
+            {
+                'rank': rank,
+                'id': row['title_id'],
+                'name': row['title__name'],
+                'year': row['title__year'],
+                'category': None if row['category__slug'] is None else {
+                    'name': row['category__name'],
+                    'slug': row['category__slug'],
+                },
+                'rating': (
+                    None if row['title__rating'] is None
+                    else int(row['title__rating'])
+                ),
+                'review_count': row['review_count'],
+                'score': row['score'],
+            }
+            for rank, row in enumerate(rows, start=1)
+        ]
+        return Response({'count': len(results), 'results': results})
+
 
 class GenresViewSet(DestroyCreateListMixins):
     """Вьюсет модели Genres."""
 
     queryset = Genre.objects.all()
     serializer_class = GenresSerializer
+    cache_namespace = 'genres'
     permission_classes = (OnlyAdminPermission,)
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
@@ -61,6 +387,7 @@ class CategoriesViewSet(DestroyCreateListMixins):
 
     queryset = Category.objects.all()
     serializer_class = CategoriesSerializer
+    cache_namespace = 'categories'
     permission_classes = (OnlyAdminPermission,)
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
@@ -68,34 +395,79 @@ class CategoriesViewSet(DestroyCreateListMixins):
     pagination_class = GenresAndCategoriesPagination
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ReplicaReadMixin, ConditionalGetMixin,
+                    TitleVersionCacheMixin, viewsets.ModelViewSet):
     """Список отзывов."""
 
     serializer_class = ReviewSerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = LimitOffsetOrCursorPagination
+    cursor_ordering = ('pub_date', 'id')
     permission_classes = (CustomPermission,)
 
+    def get_validators(self, request):
+        return self.get_version_validators(request)
+
     def get_queryset(self):
         """Получение отзывов."""
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        return title.reviews.all()
+        title = self.get_title()
+        if title is None:
+            raise Http404
+        return title.reviews.select_related('author')
 
     def perform_create(self, serializer):
-        """Создание отзывов."""
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
+        """
+        Создание отзыва: одна проверка произведения и INSERT, повторный
+        отзыв отсекает ограничение uq_author_title.
+        """
+        title = self.get_title()
+        if title is None:
+            raise Http404
         author = self.request.user
-        serializer.save(author=author, title=title)
-
-
-class CommentViewSet(viewsets.ModelViewSet):
+        try:
+            with transaction.atomic():
+                serializer.save(author=author, title=title)
+        except IntegrityError:
+            if not title.reviews.filter(author=author).exists():
+                raise
+            raise ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Отзыв на произведение уже написан.'
+                ]
+            })
+
+
+class CommentViewSet(ReplicaReadMixin, ConditionalGetMixin,
+                     viewsets.ModelViewSet):
     """Список комментарией."""
 
     serializer_class = CommentSerializer
+    pagination_class = LimitOffsetOrCursorPagination
+    cursor_ordering = ('pub_date', 'id')
     permission_classes = (CustomPermission,)
 
+    def get_etag_namespaces(self):
+        return (comments_namespace(self.kwargs.get('review_id')),)
+
+    def is_compact(self):
+        """Запрошена ли ссылка на отзыв по id (`?review_field=id`)."""
+        return self.request.query_params.get('review_field') == 'id'
+
+    def get_serializer_class(self):
+        """Выбор сериализатора в зависимости от формата ссылки на отзыв."""
+        if self.is_compact():
+            return CommentCompactSerializer
+        return CommentSerializer
+
     def get_queryset(self):
-        """Получение комментариев."""
-        review = get_object_or_404(Review, pk=self.kwargs.get('review_id'))
+        """
+        Получение комментариев.
+        Отзыв загружается один раз и переиспользуется всеми комментариями
+        страницы; в компактном режиме его текст не читается вовсе.
+        """
+        reviews = Review.objects.all()
+        if self.is_compact():
+            reviews = reviews.only('id')
+        review = get_object_or_404(reviews, pk=self.kwargs.get('review_id'))
         return review.comments.select_related('author')
 
     def perform_create(self, serializer):
@@ -113,35 +485,120 @@ class RegistrationAPIView(APIView):
     def post(self, request):
         """Обработка POST-запросов для регистрации нового пользователя."""
         serializer = RegistrationSerializer(data=request.data)
-        if serializer.is_valid():
-            username = serializer.validated_data.get('username')
-            email = serializer.validated_data.get('email')
-            username_search = User.objects.filter(username=username).exists()
-            email_search = User.objects.filter(email=email).exists()
-            email_and_username_search = User.objects.filter(
-                username=username,
-                email=email)
-            if email_and_username_search:
-                return Response(
-                    {
-                        'error': 'Пользователь с таким username '
-                        'и email уже существует'
-                    },
-                    status=status.HTTP_200_OK,
-                )
-            if email_search:
-                return Response(
-                    {'error': 'Это email уже используется'},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            if username_search and not email_search:
-                return Response(
-                    {'error': 'Неправильный email'},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not serializer.is_valid():
+            return Response(
+                serializer.errors, status=status.HTTP_400_BAD_REQUEST
+            )
+        username = serializer.validated_data.get('username')
+        email = serializer.validated_data.get('email')
+        conflict = self.get_conflict_response(username, email)
+        if conflict is not None:
+            return conflict
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            # Параллельная регистрация успела занять username или email.
+            conflict = self.get_conflict_response(username, email)
+            if conflict is None:
+                raise
+            return conflict
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def get_conflict_response(username, email):
+        """
+        Одним запросом проверяет, заняты ли username и email, и возвращает
+        ответ для занятых или None, если регистрацию можно продолжать.
+        """
+        matches = list(
+            User.objects.filter(Q(username=username) | Q(email=email))
+            .values_list('username', 'email')[:2]
+        )
+        if (username, email) in matches:
+            return Response(
+                {
+                    'error': 'Пользователь с таким username '
+                    'и email уже существует'
+                },
+                status=status.HTTP_200_OK,
+            )
+        if any(found_email == email for _, found_email in matches):
+            return Response(
+                {'error': 'Это email уже используется'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if matches:
+            return Response(
+                {'error': 'Неправильный email'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return None
+
+
+class CacheStatsAPIView(APIView):
+    """Счётчики попаданий и промахов кеша списков."""
+
+    permission_classes = (AdminPermission,)
+
+    def get(self, request):
+        """Обработка GET-запросов к статистике кеша."""
+        return Response(get_stats((
+            CategoriesViewSet.cache_namespace,
+            GenresViewSet.cache_namespace,
+        )))
+
+
+class SearchAPIView(ReplicaReadMixin, APIView):
+    """Полнотекстовый поиск по произведениям, отзывам и комментариям."""
+
+    permission_classes = (permissions.AllowAny,)
+
+    def get(self, request):
+        """Найденные объекты по убыванию релевантности."""
+        params = SearchQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        found = search.search(
+            params.validated_data['q'],
+            kinds=params.validated_data.get('type') or search.KINDS,
+            limit=params.validated_data['limit'],
+        )
+        objects = self.load(found)
+        results = [
+            objects[kind][pk] for kind, pk in found if pk in objects[kind]
+        ]
+        return Response({'count': len(results), 'results': results})
+
+    @staticmethod
+    def load(found):
+        """Данные найденных объектов: по одному запросу на тип."""
+        ids = {kind: [] for kind in search.KINDS}
+        for kind, pk in found:
+            ids[kind].append(pk)
+        objects = {kind: {} for kind in search.KINDS}
+        if ids['title']:
+            for pk, name in Title.objects.filter(
+                    pk__in=ids['title']).values_list('pk', 'name'):
+                objects['title'][pk] = {
+                    'type': 'title', 'id': pk, 'title': pk,
+                    'review': None, 'text': name,
+                }
+        if ids['review']:
+            for pk, title_id, text in Review.objects.filter(
+                    pk__in=ids['review']).values_list('pk', 'title', 'text'):
+                objects['review'][pk] = {
+                    'type': 'review', 'id': pk, 'title': title_id,
+                    'review': pk, 'text': text,
+                }
+        if ids['comment']:
+            for pk, title_id, review_id, text in Comment.objects.filter(
+                    pk__in=ids['comment']).values_list(
+                        'pk', 'review__title', 'review', 'text'):
+                objects['comment'][pk] = {
+                    'type': 'comment', 'id': pk, 'title': title_id,
+                    'review': review_id, 'text': text,
+                }
+        return objects
 
 
 class GetTokenAPIView(APIView):
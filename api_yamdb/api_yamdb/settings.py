@@ -32,6 +32,11 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Заголовки X-DB-Queries/X-DB-Time и лог запросов сверх бюджета.
+QUERY_COUNT_BUDGET = int(os.getenv('QUERY_COUNT_BUDGET', 20))
+if os.getenv('QUERY_COUNT_MIDDLEWARE', 'False') == 'True':
+    MIDDLEWARE.insert(0, 'api.middleware.QueryCountMiddleware')
+
 ROOT_URLCONF = 'api_yamdb.urls'
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
@@ -54,12 +59,135 @@ TEMPLATES = [
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
 
-DATABASES = {
+# База выбирается переменными окружения; по умолчанию SQLite.
+# Тесты запускаются на той же СУБД: с DB_ENGINE=postgresql pytest создаёт
+# и удаляет тестовую базу на указанном сервере.
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite3')
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'yamdb'),
+            'USER': os.getenv('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', 0)),
+            'TEST': {'NAME': os.getenv('DB_TEST_NAME')},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            # Файловая тестовая база: в общей in-memory базе SQLite
+            # параллельные соединения получают "table is locked" вместо
+            # ожидания блокировки.
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+        }
+    }
+
+# Профиль SQLite для продакшена: WAL позволяет читать во время записи,
+# synchronous=NORMAL в режиме WAL безопасен при сбое процесса, а
+# постоянные соединения не переоткрывают файл базы на каждый запрос.
+# PRAGMA применяются к каждому новому соединению (reviews.signals).
+SQLITE_PRODUCTION = os.getenv('SQLITE_PRODUCTION', 'False') == 'True'
+SQLITE_PRAGMAS = {}
+if SQLITE_PRODUCTION and DB_ENGINE == 'sqlite3':
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,
+        'temp_store': 'MEMORY',
+    }
+    DATABASES['default']['CONN_MAX_AGE'] = int(
+        os.getenv('CONN_MAX_AGE', 600)
+    )
+    DATABASES['default']['OPTIONS'] = {'timeout': 20}
+
+# Реплики для чтения: список имён баз SQLite или хостов PostgreSQL через
+# запятую. Безопасные запросы к вьюсетам читают с реплик (api.routers),
+# после записи пользователь REPLICA_PIN_SECONDS секунд читает с основной
+# (нужен REPLICA_PIN_CACHE_ALIAS, см. ниже).
+# В тестах реплики зеркалируют основную базу.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(
+        filter(None, os.getenv('DB_REPLICAS', '').split(',')), start=1):
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST' if DB_ENGINE == 'postgresql' else 'NAME': replica,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 5))
+
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
+# Кеш ответов API и время жизни закешированных страниц, секунд.
+API_CACHE_ALIAS = 'default'
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', 300))
+
+# Метки отзыва claims токенов (api.v1.authentication) хранятся в отдельном
+# кеше: общем для всех процессов и без вытеснения (например, Redis с
+# maxmemory-policy noeviction). Без него claims не используются и
+# пользователь при каждом запросе загружается из БД.
+AUTH_REVOCATION_CACHE_ALIAS = None
+if os.getenv('AUTH_REVOCATION_CACHE_BACKEND'):
+    CACHES['auth_revocation'] = {
+        'BACKEND': os.getenv('AUTH_REVOCATION_CACHE_BACKEND'),
+        'LOCATION': os.getenv('AUTH_REVOCATION_CACHE_LOCATION', ''),
+    }
+    AUTH_REVOCATION_CACHE_ALIAS = 'auth_revocation'
+
+# Закрепления за основной базой после записи (api.routers) хранятся в
+# отдельном кеше, общем для всех процессов и без вытеснения: иначе
+# пользователь, записавший через один процесс, читал бы с отстающей
+# реплики через другой. Без него реплики не используются.
+REPLICA_PIN_CACHE_ALIAS = None
+if os.getenv('REPLICA_PIN_CACHE_BACKEND'):
+    CACHES['replica_pin'] = {
+        'BACKEND': os.getenv('REPLICA_PIN_CACHE_BACKEND'),
+        'LOCATION': os.getenv('REPLICA_PIN_CACHE_LOCATION', ''),
+    }
+    REPLICA_PIN_CACHE_ALIAS = 'replica_pin'
+
+# Сколько найденных произведений учитывает `?q=` в списке произведений.
+SEARCH_LIMIT = int(os.getenv('SEARCH_LIMIT', 1000))
+
+# Сколько отзывов встраивает `GET /titles/{id}/?expand=reviews`.
+TITLE_EXPAND_REVIEWS = int(os.getenv('TITLE_EXPAND_REVIEWS', 10))
+
+# Сколько произведений принимает один запрос `POST /titles/bulk/`.
+TITLES_BULK_LIMIT = int(os.getenv('TITLES_BULK_LIMIT', 1000))
+
+# Минимум отзывов для попадания в `/titles/top/`; он же вес средней оценки
+# по всем отзывам в байесовском среднем.
+TOP_MIN_REVIEWS = int(os.getenv('TOP_MIN_REVIEWS', 5))
+
+# Сколько соседей хранит индекс похожих произведений и какая доля
+# сходства приходится на общих рецензентов (остальное — жанры и категория).
+SIMILAR_TITLES_COUNT = int(os.getenv('SIMILAR_TITLES_COUNT', 10))
+SIMILAR_TITLES_COREVIEW_WEIGHT = float(
+    os.getenv('SIMILAR_TITLES_COREVIEW_WEIGHT', 0.5)
+)
+
+# Сколько рекомендаций на пользователя сохраняет build_recommendations.
+RECOMMENDATIONS_COUNT = int(os.getenv('RECOMMENDATIONS_COUNT', 20))
+
+# Сколько строк читает один запрос потоковой выгрузки `/export/`.
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 1000))
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -99,7 +227,7 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.v1.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 10,
@@ -116,3 +244,8 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
+# Access-токены с claims живут меньше: claims нельзя отозвать иначе, чем
+# меткой в кеше отзыва, и окно устаревшей роли ограничено этим временем.
+CLAIMS_ACCESS_TOKEN_LIFETIME = timedelta(
+    minutes=int(os.getenv('CLAIMS_ACCESS_TOKEN_MINUTES', 15))
+)
@@ -2,13 +2,19 @@
 
 from django.contrib import admin
 
-from .models import Category, Comment, Genre, Review, Title, User
+from .models import (
+    Category, Comment, Genre, OutboundEmail, Review, Title, User,
+)
 
 
 class TitleAdmin(admin.ModelAdmin):
     """Админка модели Titles."""
 
-    list_display = ('pk', 'name', 'year', 'description', 'category')
+    list_display = (
+        'pk', 'name', 'year', 'description', 'category', 'rating',
+        'review_count'
+    )
+    readonly_fields = ('score_sum', 'review_count', 'rating')
     search_fields = ('name',)
     list_filter = ('id',)
     empty_value_display = '-пусто-'
@@ -23,9 +29,22 @@ class ReviewAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
+class OutboundEmailAdmin(admin.ModelAdmin):
+    """Админка очереди исходящих писем."""
+
+    list_display = (
+        'pk', 'to', 'subject', 'status', 'attempts', 'next_attempt_at',
+        'sent_at'
+    )
+    search_fields = ('to',)
+    list_filter = ('status',)
+    empty_value_display = '-пусто-'
+
+
 admin.site.register(Title, TitleAdmin)
 admin.site.register(Genre)
 admin.site.register(Category)
 admin.site.register(Review, ReviewAdmin)
 admin.site.register(Comment)
 admin.site.register(User)
+admin.site.register(OutboundEmail, OutboundEmailAdmin)
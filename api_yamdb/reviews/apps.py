@@ -8,3 +8,7 @@ class ReviewsConfig(AppConfig):
 
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reviews'
+
+    def ready(self):
+        """Подключение сигналов приложения."""
+        from . import signals  # noqa: F401
@@ -0,0 +1,94 @@
+"""Замер построения рекомендаций на синтетических оценках."""
+
+import resource
+import time
+import tracemalloc
+
+import numpy as np
+
+from django.core.management.base import BaseCommand
+
+from reviews import recommendations
+
+
+def synthetic_reviews(reviews, users, titles, seed):
+    """
+    Оценки со скрытой структурой: у пользователей и произведений по
+    несколько вкусов, пары (пользователь, произведение) уникальны.
+    """
+    rng = np.random.default_rng(seed)
+    keys = np.unique(rng.integers(
+        0, users * titles, size=int(reviews * 1.05), dtype=np.int64
+    ))[:reviews]
+    rng.shuffle(keys)
+    user_ids, title_ids = keys // titles, keys % titles
+    tastes = rng.normal(size=(users, 4)).astype(np.float32)
+    traits = rng.normal(size=(titles, 4)).astype(np.float32)
+    scores = 5.5 + 1.5 * np.einsum(
+        'ij,ij->i', tastes[user_ids], traits[title_ids]
+    ) + rng.normal(size=len(keys))
+    return user_ids, title_ids, np.clip(np.rint(scores), 1, 10).astype(
+        np.int64
+    )
+
+
+class Command(BaseCommand):
+    """Время и память построения рекомендаций без базы данных."""
+
+    help = (
+        'Генерирует синтетические оценки и замеряет время каждого этапа '
+        'построения рекомендаций и пиковую память. База не используется.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reviews', type=int, default=1_000_000)
+        parser.add_argument('--users', type=int, default=50_000)
+        parser.add_argument('--titles', type=int, default=10_000)
+        parser.add_argument('--factors', type=int, default=16)
+        parser.add_argument('--iterations', type=int, default=10)
+        parser.add_argument('--count', type=int, default=20)
+        parser.add_argument('--workers', type=int, default=None)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        columns = synthetic_reviews(
+            options['reviews'], options['users'], options['titles'],
+            options['seed'],
+        )
+        tracemalloc.start()
+        timings = {}
+
+        started = time.perf_counter()
+        matrix = recommendations.RatingMatrix(*columns)
+        timings['матрица'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        factors = recommendations.factorize(
+            matrix, options['factors'], options['iterations'],
+            workers=options['workers'], seed=options['seed'],
+        )
+        timings['ALS'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        rows = sum(
+            len(titles) for _, titles, _ in recommendations.top_unseen(
+                matrix, *factors, options['count']
+            )
+        )
+        timings['top-N'] = time.perf_counter() - started
+
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.stdout.write(
+            f'Отзывов: {len(matrix)}, пользователей: '
+            f'{len(matrix.user_ids)}, произведений: '
+            f'{len(matrix.title_ids)}, рекомендаций: {rows}'
+        )
+        for stage, seconds in timings.items():
+            self.stdout.write(f'{stage:>8}: {seconds:.2f} с')
+        self.stdout.write(
+            f'RMSE: {recommendations.rmse(matrix, *factors):.3f}, '
+            f'пик памяти NumPy: {peak / 2 ** 20:.0f} МиБ, RSS процесса: '
+            f'{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024} '
+            f'МиБ'
+        )
@@ -0,0 +1,162 @@
+"""Замер конкурентного чтения и записи в SQLite с PRAGMA и без."""
+
+import multiprocessing
+import shutil
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+# PRAGMA по умолчанию: журнал отката и полная синхронизация.
+DEFAULT_PRAGMAS = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+READ_SQL = (
+    'SELECT id, name, year, rating FROM reviews_title '
+    'ORDER BY id LIMIT 10 OFFSET ?'
+)
+REVIEWS_SQL = (
+    'SELECT id, text, score, pub_date FROM reviews_review '
+    'WHERE title_id = ? ORDER BY pub_date, id LIMIT 10'
+)
+WRITE_SQL = (
+    'INSERT INTO reviews_comment (review_id, author_id, text, pub_date) '
+    "VALUES (?, ?, 'benchmark', datetime('now'))"
+)
+
+
+def connect(path, pragmas, timeout):
+    """Открывает соединение так же, как Django, и применяет PRAGMA."""
+    db = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+    for name, value in pragmas.items():
+        db.execute(f'PRAGMA {name} = {value}')
+    return db
+
+
+def worker(path, pragmas, timeout, writer, duration, sample, results):
+    """Выполняет чтения или записи до истечения duration секунд."""
+    db = connect(path, pragmas, timeout)
+    titles, review_id, author_id = sample
+    operations = errors = 0
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            if writer:
+                db.execute('BEGIN IMMEDIATE')
+                db.execute(WRITE_SQL, (review_id, author_id))
+                db.execute('COMMIT')
+            else:
+                offset = operations % max(titles, 1)
+                db.execute(READ_SQL, (offset,)).fetchall()
+                db.execute(REVIEWS_SQL, (offset + 1,)).fetchall()
+        except sqlite3.OperationalError:
+            errors += 1
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+            continue
+        latencies.append(time.perf_counter() - started)
+        operations += 1
+    db.close()
+    results.put((writer, operations, errors, max(latencies, default=0)))
+
+
+class Command(BaseCommand):
+    """Сравнивает конкурентную нагрузку без профиля и с SQLITE_PRAGMAS."""
+
+    help = (
+        'Запускает несколько процессов чтения и записи на копии базы '
+        'SQLite: сначала с PRAGMA по умолчанию, затем с профилем '
+        'SQLITE_PRAGMAS. Рабочая база не изменяется.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument(
+            '--duration', type=float, default=5,
+            help='Длительность каждого прогона, секунд.'
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=0.1,
+            help='Сколько соединение ждёт снятия блокировки, секунд.'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда работает только с SQLite.')
+        source = Path(connection.settings_dict['NAME'])
+        if not source.exists():
+            raise CommandError(f'База {source} не найдена.')
+        sample = self.sample(source)
+        tuned = dict(getattr(settings, 'SQLITE_PRAGMAS', None) or {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'mmap_size': 256 * 1024 * 1024,
+            'cache_size': -64 * 1024,
+        })
+        with tempfile.TemporaryDirectory() as directory:
+            for number, (label, pragmas) in enumerate((
+                    ('по умолчанию', DEFAULT_PRAGMAS), ('профиль', tuned))):
+                path = Path(directory) / f'run_{number}.sqlite3'
+                shutil.copyfile(source, path)
+                self.report(label, self.run(path, pragmas, sample, options))
+
+    @staticmethod
+    def sample(path):
+        """Число произведений и существующие отзыв и пользователь."""
+        db = sqlite3.connect(path)
+        try:
+            titles = db.execute(
+                'SELECT COUNT(*) FROM reviews_title'
+            ).fetchone()[0]
+            review = db.execute(
+                'SELECT id, author_id FROM reviews_review LIMIT 1'
+            ).fetchone()
+        finally:
+            db.close()
+        if review is None:
+            raise CommandError(
+                'Нет отзывов: заполните базу командой generate_data.'
+            )
+        return titles, *review
+
+    @staticmethod
+    def run(path, pragmas, sample, options):
+        """Запускает процессы и собирает их результаты."""
+        connect(path, pragmas, options['timeout']).close()
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        processes = [
+            context.Process(target=worker, args=(
+                str(path), pragmas, options['timeout'], writer,
+                options['duration'], sample, results
+            ))
+            for writer in (
+                [False] * options['readers'] + [True] * options['writers']
+            )
+        ]
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        return collected
+
+    def report(self, label, collected):
+        """Печатает пропускную способность чтения и записи."""
+        for writer, kind in ((False, 'чтение'), (True, 'запись')):
+            rows = [row for row in collected if row[0] is writer]
+            if not rows:
+                continue
+            operations = sum(row[1] for row in rows)
+            errors = sum(row[2] for row in rows)
+            worst = max(row[3] for row in rows) * 1000
+            self.stdout.write(
+                f'{label:<14}{kind:<8}операций {operations:>8}  '
+                f'ошибок блокировки {errors:>6}  '
+                f'худшая задержка {worst:>8.1f} мс'
+            )
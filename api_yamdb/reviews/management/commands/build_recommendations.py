@@ -0,0 +1,50 @@
+"""Построение персональных рекомендаций."""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from reviews import recommendations
+
+
+class Command(BaseCommand):
+    """Раскладывает матрицу оценок и сохраняет рекомендации."""
+
+    help = (
+        'Строит для каждого пользователя с отзывами список лучших '
+        'непрочитанных произведений по матричному разложению оценок (ALS) '
+        'и заменяет им сохранённые рекомендации.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count', type=int, default=None,
+            help='Сколько рекомендаций хранить (RECOMMENDATIONS_COUNT).'
+        )
+        parser.add_argument('--factors', type=int, default=16)
+        parser.add_argument('--iterations', type=int, default=10)
+        parser.add_argument('--regularization', type=float, default=0.1)
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Потоков для решения систем (по умолчанию — по числу ядер).'
+        )
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = options['count']
+        matrix, factors, saved = recommendations.build(
+            settings.RECOMMENDATIONS_COUNT if count is None else count,
+            factors=options['factors'],
+            iterations=options['iterations'],
+            regularization=options['regularization'],
+            workers=options['workers'],
+            seed=options['seed'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Отзывов: {len(matrix)}, пользователей: '
+            f'{len(matrix.user_ids)}, рекомендаций: {saved}, RMSE: '
+            f'{recommendations.rmse(matrix, *factors):.3f}, за '
+            f'{time.perf_counter() - started:.1f} с.'
+        ))
@@ -0,0 +1,190 @@
+"""Генерация синтетических данных для нагрузочного тестирования."""
+
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.v1.cache import invalidate_on_commit
+from reviews import search
+from reviews.models import (
+    Category, Comment, Genre, Review, Title, TitleRanking, TitleStats, User,
+)
+from reviews.utils import batched
+
+WORDS = (
+    'lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod '
+    'tempor incididunt ut labore et dolore magna aliqua enim ad minim veniam '
+    'quis nostrud exercitation ullamco laboris nisi aliquip ex ea commodo'
+).split()
+
+
+class Command(BaseCommand):
+    """Заполняет базу воспроизводимым синтетическим набором данных."""
+
+    help = (
+        'Генерирует пользователей, категории, жанры, произведения, отзывы '
+        'и комментарии пачками через bulk_create.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument(
+            '--reviews', type=int, default=10000,
+            help='Общее количество отзывов (не больше users * titles).'
+        )
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument(
+            '--max-genres', type=int, default=3,
+            help='Максимальное число жанров у произведения.'
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--prefix', default='gen',
+            help='Префикс для username, slug и email сгенерированных данных.'
+        )
+
+    def handle(self, *args, **options):
+        if options['reviews'] > options['users'] * options['titles']:
+            raise CommandError(
+                'Отзывов больше, чем пар пользователь-произведение: '
+                'uq_author_title не позволит их создать.'
+            )
+        if options['comments'] and not options['reviews']:
+            raise CommandError('Для комментариев нужны отзывы.')
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.prefix = options['prefix']
+        started = time.perf_counter()
+        with transaction.atomic():
+            users = self.create_users(options['users'])
+            categories = self.create_named(Category, options['categories'])
+            genres = self.create_named(Genre, options['genres'])
+            titles = self.create_titles(
+                options['titles'], categories, genres, options['max_genres']
+            )
+            reviews = self.create_reviews(options['reviews'], users, titles)
+            self.create_comments(options['comments'], users, reviews)
+            if titles:
+                created = Title.objects.filter(pk__gte=titles[0])
+                created.refresh_ratings()
+                TitleStats.objects.rebuild(created.values('pk'))
+                TitleRanking.objects.refresh()
+                invalidate_on_commit('titles')
+        if titles:
+            # bulk_create не вызывает сигналы, индексирующие объекты.
+            connection = search.get_connection(write=True)
+            with transaction.atomic(using=connection.alias):
+                search.rebuild(connection)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.perf_counter() - started:.1f} с.'
+        ))
+
+    def text(self, words):
+        """Случайный текст из заданного числа слов."""
+        return ' '.join(self.rng.choice(WORDS) for _ in range(words))
+
+    def insert(self, model, objects):
+        """Вставляет объекты пачками и возвращает их id по порядку."""
+        last = model.objects.order_by('-pk').values_list('pk', flat=True)
+        before = last.first() or 0
+        started = time.perf_counter()
+        count = 0
+        for batch in batched(objects, self.batch_size):
+            model.objects.bulk_create(batch, batch_size=self.batch_size)
+            count += len(batch)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{model._meta.model_name}: {count} '
+            f'({count / elapsed if elapsed else 0:.0f} строк/с)'
+        )
+        return list(
+            model.objects.filter(pk__gt=before).order_by('pk')
+            .values_list('pk', flat=True)
+        )
+
+    def create_users(self, count):
+        """Пользователи без пароля и без отправки писем."""
+        def users():
+            for number in range(count):
+                user = User(
+                    username=f'{self.prefix}_user_{number}',
+                    email=f'{self.prefix}_user_{number}@yamdb.fake',
+                    confirmation_code=str(
+                        self.rng.randint(100000000, 999999999)
+                    ),
+                )
+                user.set_unusable_password()
+                yield user
+        return self.insert(User, users())
+
+    def create_named(self, model, count):
+        """Категории или жанры с уникальными slug."""
+        return self.insert(model, (
+            model(
+                name=self.text(2).capitalize(),
+                slug=f'{self.prefix}-{model._meta.model_name}-{number}'
+            )
+            for number in range(count)
+        ))
+
+    def create_titles(self, count, categories, genres, max_genres):
+        """Произведения и их связи с жанрами."""
+        titles = self.insert(Title, (
+            Title(
+                name=self.text(3).capitalize(),
+                year=self.rng.randint(1900, 2020),
+                description=self.text(20),
+                category_id=(
+                    self.rng.choice(categories) if categories else None
+                ),
+            )
+            for _ in range(count)
+        ))
+        if genres and max_genres:
+            through = Title.genre.through
+            self.insert(through, (
+                through(title_id=title_id, genre_id=genre_id)
+                for title_id in titles
+                for genre_id in self.rng.sample(
+                    genres,
+                    self.rng.randint(1, min(max_genres, len(genres)))
+                )
+            ))
+        return titles
+
+    def create_reviews(self, count, users, titles):
+        """Отзывы: у каждого произведения авторы не повторяются."""
+        if not count:
+            return []
+        per_title, extra = divmod(count, len(titles))
+
+        def reviews():
+            for number, title_id in enumerate(titles):
+                authors = self.rng.sample(
+                    users, per_title + (1 if number < extra else 0)
+                )
+                for author_id in authors:
+                    yield Review(
+                        title_id=title_id,
+                        author_id=author_id,
+                        text=self.text(30),
+                        score=self.rng.randint(1, 10),
+                    )
+        return self.insert(Review, reviews())
+
+    def create_comments(self, count, users, reviews):
+        """Комментарии к случайным отзывам."""
+        return self.insert(Comment, (
+            Comment(
+                review_id=self.rng.choice(reviews),
+                author_id=self.rng.choice(users),
+                text=self.text(12),
+            )
+            for _ in range(count)
+        ))
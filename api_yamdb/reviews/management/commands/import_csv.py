@@ -0,0 +1,219 @@
+"""Загрузка данных из CSV-файлов static/data."""
+
+import csv
+import random
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from api.v1.cache import invalidate_on_commit
+from reviews import search
+from reviews.models import (
+    Category, Comment, Genre, Review, Title, TitleRanking, TitleStats, User,
+)
+from reviews.utils import batched
+
+# Файлы в порядке зависимостей по внешним ключам:
+# имя файла, модель, соответствие колонок CSV полям модели.
+CSV_FILES = (
+    ('users.csv', User, {
+        'id': 'id', 'username': 'username', 'email': 'email',
+        'role': 'role', 'bio': 'bio', 'first_name': 'first_name',
+        'last_name': 'last_name',
+    }),
+    ('category.csv', Category, {'id': 'id', 'name': 'name', 'slug': 'slug'}),
+    ('genre.csv', Genre, {'id': 'id', 'name': 'name', 'slug': 'slug'}),
+    ('titles.csv', Title, {
+        'id': 'id', 'name': 'name', 'year': 'year', 'category': 'category',
+    }),
+    ('genre_title.csv', Title.genre.through, {
+        'id': 'id', 'title_id': 'title', 'genre_id': 'genre',
+    }),
+    ('review.csv', Review, {
+        'id': 'id', 'title_id': 'title', 'text': 'text', 'author': 'author',
+        'score': 'score', 'pub_date': 'pub_date',
+    }),
+    ('comments.csv', Comment, {
+        'id': 'id', 'review_id': 'review', 'text': 'text',
+        'author': 'author', 'pub_date': 'pub_date',
+    }),
+)
+MAX_REPORTED_ERRORS = 10
+
+
+@contextmanager
+def keep_auto_now_add(model):
+    """Отключает auto_now_add, чтобы сохранить даты из файла."""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    """Потоково загружает CSV пачками через bulk_create."""
+
+    help = (
+        'Загружает users, category, genre, titles, genre_title, review и '
+        'comments из CSV с постоянным потреблением памяти.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=str(Path(settings.BASE_DIR) / 'static/data'),
+            help='Каталог с CSV-файлами.'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--only', nargs='*', default=None,
+            help='Загрузить только указанные файлы.'
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help=(
+                'Продолжить прерванную загрузку: пропускать строки с id не '
+                'больше последнего загруженного.'
+            )
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только проверить файлы, ничего не записывая в базу.'
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        files = [
+            spec for spec in CSV_FILES
+            if options['only'] is None or spec[0] in options['only']
+        ]
+        missing = [name for name, *_ in files if not (path / name).exists()]
+        if missing:
+            raise CommandError(f'Не найдены файлы: {", ".join(missing)}')
+        total_errors = 0
+        for name, model, columns in files:
+            if options['dry_run']:
+                total_errors += self.validate_file(
+                    path / name, model, columns
+                )
+            else:
+                self.import_file(path / name, model, columns, options)
+        if options['dry_run']:
+            if total_errors:
+                raise CommandError(f'Ошибок в файлах: {total_errors}')
+            self.stdout.write(self.style.SUCCESS('Ошибок не найдено.'))
+            return
+        if any(model is Review for _, model, _ in files):
+            Title.objects.refresh_ratings()
+            TitleStats.objects.rebuild()
+            TitleRanking.objects.refresh()
+            invalidate_on_commit('titles')
+        if any(model in (Title, Review, Comment) for _, model, _ in files):
+            # Строки вставлены в обход сигналов, индексирующих объекты.
+            search_connection = search.get_connection(write=True)
+            with transaction.atomic(using=search_connection.alias):
+                search.rebuild(search_connection)
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [model for _, model, _ in files]):
+                cursor.execute(sql)
+
+    def read_rows(self, path, model, columns):
+        """Построчно читает файл, возвращая номер строки и её значения."""
+        fields = {
+            column: model._meta.get_field(name)
+            for column, name in columns.items()
+        }
+        with open(path, encoding='utf-8', newline='') as file:
+            reader = csv.DictReader(file)
+            unknown = set(columns) - set(reader.fieldnames or ())
+            if unknown:
+                raise CommandError(
+                    f'{path.name}: нет колонок {", ".join(sorted(unknown))}'
+                )
+            for line, row in enumerate(reader, start=2):
+                yield line, fields, row
+
+    def build_rows(self, path, model, columns):
+        """Строит несохранённые объекты, прерываясь на первой ошибке."""
+        for line, fields, row in self.read_rows(path, model, columns):
+            try:
+                yield self.build(model, fields, row)
+            except ValidationError as error:
+                raise CommandError(f'{path.name}:{line}: {error.messages}')
+
+    @staticmethod
+    def build(model, fields, row):
+        """Создаёт объект модели из строки CSV."""
+        values = {}
+        for column, field in fields.items():
+            raw = row[column]
+            if raw == '' and field.null:
+                values[field.attname] = None
+            else:
+                values[field.attname] = field.to_python(raw)
+        instance = model(**values)
+        if model is User:
+            instance.confirmation_code = str(
+                random.randint(100000000, 999999999)
+            )
+            instance.set_unusable_password()
+        return instance
+
+    def import_file(self, path, model, columns, options):
+        """Загружает файл пачками, каждая пачка в своей транзакции."""
+        last_pk = 0
+        if options['resume']:
+            last_pk = (
+                model.objects.order_by('-pk')
+                .values_list('pk', flat=True).first() or 0
+            )
+        started = time.perf_counter()
+        count = skipped = 0
+        rows = self.build_rows(path, model, columns)
+        with keep_auto_now_add(model):
+            for batch in batched(rows, options['batch_size']):
+                objects = [obj for obj in batch if obj.pk > last_pk]
+                skipped += len(batch) - len(objects)
+                with transaction.atomic():
+                    model.objects.bulk_create(
+                        objects, batch_size=options['batch_size']
+                    )
+                count += len(objects)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{path.name}: загружено {count}, пропущено {skipped} '
+            f'({count / elapsed if elapsed else 0:.0f} строк/с)'
+        )
+
+    def validate_file(self, path, model, columns):
+        """Проверяет значения в файле и печатает найденные ошибки."""
+        exclude = [
+            field.name for field in model._meta.concrete_fields
+            if field.is_relation or field.name not in columns.values()
+        ]
+        errors = count = 0
+        for line, fields, row in self.read_rows(path, model, columns):
+            count += 1
+            try:
+                self.build(model, fields, row).clean_fields(exclude=exclude)
+            except ValidationError as error:
+                errors += 1
+                if errors <= MAX_REPORTED_ERRORS:
+                    self.stderr.write(f'{path.name}:{line}: {error}')
+        self.stdout.write(
+            f'{path.name}: проверено строк {count}, ошибок {errors}'
+        )
+        return errors
@@ -0,0 +1,80 @@
+"""Пересчёт хранимых рейтингов произведений."""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from api.v1.cache import invalidate_on_commit
+from reviews.models import Review, Title, TitleRanking
+from reviews.utils import batched
+
+
+class Command(BaseCommand):
+    """Пересчитывает score_sum, review_count и rating по таблице отзывов."""
+
+    help = (
+        'Пересчитывает рейтинги произведений с нуля и сообщает '
+        'о расхождениях с хранимыми значениями.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только сообщить о расхождениях, ничего не изменяя.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Размер пачки для bulk_update.'
+        )
+
+    def handle(self, *args, **options):
+        totals = {
+            row['title']: (row['score_sum'], row['review_count'])
+            for row in Review.objects.filter(title__isnull=False)
+            .values('title')
+            .annotate(score_sum=Sum('score'), review_count=Count('pk'))
+            .order_by()
+        }
+        drifted = []
+        stored = Title.objects.only(
+            'id', 'score_sum', 'review_count', 'rating'
+        ).order_by('pk')
+        for title in stored.iterator(chunk_size=options['batch_size']):
+            score_sum, review_count = totals.get(title.pk, (0, 0))
+            rating = score_sum / review_count if review_count else None
+            if (title.score_sum, title.review_count, title.rating) == (
+                    score_sum, review_count, rating):
+                continue
+            self.stdout.write(
+                f'Произведение {title.pk}: '
+                f'сумма {title.score_sum} -> {score_sum}, '
+                f'отзывов {title.review_count} -> {review_count}'
+            )
+            title.score_sum = score_sum
+            title.review_count = review_count
+            title.rating = rating
+            drifted.append(title)
+        if options['check']:
+            self.stdout.write(f'Расхождений найдено: {len(drifted)}')
+            return
+        with transaction.atomic():
+            Title.objects.bulk_update(
+                drifted,
+                ('score_sum', 'review_count', 'rating'),
+                batch_size=options['batch_size']
+            )
+            # Кеш по версии и ETag исправленных произведений устаревают.
+            for batch in batched(
+                    (title.pk for title in drifted), options['batch_size']):
+                Title.objects.filter(pk__in=batch).bump_versions()
+            if drifted:
+                invalidate_on_commit('titles')
+            # Рейтинг лучших строится по исправленным суммам и числу
+            # отзывов.
+            TitleRanking.objects.refresh()
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено произведений: {len(drifted)}'
+        ))
@@ -0,0 +1,23 @@
+"""Перестроение полнотекстового индекса."""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews import search
+
+
+class Command(BaseCommand):
+    """Заполняет reviews_search заново по всем произведениям и текстам."""
+
+    help = (
+        'Перестраивает поисковый индекс произведений, отзывов и '
+        'комментариев, например после загрузки данных в обход сигналов.'
+    )
+
+    def handle(self, *args, **options):
+        connection = search.get_connection(write=True)
+        with transaction.atomic(using=connection.alias):
+            count = search.rebuild(connection)
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано объектов: {count}'
+        ))
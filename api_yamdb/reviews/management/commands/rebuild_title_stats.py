@@ -0,0 +1,58 @@
+"""Пересчёт статистики оценок произведений."""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from reviews.models import TitleStats
+
+
+class Command(BaseCommand):
+    """Сверяет TitleStats с таблицей отзывов и строит её заново."""
+
+    help = (
+        'Пересчитывает гистограммы, суммы и суммы квадратов оценок '
+        'произведений по таблице отзывов. С --check только сообщает '
+        'о расхождениях и завершается с ошибкой, если они есть.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только сообщить о расхождениях, ничего не изменяя.'
+        )
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            with transaction.atomic():
+                count = TitleStats.objects.rebuild()
+            self.stdout.write(self.style.SUCCESS(
+                f'Пересчитано произведений: {count}'
+            ))
+            return
+        expected = TitleStats.objects.compute()
+        stored = {
+            stats.title_id: stats for stats in TitleStats.objects.all()
+        }
+        drifted = 0
+        for title_id in sorted(expected.keys() | stored.keys()):
+            empty = TitleStats(title_id=title_id)
+            actual = stored.get(title_id, empty)
+            correct = expected.get(title_id, empty)
+            fields = [
+                name for name in TitleStats.COUNTER_FIELDS
+                if getattr(actual, name) != getattr(correct, name)
+            ]
+            if not fields:
+                continue
+            drifted += 1
+            self.stdout.write(
+                f'Произведение {title_id}: ' + ', '.join(
+                    f'{name} {getattr(actual, name)} -> '
+                    f'{getattr(correct, name)}'
+                    for name in fields
+                )
+            )
+        if drifted:
+            raise CommandError(f'Расхождений найдено: {drifted}')
+        self.stdout.write(self.style.SUCCESS('Расхождений нет.'))
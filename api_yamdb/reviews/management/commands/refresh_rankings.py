@@ -0,0 +1,24 @@
+"""Полный пересчёт рейтинга лучших произведений."""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.models import TitleRanking
+
+
+class Command(BaseCommand):
+    """Строит TitleRanking заново с актуальной средней оценкой."""
+
+    help = (
+        'Пересчитывает рейтинг лучших произведений: обновляет среднюю '
+        'оценку по всем отзывам и байесовские оценки всех произведений. '
+        'Сигналы отзывов обновляют рейтинг по одному произведению, '
+        'команду стоит запускать периодически (например, из cron).'
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = TitleRanking.objects.refresh()
+        self.stdout.write(self.style.SUCCESS(
+            f'Произведений в рейтинге: {count}'
+        ))
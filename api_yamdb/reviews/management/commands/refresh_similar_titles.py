@@ -0,0 +1,43 @@
+"""Пересчёт индекса похожих произведений."""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews import similarity
+
+
+class Command(BaseCommand):
+    """Строит соседей произведений по жанрам, категории и рецензентам."""
+
+    help = (
+        'Пересчитывает похожие произведения. По умолчанию только для '
+        'произведений, у которых с прошлого запуска изменились жанры, '
+        'категория или отзывы, и для их соседей; с --full — для всех.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересчитать все произведения.'
+        )
+        parser.add_argument(
+            '--count', type=int, default=None,
+            help='Сколько соседей хранить (SIMILAR_TITLES_COUNT).'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=256,
+            help='Сколько произведений сравнивать со всеми за один шаг.'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = similarity.refresh(
+            full=options['full'],
+            count=options['count'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано произведений: {count} за '
+            f'{time.perf_counter() - started:.1f} с.'
+        ))
@@ -0,0 +1,125 @@
+"""Фоновая отправка писем из очереди."""
+
+import time
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from reviews.models import EMAIL_STATUS, OutboundEmail
+
+
+class Command(BaseCommand):
+    """Отправляет письма из OutboundEmail пачками с повторами."""
+
+    help = (
+        'Разбирает очередь исходящих писем: отправляет пачками через '
+        'EMAIL_BACKEND, при ошибке повторяет с экспоненциальной задержкой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--max-attempts', type=int, default=5,
+            help='После стольких неудач письмо помечается как failed.'
+        )
+        parser.add_argument(
+            '--backoff', type=float, default=30,
+            help='Задержка перед первой повторной попыткой, секунд.'
+        )
+        parser.add_argument(
+            '--max-backoff', type=float, default=3600,
+            help='Максимальная задержка между попытками, секунд.'
+        )
+        parser.add_argument(
+            '--lease', type=float, default=300,
+            help='На сколько секунд пачка закрепляется за процессом.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Пауза между опросами пустой очереди, секунд.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Отправить всё, что пора отправить, и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = self.process_batch(options)
+            if sent or failed:
+                self.stdout.write(
+                    f'Отправлено: {sent}, с ошибкой: {failed}'
+                )
+                continue
+            if options['once']:
+                return
+            time.sleep(options['interval'])
+
+    def process_batch(self, options):
+        """
+        Отправляет одну пачку писем и обновляет их статусы. Транзакции
+        короткие: захват пачки и запись статусов; SMTP-запросы идут вне
+        транзакции и не держат блокировку БД.
+        """
+        emails = OutboundEmail.objects.claim(
+            options['batch_size'], timedelta(seconds=options['lease'])
+        )
+        if not emails:
+            return 0, 0
+        sent = failed = 0
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as error:
+            for email in emails:
+                self.retry_later(email, error, options)
+            failed = len(emails)
+        else:
+            try:
+                for email in emails:
+                    if self.send(email, connection, options):
+                        sent += 1
+                    else:
+                        failed += 1
+            finally:
+                connection.close()
+        with transaction.atomic():
+            OutboundEmail.objects.bulk_update(
+                emails,
+                ('status', 'attempts', 'sent_at', 'next_attempt_at',
+                 'last_error')
+            )
+        return sent, failed
+
+    def send(self, email, connection, options):
+        """Отправляет одно письмо через открытое соединение."""
+        message = EmailMessage(
+            email.subject, email.body, email.from_email, [email.to],
+            connection=connection
+        )
+        try:
+            message.send()
+        except Exception as error:
+            self.retry_later(email, error, options)
+            return False
+        email.status = EMAIL_STATUS.sent.value
+        email.attempts += 1
+        email.sent_at = timezone.now()
+        return True
+
+    @staticmethod
+    def retry_later(email, error, options):
+        """Планирует повторную попытку или помечает письмо как failed."""
+        email.attempts += 1
+        email.last_error = repr(error)
+        if email.attempts >= options['max_attempts']:
+            email.status = EMAIL_STATUS.failed.value
+            return
+        delay = min(
+            options['backoff'] * 2 ** (email.attempts - 1),
+            options['max_backoff']
+        )
+        email.next_attempt_at = timezone.now() + timedelta(seconds=delay)
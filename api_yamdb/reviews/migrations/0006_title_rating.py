@@ -0,0 +1,52 @@
+# Generated by Django 3.2 on 2026-10-18 10:00
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_ratings(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    totals = (
+        Review.objects.filter(title__isnull=False)
+        .values('title')
+        .annotate(score_sum=Sum('score'), review_count=Count('pk'))
+        .order_by()
+    )
+    titles = []
+    for row in totals:
+        titles.append(Title(
+            pk=row['title'],
+            score_sum=row['score_sum'],
+            review_count=row['review_count'],
+            rating=row['score_sum'] / row['review_count'],
+        ))
+    Title.objects.bulk_update(
+        titles, ('score_sum', 'review_count', 'rating'), batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_auto_20230525_1147'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(blank=True, db_index=True, editable=False, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество отзывов'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(fill_ratings, migrations.RunPython.noop),
+    ]
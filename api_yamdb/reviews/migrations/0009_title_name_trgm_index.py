@@ -0,0 +1,34 @@
+from django.db import migrations
+
+# icontains в PostgreSQL строится как UPPER("name"::text) LIKE UPPER(%s),
+# поэтому индекс создаётся по тому же выражению. В SQLite LIKE с ESCAPE
+# индексы не использует, и миграция там ничего не делает.
+CREATE_INDEX = (
+    'CREATE INDEX IF NOT EXISTS title_name_trgm_idx ON reviews_title '
+    'USING gin (UPPER(name::text) gin_trgm_ops)'
+)
+DROP_INDEX = 'DROP INDEX IF EXISTS title_name_trgm_idx'
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(CREATE_INDEX)
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(DROP_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_outbound_email'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
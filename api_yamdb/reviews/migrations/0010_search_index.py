@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from reviews.search import create_index, drop_index
+
+
+def create_search_index(apps, schema_editor):
+    create_index(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    drop_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_title_name_trgm_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 06:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Растёт при любом изменении произведения, его жанров, отзывов и комментариев к ним.', verbose_name='Версия'),
+        ),
+    ]
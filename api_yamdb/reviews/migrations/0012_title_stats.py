@@ -0,0 +1,62 @@
+# Generated by Django 3.2 on 2026-10-18 07:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Q, Sum
+
+
+def fill_stats(apps, schema_editor):
+    TitleStats = apps.get_model('reviews', 'TitleStats')
+    Review = apps.get_model('reviews', 'Review')
+    rows = (
+        Review.objects.filter(title__isnull=False)
+        .values('title')
+        .annotate(
+            review_count=Count('pk'),
+            score_sum=Sum('score'),
+            score_sum_squares=Sum(F('score') * F('score')),
+            **{
+                f'score_{score}': Count('pk', filter=Q(score=score))
+                for score in range(1, 11)
+            },
+        )
+        .order_by()
+    )
+    TitleStats.objects.bulk_create(
+        (TitleStats(title_id=row.pop('title'), **row) for row in rows),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_title_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleStats',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='reviews.title', verbose_name='Произведение')),
+                ('review_count', models.PositiveIntegerField(default=0, verbose_name='Количество отзывов')),
+                ('score_sum', models.PositiveIntegerField(default=0, verbose_name='Сумма оценок')),
+                ('score_sum_squares', models.PositiveIntegerField(default=0, verbose_name='Сумма квадратов оценок')),
+                ('score_1', models.PositiveIntegerField(default=0, verbose_name='Отзывов с оценкой 1')),
+                ('score_2', models.PositiveIntegerField(default=0, verbose_name='Отзывов с оценкой 2')),
+                ('score_3', models.PositiveIntegerField(default=0, verbose_name='Отзывов с оценкой 3')),
+                ('score_4', models.PositiveIntegerField(default=0, verbose_name='Отзывов с оценкой 4')),
+                ('score_5', models.PositiveIntegerField(default=0, verbose_name='Отзывов с оценкой 5')),
+                ('score_6', models.PositiveIntegerField(default=0, verbose_name='Отзывов с оценкой 6')),
+                ('score_7', models.PositiveIntegerField(default=0, verbose_name='Отзывов с оценкой 7')),
+                ('score_8', models.PositiveIntegerField(default=0, verbose_name='Отзывов с оценкой 8')),
+                ('score_9', models.PositiveIntegerField(default=0, verbose_name='Отзывов с оценкой 9')),
+                ('score_10', models.PositiveIntegerField(default=0, verbose_name='Отзывов с оценкой 10')),
+            ],
+            options={
+                'verbose_name': 'Статистика оценок',
+                'verbose_name_plural': 'Статистика оценок',
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
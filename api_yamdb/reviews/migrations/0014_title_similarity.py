@@ -0,0 +1,34 @@
+# Generated by Django 3.2 on 2026-10-18 07:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0013_title_ranking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Место')),
+                ('score', models.FloatField(verbose_name='Сходство')),
+                ('title_version', models.PositiveIntegerField(verbose_name='Версия произведения')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reviews.title', verbose_name='Похожее произведение')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similarities', to='reviews.title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Похожее произведение',
+                'verbose_name_plural': 'Похожие произведения',
+                'ordering': ('title', 'rank'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='titlesimilarity',
+            constraint=models.UniqueConstraint(fields=('title', 'rank'), name='uq_similarity_title_rank'),
+        ),
+    ]
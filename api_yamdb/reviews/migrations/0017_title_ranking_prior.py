@@ -0,0 +1,39 @@
+# Generated by Django 3.2 on 2026-10-18 08:28
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def store_prior_mean(apps, schema_editor):
+    """Сохраняет текущую среднюю оценку по всем отзывам."""
+    Title = apps.get_model('reviews', 'Title')
+    TitleRankingPrior = apps.get_model('reviews', 'TitleRankingPrior')
+    totals = Title.objects.aggregate(
+        score_sum=Sum('score_sum'), review_count=Sum('review_count')
+    )
+    if totals['review_count']:
+        TitleRankingPrior.objects.create(
+            pk=1, mean=totals['score_sum'] / totals['review_count']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0016_export_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRankingPrior',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mean', models.FloatField(verbose_name='Средняя оценка')),
+            ],
+            options={
+                'verbose_name': 'Средняя оценка рейтинга',
+                'verbose_name_plural': 'Средняя оценка рейтинга',
+            },
+        ),
+        migrations.RunPython(store_prior_mean, migrations.RunPython.noop),
+    ]
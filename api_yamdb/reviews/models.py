@@ -6,16 +6,27 @@ import random
 
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser, UserManager
-from django.core.mail import send_mail
 from django.core.validators import (
     MaxValueValidator, MinValueValidator, RegexValidator,
 )
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import (
+    Case, Count, Exists, ExpressionWrapper, F, FloatField, OuterRef, Q,
+    Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
 
 from .validators import regex_validator, validate_username
 
 CHARS_TO_SHOW = 15
+# Поля пользователя, которые попадают в access-токен, чтобы аутентификация
+# обходилась без запроса к БД.
+TOKEN_CLAIMS = ('username', 'role', 'is_superuser')
+# Допустимые оценки отзыва.
+SCORES = range(1, 11)
 
 
 class ROLE_LIST(enum.Enum):
@@ -56,6 +67,93 @@ class Genre(models.Model):
         return self.name[:CHARS_TO_SHOW]
 
 
+class TitleQuerySet(models.QuerySet):
+    """Кверисет произведений с поддержкой хранимого рейтинга."""
+
+    def apply_score_delta(self, title_id, score_delta, count_delta):
+        """
+        Атомарно сдвигает сумму оценок и число отзывов произведения,
+        пересчитывает рейтинг и увеличивает версию одним UPDATE.
+        """
+        new_sum = F('score_sum') + score_delta
+        new_count = F('review_count') + count_delta
+        return self.filter(pk=title_id).update(
+            score_sum=new_sum,
+            review_count=new_count,
+            version=F('version') + 1,
+            rating=Case(
+                When(review_count__lte=-count_delta, then=Value(None)),
+                default=ExpressionWrapper(
+                    Cast(new_sum, FloatField()) / new_count,
+                    output_field=FloatField()
+                ),
+                output_field=FloatField(),
+            ),
+        )
+
+    def bump_versions(self):
+        """Увеличивает версии произведений кверисета одним UPDATE."""
+        return self.update(version=F('version') + 1)
+
+    def bulk_create_with_genres(self, titles, genres):
+        """
+        Вставляет произведения, их жанры (genres — списки жанров в порядке
+        titles) и нулевую статистику пачками в обход сигналов. Проставляет
+        titles их pk.
+        """
+        with transaction.atomic(using=self.db, savepoint=False):
+            last = self.order_by('-pk').values_list('pk', flat=True).first()
+            self.bulk_create(titles)
+            if any(title.pk is None for title in titles):
+                # Бэкенды без RETURNING (SQLite в Django 3.2): в транзакции
+                # новые строки — все id больше прежнего максимального.
+                ids = self.filter(pk__gt=last or 0).order_by('pk').values_list(
+                    'pk', flat=True
+                )
+                for title, pk in zip(titles, ids):
+                    title.pk = pk
+            Title.genre.through.objects.using(self.db).bulk_create([
+                Title.genre.through(title_id=title.pk, genre_id=genre.pk)
+                for title, title_genres in zip(titles, genres)
+                for genre in dict.fromkeys(title_genres)
+            ])
+            TitleStats.objects.using(self.db).bulk_create([
+                TitleStats(title_id=title.pk) for title in titles
+            ])
+        return titles
+
+    def refresh_ratings(self):
+        """
+        Пересчитывает хранимый рейтинг с нуля по таблице отзывов и
+        увеличивает версии произведений: их кеш и ETag устаревают.
+        Используется после массовых операций в обход сигналов.
+        """
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        score_sum = Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')),
+            0
+        )
+        review_count = Coalesce(
+            Subquery(reviews.annotate(total=Count('pk')).values('total')),
+            0
+        )
+        return self.update(
+            score_sum=score_sum,
+            review_count=review_count,
+            rating=Subquery(
+                reviews.annotate(
+                    avg=ExpressionWrapper(
+                        Cast(Sum('score'), FloatField()) / Count('pk'),
+                        output_field=FloatField()
+                    )
+                ).values('avg')
+            ),
+            version=F('version') + 1,
+        )
+
+
 class Title(models.Model):
     """Модель произведений."""
 
@@ -82,11 +180,139 @@ class Title(models.Model):
         blank=True,
         verbose_name='Жанр'
     )
+    score_sum = models.PositiveIntegerField(
+        'Сумма оценок', default=0, editable=False
+    )
+    review_count = models.PositiveIntegerField(
+        'Количество отзывов', default=0, editable=False
+    )
+    rating = models.FloatField(
+        'Рейтинг', null=True, blank=True, editable=False, db_index=True
+    )
+    version = models.PositiveIntegerField(
+        'Версия', default=0, editable=False,
+        help_text=(
+            'Растёт при любом изменении произведения, его жанров, отзывов '
+            'и комментариев к ним.'
+        )
+    )
+    objects = TitleQuerySet.as_manager()
+
+    # Поля, которые меняются только атомарными UPDATE и не перезаписываются
+    # значениями из памяти при сохранении произведения.
+    COUNTER_FIELDS = ('score_sum', 'review_count', 'rating', 'version')
 
     def __str__(self):
         """Текстовое отображение произведений."""
         return self.name[:CHARS_TO_SHOW]
 
+    def save(self, *args, **kwargs):
+        """
+        При изменении сохраняет всё, кроме счётчиков, и в том же UPDATE
+        увеличивает версию; новое значение загрузится при обращении.
+        """
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        update_fields = kwargs.pop('update_fields', None) or [
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key
+        ]
+        self.version = F('version') + 1
+        super().save(*args, update_fields=[
+            name for name in update_fields
+            if name not in self.COUNTER_FIELDS
+        ] + ['version'], **kwargs)
+        del self.version
+
+
+class EMAIL_STATUS(enum.Enum):
+    pending = 'pending'
+    sent = 'sent'
+    failed = 'failed'
+
+
+class OutboundEmailManager(models.Manager):
+    """Менеджер очереди исходящих писем."""
+
+    def enqueue(self, subject, body, from_email, to):
+        """Ставит письмо в очередь; отправит его команда send_emails."""
+        return self.create(
+            subject=subject, body=body, from_email=from_email, to=to
+        )
+
+    def due(self):
+        """Письма, которые пора отправить."""
+        return self.filter(
+            status=EMAIL_STATUS.pending.value,
+            next_attempt_at__lte=timezone.now()
+        ).order_by('next_attempt_at', 'pk')
+
+    def claim(self, limit, lease):
+        """
+        Забирает пачку писем в короткой транзакции: переносит их
+        next_attempt_at на lease вперёд, чтобы другие процессы их не
+        взяли. Если отправитель упадёт, письма снова станут due после
+        lease.
+        """
+        now = timezone.now()
+        leased_until = now + lease
+        with transaction.atomic(using=self.db):
+            emails = list(
+                self.due().select_for_update(skip_locked=True)[:limit]
+            )
+            claimed = self.filter(
+                pk__in=[email.pk for email in emails],
+                status=EMAIL_STATUS.pending.value,
+                next_attempt_at__lte=now
+            ).update(next_attempt_at=leased_until)
+            if claimed != len(emails):
+                # Часть пачки уже забрал другой процесс.
+                claimed_pks = set(self.filter(
+                    pk__in=[email.pk for email in emails],
+                    next_attempt_at=leased_until
+                ).values_list('pk', flat=True))
+                emails = [
+                    email for email in emails if email.pk in claimed_pks
+                ]
+        for email in emails:
+            email.next_attempt_at = leased_until
+        return emails
+
+
+class OutboundEmail(models.Model):
+    """Письмо в очереди на отправку."""
+
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.CharField('Отправитель', max_length=254)
+    to = models.EmailField('Получатель', max_length=254)
+    status = models.CharField(
+        'Статус',
+        choices=[(status.value, status.name) for status in EMAIL_STATUS],
+        max_length=10,
+        default=EMAIL_STATUS.pending.value
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток отправки', default=0)
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка', default=timezone.now
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Создано', auto_now_add=True)
+    sent_at = models.DateTimeField('Отправлено', null=True, blank=True)
+    objects = OutboundEmailManager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=('status', 'next_attempt_at'),
+                name='outbound_email_due_idx'
+            ),
+        ]
+
+    def __str__(self):
+        """Текстовое отображение письма."""
+        return f'{self.to}: {self.subject[:CHARS_TO_SHOW]}'
+
 
 class CustomUserManager(UserManager):
     """Кастомный менеджер для создания пользователей."""
@@ -94,8 +320,8 @@ class CustomUserManager(UserManager):
     def create_user(self, username, email, password=None, **extra_fields):
         """
         Создает и возвращает пользователя с email, паролем, именем
-        и отправляет confirmation code на почту для дальнейшего получения
-        jwt токена.
+        и ставит в очередь письмо с confirmation code для дальнейшего
+        получения jwt токена.
         """
         if username is None:
             raise TypeError('Пользователь должен иметь username.')
@@ -109,13 +335,12 @@ class CustomUserManager(UserManager):
         )
         user.set_password(password)
         user.save()
-        send_mail(
+        OutboundEmail.objects.enqueue(
             'Ключ для вашего аккаунта',
             f'Для получения токена воспользуйтесь ключём:'
             f'{user.confirmation_code}',
             'yamdb@example.com',
-            [email],
-            fail_silently=False,
+            email,
         )
         return user
 
@@ -166,9 +391,22 @@ class User(AbstractUser):
     objects = CustomUserManager()
 
     def create_jwt_token(self):
-        """Создает и возвращает jwt токен для пользователя"""
-        refresh = RefreshToken.for_user(self)
-        return str(refresh.access_token)
+        """
+        Создает и возвращает jwt токен для пользователя. С кешем меток
+        отзыва (см. api.v1.authentication.get_revocation_cache) токен живёт
+        CLAIMS_ACCESS_TOKEN_LIFETIME и его claims используются без запроса
+        к БД; без кеша — ACCESS_TOKEN_LIFETIME из SIMPLE_JWT, пользователь
+        загружается из БД.
+        """
+        access_token = RefreshToken.for_user(self).access_token
+        if settings.AUTH_REVOCATION_CACHE_ALIAS not in (
+                None, settings.API_CACHE_ALIAS):
+            access_token.set_exp(
+                lifetime=settings.CLAIMS_ACCESS_TOKEN_LIFETIME
+            )
+        for claim in TOKEN_CLAIMS:
+            access_token[claim] = getattr(self, claim)
+        return str(access_token)
 
 
 class Review(models.Model):
@@ -194,6 +432,24 @@ class Review(models.Model):
                 fields=('title', 'author',),
                 name='uq_author_title'
             )]
+        indexes = [
+            models.Index(
+                fields=('title', 'pub_date', 'id'),
+                name='review_title_pub_date_idx'
+            ),
+            # Потоковая выгрузка отзывов по ключу (pub_date, id).
+            models.Index(
+                fields=('pub_date', 'id'), name='review_pub_date_idx'
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминает исходные оценку и произведение для пересчёта."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_score = instance.__dict__.get('score')
+        instance._loaded_title_id = instance.__dict__.get('title_id')
+        return instance
 
     def __str__(self):
         """Текстовое отображение отзывов."""
@@ -213,3 +469,359 @@ class Comment(models.Model):
     pub_date = models.DateTimeField(
         'Дата публикации', auto_now_add=True, db_index=True
     )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=('review', 'pub_date', 'id'),
+                name='comment_review_pub_date_idx'
+            ),
+            models.Index(
+                fields=('pub_date', 'id'), name='comment_pub_date_idx'
+            ),
+        ]
+
+
+class TitleStatsQuerySet(models.QuerySet):
+    """Кверисет статистики оценок с инкрементальным обновлением."""
+
+    def apply_scores(self, title_id, added=None, removed=None):
+        """
+        Учитывает в статистике произведения добавленную и/или убранную
+        оценку одним UPDATE. Если строки статистики ещё нет, она
+        строится по таблице отзывов, где изменение уже есть; нет строки
+        и нет отзывов — статистика нулевая.
+        """
+        if title_id is None:
+            return
+        added_value, removed_value = added or 0, removed or 0
+        changes = {
+            'review_count': (
+                F('review_count') + (added is not None)
+                - (removed is not None)
+            ),
+            'score_sum': F('score_sum') + added_value - removed_value,
+            'score_sum_squares': (
+                F('score_sum_squares') + added_value ** 2 - removed_value ** 2
+            ),
+        }
+        if added is not None:
+            changes[f'score_{added}'] = F(f'score_{added}') + 1
+        if removed is not None:
+            changes[f'score_{removed}'] = F(f'score_{removed}') - 1
+        if self.filter(title_id=title_id).update(**changes):
+            return
+        stats = self.compute([title_id])
+        if not stats:
+            # Отзывов нет (или произведение удаляется): нулевая
+            # статистика не хранится.
+            return
+        try:
+            with transaction.atomic():
+                self.bulk_create(stats.values())
+        except IntegrityError:
+            # Строку успела создать параллельная транзакция без этого
+            # изменения: применяем его к ней.
+            self.filter(title_id=title_id).update(**changes)
+
+    def compute(self, title_ids=None):
+        """Статистика по таблице отзывов: {id произведения: TitleStats}."""
+        reviews = Review.objects.filter(title__isnull=False)
+        if title_ids is not None:
+            reviews = reviews.filter(title__in=title_ids)
+        rows = reviews.values('title').annotate(
+            review_count=Count('pk'),
+            score_sum=Sum('score'),
+            score_sum_squares=Sum(F('score') * F('score')),
+            **{
+                f'score_{score}': Count('pk', filter=Q(score=score))
+                for score in SCORES
+            },
+        ).order_by()
+        return {
+            row['title']: self.model(title_id=row.pop('title'), **row)
+            for row in rows
+        }
+
+    def rebuild(self, title_ids=None):
+        """
+        Пересчитывает статистику с нуля по таблице отзывов (всех или
+        указанных произведений: список id или подзапрос) и возвращает
+        число строк.
+        """
+        stats = self.compute(title_ids)
+        stale = self.all()
+        if title_ids is not None:
+            stale = stale.filter(title_id__in=title_ids)
+        stale.delete()
+        self.bulk_create(stats.values())
+        return len(stats)
+
+
+class TitleStats(models.Model):
+    """
+    Распределение оценок произведения: число отзывов с каждой оценкой,
+    сумма оценок и сумма их квадратов. Обновляется сигналами отзывов,
+    поэтому среднее и дисперсия читаются за O(1).
+    """
+
+    title = models.OneToOneField(
+        Title, on_delete=models.CASCADE, primary_key=True,
+        related_name='stats', verbose_name='Произведение'
+    )
+    review_count = models.PositiveIntegerField('Количество отзывов', default=0)
+    score_sum = models.PositiveIntegerField('Сумма оценок', default=0)
+    score_sum_squares = models.PositiveIntegerField(
+        'Сумма квадратов оценок', default=0
+    )
+    objects = TitleStatsQuerySet.as_manager()
+
+    # Поля, по которым статистика сверяется с таблицей отзывов.
+    COUNTER_FIELDS = (
+        'review_count', 'score_sum', 'score_sum_squares',
+        *(f'score_{score}' for score in SCORES),
+    )
+
+    class Meta:
+        verbose_name = 'Статистика оценок'
+        verbose_name_plural = 'Статистика оценок'
+
+    def __str__(self):
+        return f'Статистика произведения {self.title_id}'
+
+    @property
+    def histogram(self):
+        """Число отзывов с каждой оценкой от 1 до 10."""
+        return {
+            str(score): getattr(self, f'score_{score}') for score in SCORES
+        }
+
+    @property
+    def mean(self):
+        if not self.review_count:
+            return None
+        return self.score_sum / self.review_count
+
+    @property
+    def variance(self):
+        """Дисперсия оценок (генеральная), без потери точности на суммах."""
+        if not self.review_count:
+            return None
+        count = self.review_count
+        return (
+            count * self.score_sum_squares - self.score_sum ** 2
+        ) / count ** 2
+
+
+for _score in SCORES:
+    TitleStats.add_to_class(f'score_{_score}', models.PositiveIntegerField(
+        f'Отзывов с оценкой {_score}', default=0
+    ))
+del _score
+
+
+class TitleRankingQuerySet(models.QuerySet):
+    """
+    Кверисет рейтинга лучших произведений. Балл — байесовское среднее
+    (score_sum + m * C) / (review_count + m), где m — TOP_MIN_REVIEWS
+    (меньше отзывов — нет в рейтинге), а C — средняя оценка по всем
+    отзывам на момент последнего полного пересчёта, хранится в
+    TitleRankingPrior.
+    """
+
+    def prior_mean(self):
+        """C последнего полного пересчёта; до первого пересчёта — 0."""
+        return TitleRankingPrior.objects.values_list(
+            'mean', flat=True
+        ).first() or 0.0
+
+    def stored_prior_mean(self):
+        """prior_mean() как выражение для подзапроса."""
+        return Coalesce(
+            Subquery(TitleRankingPrior.objects.values('mean')[:1]),
+            Value(0.0), output_field=FloatField()
+        )
+
+    def ranking_fields(self, score_sum, review_count, category_id,
+                       prior_mean):
+        minimum = settings.TOP_MIN_REVIEWS
+        return {
+            'category_id': category_id,
+            'review_count': review_count,
+            'score': (
+                (score_sum + minimum * prior_mean) / (review_count + minimum)
+            ),
+        }
+
+    def refresh_title(self, title_id):
+        """
+        Обновляет строку произведения после изменения его отзывов или
+        категории: один SELECT и, для попавших в рейтинг, один UPDATE;
+        строка произведения ниже порога удаляется. C читается тем же
+        SELECT и не пересчитывается: все строки считаются с одним C.
+        """
+        title = Title.objects.filter(pk=title_id).annotate(
+            ranked=Exists(self.filter(title_id=OuterRef('pk'))),
+            prior_mean=self.stored_prior_mean(),
+        ).values_list(
+            'score_sum', 'review_count', 'category_id', 'ranked',
+            'prior_mean'
+        ).first()
+        minimum = max(settings.TOP_MIN_REVIEWS, 1)
+        if title is None or title[1] < minimum:
+            # Строка могла остаться при любом числе отзывов ниже порога
+            # (пересчёт, запись в обход сигналов): удаляется, если есть.
+            if title is None or title[3]:
+                self.filter(title_id=title_id).delete()
+            return
+        fields = self.ranking_fields(*title[:3], title[4])
+        if not self.filter(title_id=title_id).update(**fields):
+            self.create(title_id=title_id, **fields)
+
+    def refresh(self):
+        """
+        Пересчитывает и сохраняет среднюю оценку, пересчитывает с ней
+        рейтинг всех произведений и возвращает число строк.
+        """
+        totals = Title.objects.aggregate(
+            score_sum=Sum('score_sum'), review_count=Sum('review_count')
+        )
+        prior_mean = (
+            totals['score_sum'] / totals['review_count']
+            if totals['review_count'] else 0.0
+        )
+        TitleRankingPrior.objects.update_or_create(
+            pk=TitleRankingPrior.SINGLETON_PK,
+            defaults={'mean': prior_mean},
+        )
+        titles = Title.objects.filter(
+            review_count__gte=max(settings.TOP_MIN_REVIEWS, 1)
+        ).values_list('pk', 'score_sum', 'review_count', 'category_id')
+        rows = [
+            self.model(title_id=pk, **self.ranking_fields(
+                score_sum, review_count, category_id, prior_mean
+            ))
+            for pk, score_sum, review_count, category_id in titles.iterator()
+        ]
+        self.all().delete()
+        self.bulk_create(rows, batch_size=1000)
+        return len(rows)
+
+
+class TitleRanking(models.Model):
+    """
+    Предрасчитанный рейтинг лучших произведений: чтение лидеров по
+    категории — проход по индексу (category, -score).
+    """
+
+    title = models.OneToOneField(
+        Title, on_delete=models.CASCADE, primary_key=True,
+        related_name='ranking', verbose_name='Произведение'
+    )
+    category = models.ForeignKey(
+        Category, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='+', verbose_name='Категория'
+    )
+    review_count = models.PositiveIntegerField('Количество отзывов')
+    score = models.FloatField('Байесовская оценка')
+    objects = TitleRankingQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('-score', 'title')
+        indexes = [
+            models.Index(
+                fields=('-score', 'title'), name='ranking_score_idx'
+            ),
+            models.Index(
+                fields=('category', '-score', 'title'),
+                name='ranking_category_score_idx'
+            ),
+        ]
+        verbose_name = 'Рейтинг произведения'
+        verbose_name_plural = 'Рейтинг произведений'
+
+    def __str__(self):
+        return f'{self.title_id}: {self.score:.2f}'
+
+
+class TitleRankingPrior(models.Model):
+    """
+    Средняя оценка C рейтинга лучших, единственная строка: её пишет
+    полный пересчёт (TitleRankingQuerySet.refresh), а обновления по
+    одному произведению только читают.
+    """
+
+    SINGLETON_PK = 1
+
+    mean = models.FloatField('Средняя оценка')
+
+    class Meta:
+        verbose_name = 'Средняя оценка рейтинга'
+        verbose_name_plural = 'Средняя оценка рейтинга'
+
+    def __str__(self):
+        return f'{self.mean:.2f}'
+
+
+class TitleSimilarity(models.Model):
+    """
+    Соседи произведения из индекса похожих (команда
+    refresh_similar_titles): rank 1 — самое похожее. title_version —
+    версия произведения при расчёте, по ней находятся устаревшие строки.
+    """
+
+    title = models.ForeignKey(
+        Title, on_delete=models.CASCADE, related_name='similarities',
+        verbose_name='Произведение'
+    )
+    similar = models.ForeignKey(
+        Title, on_delete=models.CASCADE, related_name='+',
+        verbose_name='Похожее произведение'
+    )
+    rank = models.PositiveSmallIntegerField('Место')
+    score = models.FloatField('Сходство')
+    title_version = models.PositiveIntegerField('Версия произведения')
+
+    class Meta:
+        ordering = ('title', 'rank')
+        constraints = [
+            models.UniqueConstraint(
+                fields=('title', 'rank'), name='uq_similarity_title_rank'
+            ),
+        ]
+        verbose_name = 'Похожее произведение'
+        verbose_name_plural = 'Похожие произведения'
+
+    def __str__(self):
+        return f'{self.title_id} -> {self.similar_id}: {self.score:.3f}'
+
+
+class UserRecommendation(models.Model):
+    """
+    Рекомендованное пользователю произведение, которого он ещё не
+    оценивал (команда build_recommendations): rank 1 — лучшее.
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='recommendations',
+        verbose_name='Пользователь'
+    )
+    title = models.ForeignKey(
+        Title, on_delete=models.CASCADE, related_name='+',
+        verbose_name='Произведение'
+    )
+    rank = models.PositiveSmallIntegerField('Место')
+    score = models.FloatField('Предсказанная оценка')
+
+    class Meta:
+        ordering = ('user', 'rank')
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'rank'), name='uq_recommendation_user_rank'
+            ),
+        ]
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+
+    def __str__(self):
+        return f'{self.user_id} -> {self.title_id}: {self.score:.2f}'
@@ -0,0 +1,220 @@
+"""
+Рекомендации по матрице оценок пользователь x произведение.
+
+Отзывы читаются потоком в три компактных массива (пользователь,
+произведение, оценка), матрица оценок за вычетом средней раскладывается
+методом чередующихся наименьших квадратов (ALS): на каждом шаге при
+фиксированных факторах одной стороны факторы другой находятся решением
+небольших систем k x k. Системы решаются пачками в нескольких потоках:
+NumPy отпускает GIL на тяжёлых операциях, поэтому потоки занимают
+несколько ядер. Для каждого пользователя сохраняются лучшие
+непросмотренные произведения.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from django.db import transaction
+
+from .models import Review, UserRecommendation
+from .similarity import CHUNK_SIZE, csr, expand_ranges
+
+# Сколько ячеек (оценок с дополнением) в одной пачке при решении систем:
+# память пачки порядка BLOCK_SIZE * factors * 4 байт.
+BLOCK_SIZE = 2 ** 16
+MIN_SCORE, MAX_SCORE = 1, 10
+
+
+class RatingMatrix:
+    """
+    Разреженная матрица оценок в двух CSR-представлениях: по
+    пользователям и по произведениям. Строки и столбцы — только те
+    пользователи и произведения, у которых есть отзывы.
+    """
+
+    def __init__(self, users, titles, scores):
+        self.user_ids, users = np.unique(users, return_inverse=True)
+        self.title_ids, titles = np.unique(titles, return_inverse=True)
+        users, titles = users.reshape(-1), titles.reshape(-1)
+        self.mean = float(scores.mean()) if len(scores) else 0.0
+        residuals = (scores - self.mean).astype(np.float32)
+        order = np.lexsort((titles, users))
+        self.by_user = (
+            csr(users, titles, len(self.user_ids))[0],
+            titles[order], residuals[order],
+        )
+        order = np.lexsort((users, titles))
+        self.by_title = (
+            csr(titles, users, len(self.title_ids))[0],
+            users[order], residuals[order],
+        )
+
+    @classmethod
+    def from_reviews(cls, queryset=None):
+        """Читает отзывы потоком, не создавая объектов моделей."""
+        queryset = Review.objects.filter(title__isnull=False) if (
+            queryset is None
+        ) else queryset
+        values = np.fromiter(
+            (
+                value for row in queryset.values_list(
+                    'author_id', 'title_id', 'score'
+                ).iterator(chunk_size=CHUNK_SIZE)
+                for value in row
+            ),
+            dtype=np.int64,
+        ).reshape(-1, 3)
+        return cls(values[:, 0], values[:, 1], values[:, 2])
+
+    def __len__(self):
+        return len(self.by_user[1])
+
+
+def row_blocks(pointers):
+    """
+    Строки, сгруппированные по длине: пачки подряд идущих строк в порядке
+    возрастания длины, примерно по BLOCK_SIZE ячеек с учётом дополнения
+    до самой длинной строки пачки.
+    """
+    lengths = np.diff(pointers)
+    order = np.argsort(lengths, kind='stable')
+    lengths = lengths[order]
+    blocks, start = [], 0
+    while start < len(order):
+        stop = min(start + max(1, BLOCK_SIZE // lengths[start]), len(order))
+        stop = min(
+            start + max(1, BLOCK_SIZE // lengths[stop - 1]), len(order)
+        )
+        blocks.append(order[start:stop])
+        start = stop
+    return blocks
+
+
+def solve_factors(rows, fixed, regularization, executor):
+    """
+    Факторы всех строк при фиксированных факторах столбцов: для строки r
+    (F_r^T F_r + λ n_r I) x_r = F_r^T v_r, где F_r — факторы её столбцов,
+    v_r — её оценки. Строки пачки дополняются нулями до одной длины, и
+    суммы по строкам считаются одним пакетным умножением матриц.
+    Пустых строк в матрице нет.
+    """
+    pointers, columns, values = rows
+    factors = fixed.shape[1]
+    result = np.empty((len(pointers) - 1, factors), dtype=np.float32)
+    identity = np.eye(factors, dtype=np.float32)
+
+    def solve(block):
+        starts, ends = pointers[block], pointers[block + 1]
+        owners, index = expand_ranges(starts, ends)
+        slots = index - starts[owners]
+        shape = (len(block), int((ends - starts).max()))
+        padded = np.zeros(shape + (factors,), dtype=np.float32)
+        padded[owners, slots] = fixed[columns[index]]
+        scores = np.zeros(shape + (1,), dtype=np.float32)
+        scores[owners, slots, 0] = values[index]
+        transposed = padded.transpose(0, 2, 1)
+        gram = transposed @ padded
+        counts = (ends - starts).astype(np.float32)
+        gram += regularization * counts[:, None, None] * identity
+        result[block] = np.linalg.solve(gram, transposed @ scores)[:, :, 0]
+
+    list(executor.map(solve, row_blocks(pointers)))
+    return result
+
+
+def factorize(matrix, factors=16, iterations=10, regularization=0.1,
+              workers=None, seed=42):
+    """ALS: факторы пользователей и произведений, float32."""
+    rng = np.random.default_rng(seed)
+    title_factors = rng.normal(
+        scale=0.1, size=(len(matrix.title_ids), factors)
+    ).astype(np.float32)
+    user_factors = np.zeros((len(matrix.user_ids), factors), np.float32)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for _ in range(iterations):
+            user_factors = solve_factors(
+                matrix.by_user, title_factors, regularization, executor
+            )
+            title_factors = solve_factors(
+                matrix.by_title, user_factors, regularization, executor
+            )
+    return user_factors, title_factors
+
+
+def rmse(matrix, user_factors, title_factors):
+    """Среднеквадратичная ошибка на известных оценках."""
+    pointers, titles, residuals = matrix.by_user
+    users = np.repeat(np.arange(len(pointers) - 1), np.diff(pointers))
+    error = 0.0
+    for start in range(0, len(titles), BLOCK_SIZE):
+        part = slice(start, start + BLOCK_SIZE)
+        predicted = np.einsum(
+            'ij,ij->i', user_factors[users[part]], title_factors[titles[part]]
+        )
+        error += float(((predicted - residuals[part]) ** 2).sum())
+    return (error / len(titles)) ** 0.5 if len(titles) else 0.0
+
+
+def top_unseen(matrix, user_factors, title_factors, count, block_size=1024):
+    """
+    Для пачек пользователей — лучшие непросмотренные произведения:
+    (позиция пользователя, позиции произведений, предсказанные оценки).
+    """
+    pointers, seen, _ = matrix.by_user
+    count = min(count, len(matrix.title_ids))
+    if count <= 0:
+        return
+    for start in range(0, len(matrix.user_ids), block_size):
+        stop = min(start + block_size, len(matrix.user_ids))
+        scores = matrix.mean + user_factors[start:stop] @ title_factors.T
+        owners, index = expand_ranges(
+            pointers[start:stop], pointers[start + 1:stop + 1]
+        )
+        scores[owners, seen[index]] = -np.inf
+        top = np.argpartition(-scores, count - 1, axis=1)[:, :count]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        for offset, (titles, row) in enumerate(zip(top, top_scores)):
+            unseen = np.isfinite(row)
+            yield start + offset, titles[unseen], np.clip(
+                row[unseen], MIN_SCORE, MAX_SCORE
+            )
+
+
+def build(count, factors=16, iterations=10, regularization=0.1,
+          workers=None, seed=42):
+    """
+    Строит рекомендации по всем отзывам и заменяет ими сохранённые.
+    Возвращает матрицу, факторы и число сохранённых строк.
+    """
+    matrix = RatingMatrix.from_reviews()
+    user_factors, title_factors = factorize(
+        matrix, factors, iterations, regularization, workers, seed
+    )
+    saved = 0
+    with transaction.atomic():
+        UserRecommendation.objects.all().delete()
+        batch = []
+        for user, titles, scores in top_unseen(
+                matrix, user_factors, title_factors, count):
+            batch.extend(
+                UserRecommendation(
+                    user_id=int(matrix.user_ids[user]),
+                    title_id=int(matrix.title_ids[title]),
+                    rank=rank,
+                    score=float(score),
+                )
+                for rank, (title, score) in enumerate(
+                    zip(titles, scores), start=1
+                )
+            )
+            if len(batch) >= CHUNK_SIZE:
+                UserRecommendation.objects.bulk_create(batch)
+                saved += len(batch)
+                batch = []
+        UserRecommendation.objects.bulk_create(batch)
+        saved += len(batch)
+    return matrix, (user_factors, title_factors), saved
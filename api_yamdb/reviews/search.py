@@ -0,0 +1,196 @@
+"""
+Полнотекстовый индекс произведений, отзывов и комментариев.
+
+Индекс хранится в таблице reviews_search: виртуальной таблице FTS5 в
+SQLite или таблице с tsvector и GIN-индексом в PostgreSQL. Идентификатор
+строки кодирует тип объекта и его pk, поэтому обновление и удаление
+записи индекса выполняются по первичному ключу.
+"""
+
+import re
+
+from django.db import connections, router
+
+from .models import Title
+from .utils import batched
+
+SEARCH_TABLE = 'reviews_search'
+# Типы объектов в порядке их кодов в идентификаторе строки индекса.
+KINDS = ('title', 'review', 'comment')
+# Вес названия относительно текста при ранжировании.
+NAME_WEIGHT = 10.0
+# Записей в одном DELETE remove_objects (лимит параметров SQLite — 999).
+REMOVE_BATCH_SIZE = 500
+
+SQLITE_CREATE = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5('
+    "name, body, tokenize = 'unicode61 remove_diacritics 2')"
+)
+POSTGRESQL_CREATE = (
+    f'CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} '
+    '(id bigint PRIMARY KEY, document tsvector NOT NULL)',
+    f'CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_idx '
+    f'ON {SEARCH_TABLE} USING gin (document)',
+)
+POSTGRESQL_DOCUMENT = (
+    "setweight(to_tsvector('simple', %s), 'A') || "
+    "setweight(to_tsvector('simple', %s), 'B')"
+)
+# Источники для перестроения: тип, таблица, колонки названия и текста.
+SOURCES = (
+    ('title', 'reviews_title', 'name', 'description'),
+    ('review', 'reviews_review', "''", 'text'),
+    ('comment', 'reviews_comment', "''", 'text'),
+)
+
+
+def row_id(kind, pk):
+    return pk * len(KINDS) + KINDS.index(kind)
+
+
+def split_row_id(value):
+    pk, code = divmod(value, len(KINDS))
+    return KINDS[code], pk
+
+
+def get_connection(model=None, write=False):
+    """Соединение, выбранное роутером баз для чтения или записи."""
+    choose = router.db_for_write if write else router.db_for_read
+    return connections[choose(model or Title)]
+
+
+def create_index(connection):
+    """Создаёт таблицу индекса (вызывается из миграции)."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for sql in POSTGRESQL_CREATE:
+                cursor.execute(sql)
+        else:
+            cursor.execute(SQLITE_CREATE)
+
+
+def drop_index(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+def document(instance):
+    """Название и текст объекта для индекса."""
+    if instance._meta.model_name == 'title':
+        return instance.name, instance.description or ''
+    return '', instance.text
+
+
+def index_object(instance):
+    """Добавляет объект в индекс или обновляет его запись."""
+    index_objects([instance])
+
+
+def index_objects(instances):
+    """Добавляет объекты одной модели в индекс одним executemany."""
+    if not instances:
+        return
+    kind = instances[0]._meta.model_name
+    rows = [
+        [row_id(kind, instance.pk), *document(instance)]
+        for instance in instances
+    ]
+    connection = get_connection(type(instances[0]), write=True)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.executemany(
+                f'INSERT INTO {SEARCH_TABLE} (id, document) '
+                f'VALUES (%s, {POSTGRESQL_DOCUMENT}) '
+                'ON CONFLICT (id) DO UPDATE SET document = EXCLUDED.document',
+                rows
+            )
+        else:
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {SEARCH_TABLE} (rowid, name, body) '
+                'VALUES (%s, %s, %s)',
+                rows
+            )
+
+
+def remove_object(instance):
+    """Удаляет объект из индекса."""
+    remove_objects([instance])
+
+
+def remove_objects(instances):
+    """Удаляет из индекса объекты любых моделей пачками по DELETE."""
+    if not instances:
+        return
+    connection = get_connection(type(instances[0]), write=True)
+    column = 'id' if connection.vendor == 'postgresql' else 'rowid'
+    with connection.cursor() as cursor:
+        for batch in batched(instances, REMOVE_BATCH_SIZE):
+            cursor.execute(
+                f'DELETE FROM {SEARCH_TABLE} WHERE {column} IN '
+                f'({", ".join(["%s"] * len(batch))})',
+                [row_id(item._meta.model_name, item.pk) for item in batch]
+            )
+
+
+def rebuild(connection):
+    """Перестраивает индекс по всем объектам и возвращает их число."""
+    count = 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        for kind, table, name, body in SOURCES:
+            code, size = KINDS.index(kind), len(KINDS)
+            if connection.vendor == 'postgresql':
+                document_sql = POSTGRESQL_DOCUMENT % (
+                    name, f"coalesce({body}, '')"
+                )
+                cursor.execute(
+                    f'INSERT INTO {SEARCH_TABLE} (id, document) '
+                    f'SELECT id * {size} + {code}, {document_sql} '
+                    f'FROM {table}'
+                )
+            else:
+                cursor.execute(
+                    f'INSERT INTO {SEARCH_TABLE} (rowid, name, body) '
+                    f"SELECT id * {size} + {code}, {name}, "
+                    f"coalesce({body}, '') FROM {table}"
+                )
+            count += cursor.rowcount
+    return count
+
+
+def parse_query(query):
+    """Слова запроса; операторы и кавычки пользователя игнорируются."""
+    return re.findall(r'\w+', query or '')
+
+
+def search(query, kinds=KINDS, limit=100):
+    """
+    Ищет объекты, содержащие все слова запроса (по префиксу), и
+    возвращает список пар (тип, pk) по убыванию релевантности.
+    """
+    words = parse_query(query)
+    if not words:
+        return []
+    codes = [KINDS.index(kind) for kind in kinds]
+    code_filter = ', '.join(str(code) for code in codes)
+    connection = get_connection()
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                f'SELECT id FROM {SEARCH_TABLE}, '
+                "to_tsquery('simple', %s) AS query "
+                f'WHERE document @@ query AND id %% {len(KINDS)} '
+                f'IN ({code_filter}) '
+                'ORDER BY ts_rank(document, query) DESC, id LIMIT %s',
+                [' & '.join(f'{word}:*' for word in words), limit]
+            )
+        else:
+            cursor.execute(
+                f'SELECT rowid FROM {SEARCH_TABLE} '
+                f'WHERE {SEARCH_TABLE} MATCH %s '
+                f'AND rowid %% {len(KINDS)} IN ({code_filter}) '
+                f'ORDER BY bm25({SEARCH_TABLE}, {NAME_WEIGHT}, 1.0), rowid '
+                'LIMIT %s',
+                [' '.join(f'"{word}"*' for word in words), limit]
+            )
+        return [split_row_id(value) for value, in cursor.fetchall()]
@@ -0,0 +1,297 @@
+"""Сигналы приложения Reviews."""
+
+import threading
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models import Q
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+
+from . import search
+from .models import (
+    TOKEN_CLAIMS, Category, Comment, Genre, Review, Title, TitleRanking,
+    TitleStats, User,
+)
+
+USER_TRACKED_FIELDS = (*TOKEN_CLAIMS, 'is_active')
+
+
+class Deleting(threading.local):
+    """
+    Произведения, отзывы и комментарии, удаляемые текущим вызовом
+    delete(). Collector рассылает все pre_delete до первого post_delete,
+    но порядок моделей не гарантирует (Review.title допускает NULL),
+    поэтому каскад разбирается в первом post_delete: отзывы и комментарии
+    удаляемого произведения не обновляют его строку по одному.
+    """
+
+    def __init__(self):
+        self.objects = []
+        self.marker = None
+
+    def reset(self):
+        self.objects, self.marker = [], None
+
+    def pending(self, using):
+        """
+        Записаны ли объекты в текущей транзакции. Collector удаляет в
+        транзакции, а при её откате Django отбрасывает колбэки on_commit:
+        объекты прерванного удаления не смешиваются со следующим.
+        """
+        connection = transaction.get_connection(using)
+        return self.marker is not None and any(
+            callback[1] is self.marker
+            for callback in connection.run_on_commit
+        )
+
+    def add(self, instance, using):
+        if not self.pending(using):
+            self.objects = []
+            self.marker = partial(self.reset)
+            transaction.on_commit(self.marker, using=using)
+        self.objects.append(instance)
+
+    def settle(self, using):
+        """
+        Помечает отзывы удаляемых произведений и комментарии удаляемых
+        отзывов и удаляет из поискового индекса все объекты одним
+        запросом.
+        """
+        objects = self.objects if self.pending(using) else []
+        self.reset()
+        if not objects:
+            return
+        titles = {obj.pk for obj in objects if isinstance(obj, Title)}
+        reviews = {obj.pk for obj in objects if isinstance(obj, Review)}
+        for obj in objects:
+            if isinstance(obj, Review):
+                obj._title_deleted = obj.title_id in titles
+            elif isinstance(obj, Comment):
+                obj._review_deleted = obj.review_id in reviews
+        search.remove_objects(objects)
+
+
+deleting = Deleting()
+
+
+@receiver(pre_delete, sender=Title)
+@receiver(pre_delete, sender=Review)
+@receiver(pre_delete, sender=Comment)
+def remember_deleted(sender, instance, using, **kwargs):
+    """Запоминает удаляемые произведения, отзывы и комментарии."""
+    deleting.add(instance, using)
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_score(sender, instance, **kwargs):
+    """Подтягивает исходные оценку и произведение, если их нет в памяти."""
+    if instance.pk is None or hasattr(instance, '_loaded_score'):
+        return
+    loaded = sender.objects.filter(pk=instance.pk).values(
+        'score', 'title_id'
+    ).first()
+    if loaded is not None:
+        instance._loaded_score = loaded['score']
+        instance._loaded_title_id = loaded['title_id']
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Обновляет хранимый рейтинг, статистику оценок и место в рейтинге
+    лучших произведения после сохранения отзыва.
+    """
+    if raw:
+        return
+    old_score = getattr(instance, '_loaded_score', None)
+    old_title_id = getattr(instance, '_loaded_title_id', None)
+    # Без точки сохранения: внутри транзакции сохранения отзыва ошибка
+    # всё равно откатит её целиком.
+    with transaction.atomic(savepoint=False):
+        if created or old_score is None:
+            Title.objects.apply_score_delta(
+                instance.title_id, instance.score, 1
+            )
+            TitleStats.objects.apply_scores(
+                instance.title_id, added=instance.score
+            )
+            TitleRanking.objects.refresh_title(instance.title_id)
+        elif old_title_id != instance.title_id:
+            Title.objects.apply_score_delta(old_title_id, -old_score, -1)
+            Title.objects.apply_score_delta(
+                instance.title_id, instance.score, 1
+            )
+            TitleStats.objects.apply_scores(old_title_id, removed=old_score)
+            TitleStats.objects.apply_scores(
+                instance.title_id, added=instance.score
+            )
+            TitleRanking.objects.refresh_title(old_title_id)
+            TitleRanking.objects.refresh_title(instance.title_id)
+        elif old_score != instance.score:
+            Title.objects.apply_score_delta(
+                instance.title_id, instance.score - old_score, 0
+            )
+            TitleStats.objects.apply_scores(
+                instance.title_id, added=instance.score, removed=old_score
+            )
+            TitleRanking.objects.refresh_title(instance.title_id)
+        else:
+            Title.objects.filter(pk=instance.title_id).bump_versions()
+    instance._loaded_score = instance.score
+    instance._loaded_title_id = instance.title_id
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, using, **kwargs):
+    """
+    Обновляет хранимый рейтинг, статистику оценок и место в рейтинге
+    лучших произведения после удаления отзыва, если само произведение
+    не удаляется.
+    """
+    deleting.settle(using)
+    if getattr(instance, '_title_deleted', False):
+        return
+    score = getattr(instance, '_loaded_score', None)
+    if score is None:
+        score = instance.score
+    title_id = getattr(instance, '_loaded_title_id', instance.title_id)
+    Title.objects.apply_score_delta(title_id, -score, -1)
+    TitleStats.objects.apply_scores(title_id, removed=score)
+    TitleRanking.objects.refresh_title(title_id)
+
+
+@receiver(post_save, sender=Title)
+def create_title_stats(sender, instance, created, raw=False, using=None,
+                       **kwargs):
+    """
+    Нулевая статистика нового произведения: первый отзыв обновит её
+    одним UPDATE, не пересчитывая по таблице отзывов.
+    """
+    if created and not raw:
+        TitleStats.objects.using(using).create(title=instance)
+
+
+@receiver(post_save, sender=Title)
+def refresh_title_ranking(sender, instance, created, raw=False, **kwargs):
+    """Рейтинг лучших хранит категорию произведения."""
+    if not created and not raw:
+        TitleRanking.objects.refresh_title(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_version_on_comment(sender, instance, signal, using, raw=False,
+                            **kwargs):
+    """
+    Комментарий меняет версию произведения своего отзыва. При удалении
+    вместе с отзывом версию увеличит удаление отзыва.
+    """
+    if raw:
+        return
+    if signal is post_delete:
+        deleting.settle(using)
+        if getattr(instance, '_review_deleted', False):
+            return
+    Title.objects.filter(reviews=instance.review_id).bump_versions()
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def bump_version_on_genres(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    """Изменение жанров произведения меняет его версию."""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        titles = Title.objects.filter(pk=instance.pk)
+    elif action == 'pre_clear':
+        titles = Title.objects.filter(genre=instance)
+    else:
+        titles = Title.objects.filter(pk__in=pk_set)
+    titles.bump_versions()
+
+
+@receiver(pre_save, sender=User)
+def remember_user_fields(sender, instance, raw=False, **kwargs):
+    """
+    Запоминает сохранённые имя, claims токена и активность пользователя,
+    чтобы после сохранения заметить их смену.
+    """
+    if instance.pk is None or raw:
+        return
+    instance._loaded_fields = sender.objects.filter(pk=instance.pk).values(
+        *USER_TRACKED_FIELDS
+    ).first()
+
+
+def changed_user_fields(instance):
+    """Поля из USER_TRACKED_FIELDS, изменённые последним сохранением."""
+    loaded = getattr(instance, '_loaded_fields', None) or {}
+    return {
+        field for field, value in loaded.items()
+        if value != getattr(instance, field)
+    }
+
+
+@receiver(post_save, sender=User)
+def bump_version_on_username(sender, instance, created, raw=False,
+                             **kwargs):
+    """Отзывы и комментарии показывают имя автора."""
+    if created or raw or 'username' not in changed_user_fields(instance):
+        return
+    Title.objects.filter(
+        Q(reviews__author=instance) | Q(reviews__comments__author=instance)
+    ).bump_versions()
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def bump_version_on_category(sender, instance, raw=False, **kwargs):
+    """Произведения показывают название своей категории."""
+    if raw:
+        return
+    Title.objects.filter(category=instance).bump_versions()
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def bump_version_on_genre(sender, instance, raw=False, **kwargs):
+    """Произведения показывают названия своих жанров."""
+    if raw:
+        return
+    Title.objects.filter(genre=instance).bump_versions()
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=Comment)
+def index_for_search(sender, instance, raw=False, **kwargs):
+    """Добавляет произведение, отзыв или комментарий в поисковый индекс."""
+    if not raw:
+        search.index_object(instance)
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=Comment)
+def remove_from_search(sender, instance, using, **kwargs):
+    """
+    Удаляет из поискового индекса все произведения, отзывы и комментарии
+    вызова delete() одним запросом.
+    """
+    deleting.settle(using)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Применяет SQLITE_PRAGMAS к каждому новому соединению SQLite."""
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', None)
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,230 @@
+"""
+Индекс похожих произведений.
+
+Сходство двух произведений — взвешенная сумма косинусов двух векторов:
+жанров с категорией и множеств рецензентов (общие авторы отзывов).
+Матрица признаков загружается из базы одним проходом, сходство
+считается в NumPy пачками по batch_size произведений, а в TitleSimilarity
+сохраняются только первые count соседей каждого произведения.
+"""
+
+import numpy as np
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .models import Review, Title, TitleSimilarity
+
+# Вес категории относительно одного жанра в векторе признаков.
+CATEGORY_WEIGHT = 1.0
+CHUNK_SIZE = 10000
+
+
+def fetch_pairs(queryset):
+    """Пары значений из values_list() как массив N x 2 без лишних копий."""
+    pairs = np.fromiter(
+        (value for row in queryset.iterator(chunk_size=CHUNK_SIZE)
+         for value in row),
+        dtype=np.int64,
+    )
+    return pairs.reshape(-1, 2)
+
+
+def normalize(matrix):
+    """Делит строки на их длину; нулевые строки остаются нулевыми."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def expand_ranges(starts, ends):
+    """
+    Индексы всех диапазонов [start, end) подряд и номер диапазона для
+    каждого индекса — развёртка строк CSR-матрицы без цикла Python.
+    """
+    lengths = ends - starts
+    owners = np.repeat(np.arange(len(starts)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(
+        np.cumsum(lengths) - lengths, lengths
+    )
+    return owners, np.repeat(starts, lengths) + offsets
+
+
+def csr(rows, columns, size):
+    """CSR: указатели начала строк и столбцы в порядке строк."""
+    order = np.argsort(rows, kind='stable')
+    pointers = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=size), out=pointers[1:])
+    return pointers, columns[order]
+
+
+class SimilarityIndex:
+    """Признаки всех произведений в памяти и расчёт соседей пачками."""
+
+    def __init__(self, coreview_weight=None):
+        self.coreview_weight = (
+            settings.SIMILAR_TITLES_COREVIEW_WEIGHT
+            if coreview_weight is None else coreview_weight
+        )
+        self.ids = np.fromiter(
+            Title.objects.order_by('pk').values_list('pk', flat=True)
+            .iterator(chunk_size=CHUNK_SIZE),
+            dtype=np.int64,
+        )
+        self.versions = dict(Title.objects.values_list('pk', 'version'))
+        self.content = self.load_content()
+        self.load_reviews()
+
+    def positions(self, ids):
+        return np.searchsorted(self.ids, ids)
+
+    def load_content(self):
+        """Нормированные векторы жанров и категории, float32 T x (G + C)."""
+        genres = fetch_pairs(
+            Title.genre.through.objects.values_list('title_id', 'genre_id')
+        )
+        categories = fetch_pairs(
+            Title.objects.filter(category__isnull=False)
+            .values_list('pk', 'category_id')
+        )
+        genre_ids, genre_columns = np.unique(
+            genres[:, 1], return_inverse=True
+        )
+        category_ids, category_columns = np.unique(
+            categories[:, 1], return_inverse=True
+        )
+        content = np.zeros(
+            (len(self.ids), len(genre_ids) + len(category_ids)),
+            dtype=np.float32,
+        )
+        content[self.positions(genres[:, 0]), genre_columns] = 1
+        content[
+            self.positions(categories[:, 0]),
+            len(genre_ids) + category_columns
+        ] = CATEGORY_WEIGHT
+        return normalize(content)
+
+    def load_reviews(self):
+        """Отзывы как две CSR-матрицы: произведение -> авторы и обратно."""
+        reviews = fetch_pairs(
+            Review.objects.filter(title__isnull=False)
+            .values_list('title_id', 'author_id')
+        )
+        titles = self.positions(reviews[:, 0])
+        _, authors = np.unique(reviews[:, 1], return_inverse=True)
+        authors = authors.reshape(-1)
+        self.degrees = np.bincount(titles, minlength=len(self.ids))
+        self.title_authors = csr(titles, authors, len(self.ids))
+        self.author_titles = csr(
+            authors, titles, int(authors.max(initial=-1)) + 1
+        )
+
+    def coreview(self, batch):
+        """
+        Косинус множеств рецензентов пачки и всех произведений:
+        |A ∩ B| / sqrt(|A| |B|), матрица len(batch) x T.
+        """
+        pointers, authors = self.title_authors
+        owners, index = expand_ranges(pointers[batch], pointers[batch + 1])
+        authors = authors[index]
+        pointers, titles = self.author_titles
+        pair_owners, index = expand_ranges(
+            pointers[authors], pointers[authors + 1]
+        )
+        keys = owners[pair_owners] * len(self.ids) + titles[index]
+        keys, counts = np.unique(keys, return_counts=True)
+        shared = np.zeros((len(batch), len(self.ids)), dtype=np.float32)
+        shared[keys // len(self.ids), keys % len(self.ids)] = counts
+        norms = np.sqrt(
+            np.outer(self.degrees[batch], self.degrees).astype(np.float32)
+        )
+        np.divide(shared, norms, out=shared, where=norms > 0)
+        return shared
+
+    def neighbours(self, batch, count):
+        """Для каждой позиции пачки — позиции и сходство count соседей."""
+        scores = (1 - self.coreview_weight) * (
+            self.content[batch] @ self.content.T
+        )
+        if self.coreview_weight:
+            scores += self.coreview_weight * self.coreview(batch)
+        scores[np.arange(len(batch)), batch] = -np.inf
+        count = min(count, len(self.ids) - 1)
+        if count <= 0:
+            return [([], []) for _ in batch]
+        top = np.argpartition(-scores, count - 1, axis=1)[:, :count]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.lexsort((self.ids[top], -top_scores), axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        return [
+            (positions[row > 0], row[row > 0])
+            for positions, row in zip(top, top_scores)
+        ]
+
+    def rows(self, batch, count):
+        """Несохранённые строки TitleSimilarity для пачки позиций."""
+        rows = []
+        for position, (positions, scores) in zip(
+                batch, self.neighbours(batch, count)):
+            title_id = int(self.ids[position])
+            rows.extend(
+                TitleSimilarity(
+                    title_id=title_id,
+                    similar_id=int(self.ids[similar]),
+                    rank=rank,
+                    score=float(score),
+                    title_version=self.versions[title_id],
+                )
+                for rank, (similar, score) in enumerate(
+                    zip(positions, scores), start=1
+                )
+            )
+        return rows
+
+
+def stale_title_ids():
+    """
+    Произведения, которые нужно пересчитать: без соседей в индексе, с
+    изменившейся версией (жанры, категория, отзывы) и те, у кого такие
+    произведения в соседях.
+    """
+    fresh = TitleSimilarity.objects.filter(
+        title_version=F('title__version')
+    ).values('title')
+    changed = Title.objects.exclude(pk__in=fresh).values('pk')
+    return set(
+        changed.values_list('pk', flat=True)
+    ) | set(
+        TitleSimilarity.objects.filter(similar__in=changed)
+        .values_list('title_id', flat=True)
+    )
+
+
+def refresh(full=False, count=None, batch_size=256, coreview_weight=None):
+    """
+    Пересчитывает соседей всех или только устаревших произведений и
+    возвращает число пересчитанных произведений.
+    """
+    count = settings.SIMILAR_TITLES_COUNT if count is None else count
+    title_ids = None if full else stale_title_ids()
+    if title_ids is not None and not title_ids:
+        return 0
+    index = SimilarityIndex(coreview_weight)
+    positions = np.arange(len(index.ids))
+    if title_ids is not None:
+        positions = positions[np.isin(index.ids, list(title_ids))]
+    with transaction.atomic():
+        if full:
+            TitleSimilarity.objects.all().delete()
+        for start in range(0, len(positions), batch_size):
+            batch = positions[start:start + batch_size]
+            if not full:
+                TitleSimilarity.objects.filter(
+                    title__in=index.ids[batch].tolist()
+                ).delete()
+            TitleSimilarity.objects.bulk_create(
+                index.rows(batch, count), batch_size=1000
+            )
+    return len(positions)
@@ -0,0 +1,13 @@
+"""Вспомогательные функции приложения Reviews."""
+
+from itertools import islice
+
+
+def batched(iterable, size):
+    """Разбивает итерируемый объект на списки длиной не больше size."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
@@ -0,0 +1,47 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Очищает кеш: между тестами база очищается без сигналов моделей."""
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def revocation_cache(settings):
+    """Отдельный кеш меток отзыва claims, как в AUTH_REVOCATION_CACHE_*."""
+    settings.CACHES = {
+        **settings.CACHES,
+        'auth_revocation': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'auth-revocation',
+        },
+    }
+    settings.AUTH_REVOCATION_CACHE_ALIAS = 'auth_revocation'
+    from django.core.cache import caches
+
+    caches['auth_revocation'].clear()
+    yield caches['auth_revocation']
+    caches['auth_revocation'].clear()
+
+
+@pytest.fixture
+def pin_cache(settings):
+    """Отдельный кеш закреплений за основной базой, как в REPLICA_PIN_*."""
+    settings.CACHES = {
+        **settings.CACHES,
+        'replica_pin': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'replica-pin',
+        },
+    }
+    settings.REPLICA_PIN_CACHE_ALIAS = 'replica_pin'
+    from django.core.cache import caches
+
+    caches['replica_pin'].clear()
+    yield caches['replica_pin']
+    caches['replica_pin'].clear()
@@ -0,0 +1,88 @@
+import re
+
+import pytest
+
+# Максимальное число запросов к БД на один HTTP-запрос.
+# Первое совпавшее правило (метод, шаблон пути) определяет бюджет.
+QUERY_BUDGETS = (
+    ('GET', r'^/api/v1/titles/\d+/reviews/\d+/comments/', 4),
+    ('GET', r'^/api/v1/titles/\d+/reviews/', 4),
+    ('GET', r'^/api/v1/titles/\d+/$', 5),
+    ('GET', r'^/api/v1/titles/', 4),
+    ('GET', r'^/api/v1/(categories|genres)/', 3),
+    ('GET', r'^/api/v1/users/', 3),
+    ('DELETE', r'^/api/v1/users/', 12),
+    (None, r'^/api/v1/titles/\d+/reviews/\d+/comments/', 7),
+    (None, r'^/api/v1/titles/\d+/reviews/', 10),
+    (None, r'^/api/v1/titles/', 16),
+    (None, r'^/api/v1/(categories|genres)/', 8),
+    (None, r'^/api/v1/users/', 4),
+    (None, r'^/api/v1/auth/', 4),
+)
+DEFAULT_BUDGET = 10
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers',
+        'query_budget(max_queries, method=None, path=None): максимальное '
+        'число запросов к БД на HTTP-запрос теста (или только на запросы '
+        'с методом method и путём, подходящим под регулярное выражение '
+        'path).'
+    )
+
+
+def budget_for(method, path, marker=None):
+    if marker is not None and (
+        marker.kwargs.get('method') in (None, method)
+        and re.match(marker.kwargs.get('path', ''), path)
+    ):
+        return marker.args[0]
+    for budget_method, pattern, budget in QUERY_BUDGETS:
+        if budget_method in (None, method) and re.match(pattern, path):
+            return budget
+    return DEFAULT_BUDGET
+
+
+@pytest.fixture(autouse=True)
+def query_budget(request):
+    """Проверяет, что каждый HTTP-запрос теста укладывается в бюджет."""
+    from django.core.signals import request_finished, request_started
+    from django.db import connection
+
+    from api.middleware import QueryCounter
+
+    marker = request.node.get_closest_marker('query_budget')
+    counter = QueryCounter()
+    current = {}
+    violations = []
+
+    def started(sender, environ=None, **kwargs):
+        current['method'] = environ['REQUEST_METHOD']
+        current['path'] = environ['PATH_INFO']
+        current['start'] = counter.count
+
+    def finished(sender, **kwargs):
+        if 'start' not in current:
+            return
+        used = counter.count - current.pop('start')
+        budget = budget_for(current['method'], current['path'], marker)
+        if used > budget:
+            violations.append(
+                f'{current["method"]} {current["path"]}: {used} запросов '
+                f'к БД при бюджете {budget}'
+            )
+
+    request_started.connect(started)
+    request_finished.connect(finished)
+    connection.execute_wrappers.append(counter)
+    try:
+        yield counter
+    finally:
+        connection.execute_wrappers.remove(counter)
+        request_started.disconnect(started)
+        request_finished.disconnect(finished)
+    assert not violations, (
+        'Превышен бюджет запросов к БД, проверьте N+1: '
+        + '; '.join(violations)
+    )
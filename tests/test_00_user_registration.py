@@ -1,4 +1,5 @@
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
 from tests.utils import (
@@ -7,6 +8,7 @@ from tests.utils import (
 )
 
 from django.core import mail
+from django.core.management import call_command
 from django.db.utils import IntegrityError
 
 
@@ -112,6 +114,11 @@ class Test00UserRegistration:
         }
 
         response = client.post(self.url_signup, data=valid_data)
+        assert len(mail.outbox) == outbox_before_count, (
+            f'Запрос к `{self.url_signup}` не должен отправлять письмо '
+            'синхронно: оно ставится в очередь.'
+        )
+        call_command('send_emails', '--once', stdout=StringIO())
         outbox_after = mail.outbox  # email outbox after user create
 
         assert response.status_code != HTTPStatus.NOT_FOUND, (
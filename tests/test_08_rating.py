@@ -0,0 +1,199 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from tests.utils import create_reviews, create_single_review, create_titles
+
+from django.core.management import call_command
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    def test_01_rating_follows_reviews(self, admin_client, admin, user_client,
+                                       user, moderator_client, moderator):
+        from reviews.models import Review, Title
+
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+        title = Title.objects.get(pk=title_id)
+        assert (title.score_sum, title.review_count, title.rating) == (
+            15, 3, 5.0
+        ), (
+            'Проверьте, что при создании отзыва обновляются хранимые '
+            'сумма оценок, количество отзывов и рейтинг произведения.'
+        )
+
+        url = f'/api/v1/titles/{title_id}/reviews/{reviews[1]["id"]}/'
+        user_client.patch(url, data={'score': 8})
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count) == (18, 3), (
+            'Проверьте, что при изменении оценки отзыва обновляется '
+            'хранимая сумма оценок произведения.'
+        )
+        assert title.rating == 6.0
+
+        user_client.delete(url)
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count, title.rating) == (
+            10, 2, 5.0
+        ), (
+            'Проверьте, что при удалении отзыва обновляется хранимый '
+            'рейтинг произведения.'
+        )
+
+        Review.objects.all().delete()
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count, title.rating) == (
+            0, 0, None
+        )
+        response = admin_client.get(f'/api/v1/titles/{title_id}/')
+        assert response.json().get('rating') is None
+
+    def test_02_rebuild_ratings_command(self, client, admin_client, admin,
+                                        user_client, user):
+        from reviews.models import Title
+
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        Title.objects.filter(pk=titles[0]['id']).update(
+            score_sum=1, review_count=7, rating=1 / 7
+        )
+        detail_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert client.get(detail_url).json()['rating'] == 0
+        etags = {
+            url: client.get(url)['ETag']
+            for url in ('/api/v1/titles/', detail_url)
+        }
+
+        out = StringIO()
+        call_command('rebuild_ratings', '--check', stdout=out)
+        assert 'Расхождений найдено: 1' in out.getvalue(), (
+            'Проверьте, что команда `rebuild_ratings --check` сообщает '
+            'о расхождениях хранимого рейтинга.'
+        )
+        assert Title.objects.get(pk=titles[0]['id']).review_count == 7
+
+        call_command('rebuild_ratings', stdout=StringIO())
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.score_sum, title.review_count, title.rating) == (
+            10, 2, 5.0
+        ), (
+            'Проверьте, что команда `rebuild_ratings` пересчитывает '
+            'рейтинги произведений по таблице отзывов.'
+        )
+        for url, etag in etags.items():
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                'Проверьте, что `rebuild_ratings` меняет версии '
+                f'исправленных произведений и ETag `{url}`.'
+            )
+        assert client.get(detail_url).json()['rating'] == 5
+        version = title.version
+        Title.objects.refresh_ratings()
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count, title.rating) == (
+            10, 2, 5.0
+        )
+        assert title.version == version + 1, (
+            'Проверьте, что `refresh_ratings` увеличивает версии '
+            'произведений.'
+        )
+
+    # Collector читает каждую связанную таблицу: бюджет выше обычного
+    # для удаления, но не зависит от числа отзывов и комментариев.
+    @pytest.mark.query_budget(20, method='DELETE')
+    def test_03_title_delete_queries(
+            self, admin_client, user_client, user,
+            django_assert_max_num_queries):
+        from reviews import search
+        from reviews.models import Comment, Review, Title, TitleStats, User
+
+        titles, _, _ = create_titles(admin_client)
+        title_id, other_id = titles[0]['id'], titles[1]['id']
+        create_single_review(user_client, other_id, 'Другой', 6)
+        User.objects.bulk_create(
+            User(username=f'author{number}', email=f'{number}@yamdb.fake')
+            for number in range(50)
+        )
+        authors = list(User.objects.filter(username__startswith='author'))
+        Review.objects.bulk_create(
+            Review(title_id=title_id, author=author, text='Отзыв', score=5)
+            for author in authors
+        )
+        Comment.objects.bulk_create(
+            Comment(review=review, author=user, text='Комментарий')
+            for review in Review.objects.filter(title_id=title_id)
+        )
+        search.rebuild(search.get_connection(write=True))
+
+        with django_assert_max_num_queries(20):
+            response = admin_client.delete(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == 204, (
+            'Проверьте, что число запросов при удалении произведения не '
+            'зависит от числа его отзывов и комментариев.'
+        )
+        assert not Review.objects.filter(title_id=title_id).exists()
+        assert search.search('Комментарий') == [], (
+            'Проверьте, что удаление произведения убирает из поискового '
+            'индекса его отзывы и комментарии.'
+        )
+        assert search.search('Другой') == [('review', Review.objects.get(
+            title_id=other_id).pk)]
+        other = Title.objects.get(pk=other_id)
+        assert (other.review_count, other.rating) == (1, 6)
+        assert TitleStats.objects.get(title_id=other_id).review_count == 1
+
+    def test_04_failed_title_delete(self, admin_client, user_client):
+        from django.db.models.signals import pre_delete
+
+        from reviews import search
+        from reviews.models import Review, Title
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'Первый', 4)
+        create_single_review(admin_client, title_id, 'Второй', 8)
+
+        def fail(sender, **kwargs):
+            raise RuntimeError('Удаление прервано')
+
+        pre_delete.connect(fail, sender=Title, dispatch_uid='test_fail')
+        try:
+            with pytest.raises(RuntimeError):
+                Title.objects.get(pk=title_id).delete()
+        finally:
+            pre_delete.disconnect(dispatch_uid='test_fail', sender=Title)
+        Review.objects.get(text='Первый').delete()
+        title = Title.objects.get(pk=title_id)
+        assert (title.review_count, title.rating) == (1, 8), (
+            'Проверьте, что прерванное удаление произведения не мешает '
+            'обновлять рейтинг при следующих удалениях отзывов.'
+        )
+        assert search.search('Второй') and not search.search('Первый')
+
+    def test_05_fast_delete_kept(self):
+        from django.contrib.admin.models import LogEntry
+        from django.db.models.deletion import Collector
+
+        from reviews.models import (
+            Title, TitleSimilarity, User, UserRecommendation,
+        )
+
+        collector = Collector(using='default')
+        for model in (
+            LogEntry, TitleSimilarity, UserRecommendation,
+            Title.genre.through, User.groups.through,
+            User.user_permissions.through,
+        ):
+            assert collector.can_fast_delete(model.objects.all()), (
+                'Проверьте, что сигналы удаления подключены только к '
+                f'своим моделям: иначе {model.__name__} теряет быстрое '
+                'каскадное удаление.'
+            )
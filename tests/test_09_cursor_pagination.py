@@ -0,0 +1,58 @@
+from http import HTTPStatus
+
+import pytest
+from tests.utils import create_reviews, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09CursorPagination:
+
+    def test_01_titles_cursor(self, admin_client, client):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/'
+
+        response = client.get(url, {'pagination': 'cursor', 'limit': 1})
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert 'count' not in data, (
+            f'Проверьте, что в курсорном режиме `{url}` не выполняет '
+            'подсчёт общего количества объектов.'
+        )
+        assert [item['id'] for item in data['results']] == [titles[0]['id']]
+        assert data['previous'] is None
+        assert 'cursor=' in data['next'], (
+            f'Проверьте, что в курсорном режиме `{url}` возвращает '
+            'ссылку на следующую страницу с курсором.'
+        )
+
+        data = client.get(data['next']).json()
+        assert [item['id'] for item in data['results']] == [titles[1]['id']]
+        assert data['next'] is None
+        assert data['previous'] is not None
+
+        data = client.get(url, {'limit': 1, 'offset': 1}).json()
+        assert data['count'] == 2, (
+            f'Проверьте, что пагинация limit/offset для `{url}` '
+            'продолжает работать по умолчанию.'
+        )
+
+    def test_02_reviews_cursor(self, admin_client, admin, user_client, user,
+                               moderator_client, moderator, client):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+
+        seen = []
+        next_url = f'{url}?pagination=cursor&limit=2'
+        while next_url:
+            data = client.get(next_url).json()
+            seen.extend(item['id'] for item in data['results'])
+            next_url = data['next']
+        assert seen == [review['id'] for review in reviews], (
+            f'Проверьте, что курсорная пагинация `{url}` обходит все отзывы '
+            'в порядке публикации без пропусков и повторов.'
+        )
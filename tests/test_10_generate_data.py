@@ -0,0 +1,140 @@
+import json
+from io import StringIO
+
+import pytest
+
+from django.core.management import call_command
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10GenerateData:
+
+    def test_01_generate_data(self):
+        from reviews import search
+        from reviews.models import Comment, Review, Title, User
+
+        call_command(
+            'generate_data', '--users', '5', '--titles', '4', '--reviews',
+            '20', '--comments', '10', '--batch-size', '3',
+            stdout=StringIO()
+        )
+        assert User.objects.count() == 5
+        assert Review.objects.count() == 20, (
+            'Проверьте, что `generate_data` создаёт заданное количество '
+            'отзывов, не нарушая `uq_author_title`.'
+        )
+        assert Comment.objects.count() == 10
+        assert sum(Title.objects.values_list('review_count', flat=True)) == 20
+        found = search.search(
+            Review.objects.first().text.split()[0], kinds=('review',)
+        )
+        assert found, (
+            'Проверьте, что `generate_data` перестраивает поисковый индекс.'
+        )
+
+        first = list(Review.objects.values_list('title', 'author', 'score'))
+        Review.objects.all().delete()
+        User.objects.all().delete()
+        Title.objects.all().delete()
+        call_command(
+            'generate_data', '--users', '5', '--titles', '4', '--reviews',
+            '20', '--comments', '0', '--prefix', 'again', stdout=StringIO()
+        )
+        second = list(Review.objects.values_list('score', flat=True))
+        assert [score for _, _, score in first] == second, (
+            'Проверьте, что `generate_data` воспроизводим при одинаковом '
+            '`--seed`.'
+        )
+
+    # Прогон идёт внутри откатываемой транзакции: у каждого запроса
+    # на запись появляются дополнительные SAVEPOINT.
+    @pytest.mark.query_budget(20)
+    def test_02_benchmark_api(self, tmp_path):
+        call_command(
+            'generate_data', '--users', '5', '--titles', '3', '--reviews',
+            '6', '--comments', '3', stdout=StringIO()
+        )
+        output = tmp_path / 'baseline.json'
+        call_command(
+            'benchmark_api', '--iterations', '2', '--warmup', '0',
+            '--output', str(output), stdout=StringIO()
+        )
+        results = json.loads(output.read_text())
+        from api.management.commands.benchmark_api import SCENARIOS
+        for name, *_ in SCENARIOS:
+            assert name in results, (
+                f'Проверьте, что сценарий `{name}` выполняется на данных '
+                '`generate_data`.'
+            )
+            assert results[name]['requests'] == 2
+        from reviews.models import Review, User
+        assert Review.objects.count() == 6, (
+            'Проверьте, что `benchmark_api` откатывает изменения в базе.'
+        )
+        assert not User.objects.filter(username='benchmark_admin').exists()
+
+    def test_03_benchmark_cold_cache(self, tmp_path):
+        call_command(
+            'generate_data', '--users', '5', '--titles', '3', '--reviews',
+            '6', '--comments', '0', stdout=StringIO()
+        )
+        results = {}
+        for mode in ('cold', 'warm'):
+            output = tmp_path / f'{mode}.json'
+            flags = ['--warm'] if mode == 'warm' else []
+            call_command(
+                'benchmark_api', '--only', 'titles-detail', '--iterations',
+                '3', '--warmup', '1', '--output', str(output), *flags,
+                stdout=StringIO()
+            )
+            results[mode] = json.loads(output.read_text())['titles-detail']
+            assert results[mode]['cache'] == mode
+        assert results['cold']['queries'] > results['warm']['queries'], (
+            'Проверьте, что по умолчанию `benchmark_api` очищает кеш API '
+            'перед каждым запросом.'
+        )
+
+        out = StringIO()
+        call_command(
+            'benchmark_api', '--only', 'titles-detail', '--iterations', '1',
+            '--warmup', '0', '--baseline', str(tmp_path / 'warm.json'),
+            stdout=out
+        )
+        assert 'пропущен' in out.getvalue(), (
+            'Проверьте, что baseline с другим режимом кеша не сравнивается.'
+        )
+
+    def test_04_benchmark_covers_routes(self):
+        from django.urls import URLResolver, resolve
+
+        from api.management.commands.benchmark_api import SCENARIOS
+        from api.v1 import urls
+
+        def routes(patterns, prefix=''):
+            for pattern in patterns:
+                route = prefix + str(pattern.pattern).lstrip('^')
+                if isinstance(pattern, URLResolver):
+                    yield from routes(pattern.url_patterns, route)
+                elif '<format>' not in route and route != '$':
+                    view = pattern.callback
+                    methods = getattr(view, 'actions', None) or [
+                        method for method in ('get', 'post', 'patch')
+                        if hasattr(view.cls, method)
+                    ]
+                    for method in methods:
+                        if method not in ('put', 'head'):
+                            yield route, method
+
+        context = {
+            'title': 1, 'review': 1, 'comment': 1, 'genre': 'genre',
+            'category': 'category', 'user': 'user', 'username': 'user',
+        }
+        covered = {
+            (resolve(url.format(**context)).route[len('api/v1/'):], method)
+            for _, method, url, _, _ in SCENARIOS
+        }
+        for route, method in routes(urls.urlpatterns):
+            assert (route, method) in covered, (
+                f'Проверьте, что `benchmark_api` замеряет {method.upper()} '
+                f'`{route}`.'
+            )
@@ -0,0 +1,55 @@
+from io import StringIO
+
+import pytest
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11ImportCSV:
+
+    def test_01_import_static_data(self):
+        from reviews import search
+        from reviews.models import Comment, Review, Title, User
+
+        call_command('import_csv', '--batch-size', '10', stdout=StringIO())
+        assert User.objects.count() == 5
+        assert Title.objects.count() == 32
+        assert Review.objects.count() == 72
+        assert Comment.objects.count() == 3
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.year == 2019, (
+            'Проверьте, что `import_csv` сохраняет `pub_date` из файла.'
+        )
+        assert Title.objects.get(pk=1).rating == 10.0, (
+            'Проверьте, что после загрузки отзывов пересчитывается рейтинг.'
+        )
+        assert User.objects.get(pk=100).confirmation_code, (
+            'Проверьте, что загруженные пользователи получают '
+            'confirmation_code.'
+        )
+        assert ('title', 1) in search.search('Шоушенка', kinds=('title',)), (
+            'Проверьте, что `import_csv` перестраивает поисковый индекс.'
+        )
+
+        out = StringIO()
+        call_command('import_csv', '--resume', stdout=out)
+        assert 'review.csv: загружено 0, пропущено 72' in out.getvalue()
+        assert Review.objects.count() == 72
+
+    def test_02_dry_run(self, tmp_path):
+        from reviews.models import Category
+
+        (tmp_path / 'category.csv').write_text(
+            'id,name,slug\n1,Фильм,movie\n2,Плохой,:-)\n', encoding='utf-8'
+        )
+        with pytest.raises(CommandError):
+            call_command(
+                'import_csv', '--dry-run', '--path', str(tmp_path),
+                '--only', 'category.csv', stdout=StringIO(),
+                stderr=StringIO()
+            )
+        assert not Category.objects.exists(), (
+            'Проверьте, что `import_csv --dry-run` не пишет в базу.'
+        )
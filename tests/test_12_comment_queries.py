@@ -0,0 +1,59 @@
+import pytest
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12CommentQueries:
+
+    def test_01_comment_list_constant_queries(
+            self, client, admin_client, admin, user_client, user,
+            django_assert_num_queries):
+        from reviews.models import Comment
+
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/'
+        )
+        for review_field in ('text', 'id'):
+            with django_assert_num_queries(3):
+                response = client.get(
+                    url, {'limit': 50, 'review_field': review_field}
+                )
+            assert len(response.json()['results']) == 2
+
+        Comment.objects.bulk_create(
+            Comment(review_id=reviews[0]['id'], author=user, text=str(i))
+            for i in range(20)
+        )
+        with django_assert_num_queries(3):
+            response = client.get(url, {'limit': 50})
+        data = response.json()['results']
+        assert len(data) == 22, (
+            f'Проверьте, что число запросов к БД при GET-запросе к `{url}` '
+            'не зависит от размера страницы.'
+        )
+        assert data[0]['review'] == reviews[0]['text']
+
+    def test_02_compact_review_reference(self, client, admin_client, admin,
+                                         user_client, user):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/'
+        )
+        data = client.get(url, {'review_field': 'id'}).json()
+        assert {item['review'] for item in data['results']} == {
+            reviews[0]['id']
+        }, (
+            f'Проверьте, что с параметром `review_field=id` `{url}` '
+            'возвращает id отзыва вместо его текста.'
+        )
+        data = client.get(
+            f'{url}{comments[0]["id"]}/', {'review_field': 'id'}
+        ).json()
+        assert data['review'] == reviews[0]['id']
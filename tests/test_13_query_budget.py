@@ -0,0 +1,45 @@
+import logging
+
+import pytest
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13QueryBudget:
+
+    @pytest.fixture
+    def query_middleware(self, settings):
+        settings.MIDDLEWARE = [
+            'api.middleware.QueryCountMiddleware', *settings.MIDDLEWARE
+        ]
+        settings.QUERY_COUNT_BUDGET = 1
+
+    @pytest.mark.query_budget(
+        3, method='GET', path=r'^/api/v1/titles/\d+/reviews/$'
+    )
+    def test_01_review_list_headers(self, client, admin_client, admin,
+                                    user_client, user, query_middleware,
+                                    caplog):
+        _, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        with caplog.at_level(logging.WARNING, logger='api.middleware'):
+            response = client.get(url)
+        assert response['X-DB-Queries'] == '3', (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовок `X-DB-Queries` с числом запросов к БД.'
+        )
+        assert float(response['X-DB-Time']) >= 0
+        assert url in caplog.text, (
+            'Проверьте, что запросы сверх `QUERY_COUNT_BUDGET` попадают '
+            'в лог.'
+        )
+
+    def test_02_query_budget_fixture(self, client, query_budget):
+        from reviews.models import Category
+
+        Category.objects.create(name='Фильм', slug='films')
+        before = query_budget.count
+        client.get('/api/v1/categories/')
+        assert query_budget.count - before == 2
@@ -0,0 +1,131 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+
+class FailingBackend(BaseEmailBackend):
+
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP недоступен')
+
+
+class RecordingBackend(BaseEmailBackend):
+    in_transaction = []
+
+    def send_messages(self, email_messages):
+        self.in_transaction.append(connection.in_atomic_block)
+        return len(email_messages)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14EmailQueue:
+
+    def test_01_signup_enqueues_email(self, client):
+        from reviews.models import EMAIL_STATUS, OutboundEmail
+
+        client.post(
+            '/api/v1/auth/signup/',
+            data={'email': 'queued@yamdb.fake', 'username': 'queued'}
+        )
+        email = OutboundEmail.objects.get()
+        assert email.to == 'queued@yamdb.fake'
+        assert email.status == EMAIL_STATUS.pending.value
+        assert not mail.outbox
+
+        call_command('send_emails', '--once', stdout=StringIO())
+        email.refresh_from_db()
+        assert email.status == EMAIL_STATUS.sent.value
+        assert email.sent_at is not None
+        assert len(mail.outbox) == 1
+
+    def test_02_retry_with_backoff(self, settings):
+        from reviews.models import EMAIL_STATUS, OutboundEmail
+
+        settings.EMAIL_BACKEND = 'tests.test_14_email_queue.FailingBackend'
+        email = OutboundEmail.objects.enqueue(
+            'Тема', 'Текст', 'yamdb@example.com', 'retry@yamdb.fake'
+        )
+        call_command(
+            'send_emails', '--once', '--backoff', '60', '--max-attempts',
+            '2', stdout=StringIO()
+        )
+        email.refresh_from_db()
+        assert email.status == EMAIL_STATUS.pending.value
+        assert email.attempts == 1
+        assert 'SMTP недоступен' in email.last_error
+        retry_after = timezone.now() + timedelta(seconds=50)
+        assert email.next_attempt_at > retry_after, (
+            'Проверьте, что неудачная отправка откладывается с задержкой.'
+        )
+
+        OutboundEmail.objects.update(next_attempt_at=timezone.now())
+        call_command(
+            'send_emails', '--once', '--max-attempts', '2',
+            stdout=StringIO()
+        )
+        email.refresh_from_db()
+        assert email.status == EMAIL_STATUS.failed.value
+        assert email.attempts == 2
+
+    def test_03_batches(self):
+        from reviews.models import EMAIL_STATUS, OutboundEmail
+
+        for number in range(5):
+            OutboundEmail.objects.enqueue(
+                'Тема', 'Текст', 'yamdb@example.com', f'{number}@yamdb.fake'
+            )
+        out = StringIO()
+        call_command('send_emails', '--once', '--batch-size', '2', stdout=out)
+        assert out.getvalue().count('Отправлено') == 3
+        assert OutboundEmail.objects.filter(
+            status=EMAIL_STATUS.sent.value
+        ).count() == 5
+        assert len(mail.outbox) == 5
+
+    def test_04_send_outside_transaction(self, settings):
+        from reviews.models import EMAIL_STATUS, OutboundEmail
+
+        settings.EMAIL_BACKEND = 'tests.test_14_email_queue.RecordingBackend'
+        RecordingBackend.in_transaction.clear()
+        OutboundEmail.objects.enqueue(
+            'Тема', 'Текст', 'yamdb@example.com', 'lock@yamdb.fake'
+        )
+        call_command('send_emails', '--once', stdout=StringIO())
+        assert RecordingBackend.in_transaction == [False], (
+            'Проверьте, что письма отправляются вне транзакции.'
+        )
+        assert OutboundEmail.objects.get().status == EMAIL_STATUS.sent.value
+
+    def test_05_claim_lease(self):
+        from reviews.models import EMAIL_STATUS, OutboundEmail
+
+        for number in range(3):
+            OutboundEmail.objects.enqueue(
+                'Тема', 'Текст', 'yamdb@example.com', f'{number}@yamdb.fake'
+            )
+        claimed = OutboundEmail.objects.claim(2, timedelta(minutes=5))
+        assert len(claimed) == 2
+        assert [email.pk for email in OutboundEmail.objects.claim(
+            10, timedelta(minutes=5)
+        )] == list(OutboundEmail.objects.exclude(
+            pk__in=[email.pk for email in claimed]
+        ).values_list('pk', flat=True)), (
+            'Проверьте, что захваченные письма не достаются другому процессу.'
+        )
+        assert not OutboundEmail.objects.due().exists()
+
+        OutboundEmail.objects.update(next_attempt_at=timezone.now())
+        call_command('send_emails', '--once', stdout=StringIO())
+        assert OutboundEmail.objects.filter(
+            status=EMAIL_STATUS.sent.value
+        ).count() == 3, (
+            'Проверьте, что письма упавшего процесса отправляются после '
+            'истечения аренды.'
+        )
@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from threading import Barrier
+
+import pytest
+from rest_framework.test import APIClient
+
+from django.db import connection
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+WORKERS = 8
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15SignupConcurrency:
+
+    @pytest.mark.query_budget(1, method='POST')
+    def test_01_existing_identity_single_query(self, client, user):
+        data = {'username': user.username, 'email': user.email}
+        response = client.post(SIGNUP_URL, data=data)
+        assert response.status_code == HTTPStatus.OK
+        assert 'error' in response.json()
+
+        response = client.post(
+            SIGNUP_URL, data={'username': 'other', 'email': user.email}
+        )
+        assert response.json() == {'error': 'Это email уже используется'}
+
+        response = client.post(
+            SIGNUP_URL,
+            data={'username': user.username, 'email': 'other@yamdb.fake'}
+        )
+        assert response.json() == {'error': 'Неправильный email'}
+
+    def test_02_parallel_signups_same_identity(self, django_user_model):
+        data = {'username': 'racer', 'email': 'racer@yamdb.fake'}
+        barrier = Barrier(WORKERS)
+
+        def signup(_):
+            try:
+                barrier.wait()
+                return APIClient().post(SIGNUP_URL, data=data).status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+            statuses = list(executor.map(signup, range(WORKERS)))
+
+        assert statuses == [HTTPStatus.OK] * WORKERS, (
+            'Проверьте, что параллельные регистрации с одинаковыми '
+            '`username` и `email` отвечают как повторная регистрация, '
+            'а не ошибкой сервера.'
+        )
+        assert django_user_model.objects.filter(
+            username=data['username']
+        ).count() == 1
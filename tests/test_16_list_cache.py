@@ -0,0 +1,65 @@
+from http import HTTPStatus
+
+import pytest
+from tests.utils import create_categories, create_genre
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16ListCache:
+
+    @pytest.mark.parametrize('url,create', (
+        ('/api/v1/categories/', create_categories),
+        ('/api/v1/genres/', create_genre),
+    ))
+    def test_01_list_cached_and_invalidated(
+            self, client, admin_client, url, create, query_budget):
+        objects = create(admin_client)
+
+        response = client.get(url, {'search': objects[0]['name']})
+        assert response['X-Cache'] == 'MISS'
+        before = query_budget.count
+        response = client.get(url, {'search': objects[0]['name']})
+        assert response['X-Cache'] == 'HIT'
+        assert query_budget.count == before, (
+            f'Проверьте, что повторный GET-запрос к `{url}` отдаётся из '
+            'кеша без запросов к БД.'
+        )
+        assert response.json()['results'] == [objects[0]]
+
+        admin_client.delete(f'{url}{objects[0]["slug"]}/')
+        response = client.get(url, {'search': objects[0]['name']})
+        assert response['X-Cache'] == 'MISS', (
+            f'Проверьте, что удаление объекта сбрасывает кеш `{url}`.'
+        )
+        assert response.json()['results'] == []
+
+    def test_02_cache_stats(self, client, admin_client, user_client):
+        client.get('/api/v1/genres/')
+        client.get('/api/v1/genres/')
+        response = admin_client.get('/api/v1/cache/stats/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['genres'] == {'hits': 1, 'misses': 1}
+        response = user_client.get('/api/v1/cache/stats/')
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+    def test_03_invalidated_after_commit(self, client, admin_client):
+        from django.db import transaction
+
+        from api.v1.cache import generation_key, get_cache
+        from reviews.models import Category
+
+        categories = create_categories(admin_client)
+        client.get('/api/v1/categories/')
+        cache = get_cache()
+        before = cache.get(generation_key('categories'))
+        with transaction.atomic():
+            Category.objects.get(slug=categories[0]['slug']).delete()
+            assert cache.get(generation_key('categories')) == before, (
+                'Проверьте, что кеш категорий сбрасывается после фиксации '
+                'транзакции: иначе параллельный GET сохранит под новым '
+                'поколением список до удаления.'
+            )
+        assert cache.get(generation_key('categories')) != before, (
+            'Проверьте, что удаление категории сбрасывает кеш после '
+            'фиксации транзакции.'
+        )
@@ -0,0 +1,150 @@
+from http import HTTPStatus
+
+import pytest
+from rest_framework.test import APIClient
+
+
+def claims_client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {user.create_jwt_token()}'
+    )
+    return client
+
+
+@pytest.fixture(autouse=True)
+def claims_revocation(revocation_cache):
+    return revocation_cache
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17ClaimsAuthentication:
+
+    def test_01_token_contains_claims(self, client, user):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        response = client.post('/api/v1/auth/token/', data={
+            'username': user.username,
+            'confirmation_code': user.confirmation_code,
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        token = AccessToken(response.json()['token'])
+        assert token['username'] == user.username
+        assert token['role'] == user.role
+        assert token['is_superuser'] is False
+
+    def test_02_no_user_lookup(self, admin, token_admin, query_budget):
+        data = {'name': 'Фильм', 'slug': 'films'}
+        fallback_client = APIClient()
+        fallback_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {token_admin["access"]}'
+        )
+        before = query_budget.count
+        response = fallback_client.post('/api/v1/genres/', data=data)
+        assert response.status_code == HTTPStatus.CREATED
+        fallback_queries = query_budget.count - before
+
+        before = query_budget.count
+        response = claims_client(admin).post('/api/v1/categories/', data=data)
+        assert response.status_code == HTTPStatus.CREATED
+        assert query_budget.count - before == fallback_queries - 1, (
+            'Проверьте, что для токена с claims пользователь не загружается '
+            'из БД.'
+        )
+
+    def test_03_role_change_revokes_claims(self, admin_client, user):
+        client = claims_client(user)
+        data = {'name': 'Фильм', 'slug': 'films'}
+        response = client.post('/api/v1/categories/', data=data)
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = client.post('/api/v1/categories/', data=data)
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что после смены роли claims старых токенов не '
+            'используются.'
+        )
+
+    def test_04_me_and_ownership(self, user):
+        from reviews.models import Title
+
+        client = claims_client(user)
+        response = client.get('/api/v1/users/me/')
+        assert response.json()['email'] == user.email
+        response = client.patch('/api/v1/users/me/', data={'bio': 'новое'})
+        assert response.status_code == HTTPStatus.OK
+        user.refresh_from_db()
+        assert user.bio == 'новое'
+        assert user.email == 'testuser@yamdb.fake'
+
+        title = Title.objects.create(name='Title', year=2000)
+        review = client.post(
+            f'/api/v1/titles/{title.pk}/reviews/',
+            data={'text': 'text', 'score': 5}
+        ).json()
+        assert review['author'] == user.username
+        response = client.patch(
+            f'/api/v1/titles/{title.pk}/reviews/{review["id"]}/',
+            data={'text': 'новый'}
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что автор отзыва с токеном по claims может его '
+            'изменить.'
+        )
+
+    def test_05_revocation_survives_api_cache(self, client, admin, user):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        from api.v1.authentication import claims_revoked
+
+        token_client = claims_client(admin)
+        admin.role = 'user'
+        admin.save()
+        for number in range(400):
+            client.get('/api/v1/categories/', {'search': number})
+        token = AccessToken(
+            token_client._credentials['HTTP_AUTHORIZATION'].split()[1]
+        )
+        assert claims_revoked(admin.pk, token['iat']), (
+            'Проверьте, что метки отзыва не вытесняются страницами списков '
+            'из кеша ответов API.'
+        )
+        response = token_client.post(
+            '/api/v1/categories/', data={'name': 'Фильм', 'slug': 'films'}
+        )
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+    def test_06_short_lifetime(self, user, settings):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        token = AccessToken(user.create_jwt_token())
+        assert token['exp'] - token['iat'] <= (
+            settings.CLAIMS_ACCESS_TOKEN_LIFETIME.total_seconds()
+        ), 'Проверьте, что access-токены с claims живут недолго.'
+
+        settings.AUTH_REVOCATION_CACHE_ALIAS = None
+        token = AccessToken(user.create_jwt_token())
+        assert token['exp'] - token['iat'] == (
+            settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds()
+        ), (
+            'Проверьте, что без кеша меток отзыва токены живут '
+            '`ACCESS_TOKEN_LIFETIME`: их claims всё равно не используются.'
+        )
+
+    def test_07_no_revocation_cache(
+            self, admin_client, user, settings, query_budget):
+        settings.AUTH_REVOCATION_CACHE_ALIAS = None
+        client = claims_client(user)
+        data = {'name': 'Фильм', 'slug': 'films'}
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = client.post('/api/v1/categories/', data=data)
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что без кеша меток отзыва пользователь загружается '
+            'из БД и его роль актуальна.'
+        )
@@ -0,0 +1,68 @@
+from io import StringIO
+
+import pytest
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='Только для SQLite.'
+)
+
+@pytest.mark.django_db(transaction=True)
+class Test18SqliteTuning:
+
+    def test_01_pragmas_applied_to_new_connection(self, tmp_path):
+        pragmas = {'journal_mode': 'WAL', 'synchronous': 'NORMAL'}
+        with override_settings(SQLITE_PRAGMAS=pragmas):
+            tuned = connection.copy()
+            tuned.settings_dict['NAME'] = str(tmp_path / 'tuned.sqlite3')
+            try:
+                with tuned.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    journal_mode = cursor.fetchone()[0]
+                    cursor.execute('PRAGMA synchronous')
+                    synchronous = cursor.fetchone()[0]
+            finally:
+                tuned.close()
+        assert journal_mode == 'wal', (
+            'Проверьте, что SQLITE_PRAGMAS применяются к каждому новому '
+            'соединению SQLite.'
+        )
+        assert synchronous == 1
+
+    def test_02_default_connection_untouched(self, tmp_path):
+        with override_settings(SQLITE_PRAGMAS={}):
+            plain = connection.copy()
+            plain.settings_dict['NAME'] = str(tmp_path / 'plain.sqlite3')
+            try:
+                with plain.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    journal_mode = cursor.fetchone()[0]
+            finally:
+                plain.close()
+        assert journal_mode == 'delete', (
+            'Без профиля SQLITE_PRODUCTION настройки SQLite не меняются.'
+        )
+
+    def test_03_benchmark_sqlite(self):
+        from reviews.models import Comment
+
+        call_command(
+            'generate_data', '--users', '3', '--titles', '3', '--reviews',
+            '3', '--comments', '0', stdout=StringIO()
+        )
+        out = StringIO()
+        call_command(
+            'benchmark_sqlite', '--readers', '1', '--writers', '1',
+            '--duration', '0.3', stdout=out
+        )
+        lines = out.getvalue().splitlines()
+        assert len(lines) == 4, (
+            'Проверьте, что `benchmark_sqlite` печатает чтение и запись '
+            'для обоих профилей.'
+        )
+        assert not Comment.objects.exists(), (
+            'Проверьте, что `benchmark_sqlite` работает на копии базы.'
+        )
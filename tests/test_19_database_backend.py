@@ -0,0 +1,23 @@
+import pytest
+
+from django.db import connection
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19DatabaseBackend:
+
+    @pytest.mark.skipif(
+        connection.vendor != 'postgresql', reason='Только для PostgreSQL.'
+    )
+    def test_01_title_name_trigram_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT indexdef FROM pg_indexes '
+                "WHERE indexname = 'title_name_trgm_idx'"
+            )
+            row = cursor.fetchone()
+        assert row is not None, (
+            'Проверьте, что миграция создаёт триграммный индекс по '
+            '`Title.name` в PostgreSQL.'
+        )
+        assert 'gin_trgm_ops' in row[0]
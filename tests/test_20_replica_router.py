@@ -0,0 +1,126 @@
+import pytest
+
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.test import override_settings
+
+REPLICA = 'replica_test'
+
+
+@pytest.fixture
+def replica(transactional_db, tmp_path, pin_cache):
+    """Вторая база SQLite с той же схемой, подключённая как реплика."""
+    connections.settings[REPLICA] = {
+        **connections['default'].settings_dict,
+        'NAME': str(tmp_path / 'replica.sqlite3'),
+    }
+    call_command('migrate', database=REPLICA, verbosity=0)
+    try:
+        with override_settings(DATABASE_REPLICAS=[REPLICA]):
+            yield REPLICA
+    finally:
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+
+
+def create_title(using, **fields):
+    from reviews.models import Title
+
+    return Title.objects.using(using).create(
+        name='Реплика', year=2000, **fields
+    )
+
+
+@pytest.mark.skipif(
+    connections['default'].vendor != 'sqlite', reason='Только для SQLite.'
+)
+@pytest.mark.django_db(transaction=True)
+class Test20ReplicaRouter:
+
+    def test_01_safe_requests_read_from_replica(self, client, replica):
+        create_title(replica)
+        response = client.get('/api/v1/titles/')
+        assert response.json()['count'] == 1, (
+            'Проверьте, что GET-запросы к вьюсетам читают с реплики.'
+        )
+
+    def test_02_writes_go_to_primary(self, admin_client, replica):
+        from reviews.models import Category, Genre, Title
+
+        Category.objects.create(name='Фильм', slug='movie')
+        Genre.objects.create(name='Драма', slug='drama')
+        response = admin_client.post('/api/v1/titles/', {
+            'name': 'Основная', 'year': 2000, 'genre': ['drama'],
+            'category': 'movie',
+        }, format='json')
+        assert response.status_code == 201, (
+            'Проверьте, что при записи связанные объекты читаются с '
+            'основной базы.'
+        )
+        assert Title.objects.using('default').count() == 1, (
+            'Проверьте, что запись всегда идёт в основную базу.'
+        )
+        assert not Title.objects.using(replica).exists()
+
+    def test_03_read_your_writes(
+            self, user_client, moderator_client, replica):
+        title = create_title('default')
+        create_title(replica, pk=title.pk)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+
+        response = user_client.post(url, {'text': 'Отзыв', 'score': 5})
+        assert response.status_code == 201
+        response = user_client.get(url)
+        assert response.json()['count'] == 1, (
+            'Проверьте, что после записи пользователь читает свои отзывы '
+            'с основной базы.'
+        )
+        response = moderator_client.get(url)
+        assert response.json()['count'] == 0, (
+            'Проверьте, что пользователи без недавних записей читают '
+            'с реплики.'
+        )
+
+    def test_04_transaction_reads_primary(self, replica):
+        from api.routers import (
+            ReplicaRouter, allow_replica_reads, reset_replica_reads,
+        )
+
+        router = ReplicaRouter()
+        assert router.db_for_read(None) == 'default', (
+            'Проверьте, что без allow_replica_reads() чтение идёт в '
+            'основную базу.'
+        )
+        token = allow_replica_reads()
+        try:
+            assert router.db_for_read(None) == replica
+            with transaction.atomic():
+                assert router.db_for_read(None) == 'default', (
+                    'Проверьте, что внутри транзакции чтение идёт в '
+                    'основную базу.'
+                )
+        finally:
+            reset_replica_reads(token)
+
+    def test_05_pins_need_dedicated_cache(
+            self, client, user_client, settings, replica):
+        from api.v1.cache import get_cache
+
+        title = create_title('default')
+        create_title(replica, pk=title.pk)
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        response = user_client.post(url, {'text': 'Отзыв', 'score': 5})
+        assert response.status_code == 201
+        get_cache().clear()
+        assert user_client.get(url).json()['count'] == 1, (
+            'Проверьте, что закрепление за основной базой хранится не в '
+            'кеше ответов API: его очистка не должна его сбрасывать.'
+        )
+
+        create_title('default')
+        settings.REPLICA_PIN_CACHE_ALIAS = None
+        assert client.get('/api/v1/titles/').json()['count'] == 2, (
+            'Проверьте, что без кеша закреплений все читают с основной '
+            'базы.'
+        )
@@ -0,0 +1,133 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+
+from django.core.management import call_command
+from django.db import connection
+
+
+@pytest.fixture(autouse=True)
+def clean_search_index(transactional_db):
+    """Таблицу индекса не очищает flush между тестами."""
+    from reviews import search
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {search.SEARCH_TABLE}')
+
+
+def create_title(name, description=''):
+    from reviews.models import Title
+
+    return Title.objects.create(name=name, year=2000, description=description)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21Search:
+
+    def test_01_titles_ranked_by_relevance(self, client):
+        other = create_title('Солярис', 'Про океан и звёзды')
+        best = create_title('Океан', 'Океан, океан и ещё раз океан')
+        create_title('Сталкер', 'Зона')
+
+        response = client.get('/api/v1/titles/', {'q': 'океан'})
+        assert response.status_code == HTTPStatus.OK
+        ids = [title['id'] for title in response.json()['results']]
+        assert ids == [best.pk, other.pk], (
+            'Проверьте, что `?q=` возвращает только найденные произведения, '
+            'упорядоченные по релевантности.'
+        )
+
+        response = client.get('/api/v1/titles/', {'q': 'ок'})
+        assert response.json()['count'] == 2, (
+            'Проверьте, что поиск находит слова по префиксу.'
+        )
+        response = client.get('/api/v1/titles/', {'q': '"('})
+        assert response.json()['count'] == 3, (
+            'Проверьте, что запрос без слов не ограничивает список.'
+        )
+
+    def test_02_search_endpoint(self, client, user):
+        from reviews.models import Comment, Review
+
+        title = create_title('Дюна', 'Пустыня')
+        review = Review.objects.create(
+            title=title, author=user, text='Пустыня прекрасна', score=9
+        )
+        comment = Comment.objects.create(
+            review=review, author=user, text='Согласен про пустыню'
+        )
+        create_title('Море')
+
+        response = client.get('/api/v1/search/', {'q': 'пустын'})
+        assert response.status_code == HTTPStatus.OK
+        found = {
+            (item['type'], item['id']) for item in response.json()['results']
+        }
+        assert found == {
+            ('title', title.pk), ('review', review.pk),
+            ('comment', comment.pk),
+        }, (
+            'Проверьте, что `/api/v1/search/` ищет по произведениям, '
+            'отзывам и комментариям.'
+        )
+        response = client.get(
+            '/api/v1/search/', {'q': 'пустын', 'type': 'review,comment'}
+        )
+        assert {item['type'] for item in response.json()['results']} == {
+            'review', 'comment'
+        }
+        assert response.json()['results'][0]['title'] == title.pk
+
+        assert client.get('/api/v1/search/').status_code == (
+            HTTPStatus.BAD_REQUEST
+        )
+        assert client.get(
+            '/api/v1/search/', {'q': 'x', 'type': 'user'}
+        ).status_code == HTTPStatus.BAD_REQUEST
+
+    def test_03_index_follows_changes(self, client):
+        title = create_title('Алиса')
+        title.name = 'Буратино'
+        title.save()
+        assert client.get('/api/v1/titles/', {'q': 'алиса'}).json()[
+            'count'] == 0
+        assert client.get('/api/v1/titles/', {'q': 'буратино'}).json()[
+            'count'] == 1
+        title.delete()
+        response = client.get('/api/v1/search/', {'q': 'буратино'})
+        assert response.json()['count'] == 0, (
+            'Проверьте, что удалённые объекты удаляются из индекса.'
+        )
+
+    def test_04_rebuild_search_index(self, client):
+        from reviews.models import Title
+
+        Title.objects.bulk_create([
+            Title(name='Незамеченное', year=2000),
+        ])
+        assert client.get('/api/v1/search/', {'q': 'незамеченное'}).json()[
+            'count'] == 0
+        call_command('rebuild_search_index', stdout=StringIO())
+        assert client.get('/api/v1/search/', {'q': 'незамеченное'}).json()[
+            'count'] == 1, (
+            'Проверьте, что `rebuild_search_index` индексирует объекты, '
+            'созданные в обход сигналов.'
+        )
+
+    def test_05_other_models_have_no_search_receivers(self):
+        from django.contrib.admin.models import LogEntry
+        from django.contrib.auth.models import Permission
+        from django.db.models.signals import post_delete, post_save
+
+        from reviews.models import TitleSimilarity, UserRecommendation
+
+        for model in (
+            LogEntry, Permission, TitleSimilarity, UserRecommendation
+        ):
+            assert not post_delete.has_listeners(model), (
+                'Проверьте, что сигналы поискового индекса подключены '
+                f'только к своим моделям: иначе {model.__name__} '
+                'теряет быстрое каскадное удаление.'
+            )
+            assert not post_save.has_listeners(model)
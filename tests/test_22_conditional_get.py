@@ -0,0 +1,155 @@
+from http import HTTPStatus
+
+import pytest
+
+from .utils import create_comments, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22ConditionalGet:
+
+    def assert_not_modified(self, client, url, query_budget, queries=0,
+                            last_modified=True):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.has_header('ETag'), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит ETag.'
+        )
+        assert response.has_header('Last-Modified') == last_modified
+        before = query_budget.count
+        response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            '`If-None-Match` возвращает 304.'
+        )
+        assert query_budget.count - before == queries, (
+            f'Проверьте, что 304 на `{url}` отдаётся за {queries} '
+            'запросов к БД.'
+        )
+        return response
+
+    def test_01_not_modified(
+            self, client, admin, admin_client, query_budget):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        title_id = titles[0]['id']
+        review_id = reviews[0]['id']
+        for url in (
+            '/api/v1/titles/',
+            '/api/v1/categories/',
+            '/api/v1/genres/',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+        ):
+            self.assert_not_modified(client, url, query_budget)
+        for url in (
+            f'/api/v1/titles/{title_id}/',
+            f'/api/v1/titles/{title_id}/reviews/',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/',
+        ):
+            # ETag по версии произведения: один запрос за версией.
+            self.assert_not_modified(
+                client, url, query_budget, queries=1, last_modified=False
+            )
+
+    def test_02_changes_update_etag(self, client, admin, admin_client):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        title_id = titles[0]['id']
+        review_id = reviews[0]['id']
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        comments_url = f'{reviews_url}{review_id}/comments/'
+        etags = {
+            url: client.get(url)['ETag']
+            for url in ('/api/v1/titles/', reviews_url, comments_url)
+        }
+
+        admin_client.patch(f'{reviews_url}{review_id}/', {'score': 1})
+        for url in ('/api/v1/titles/', reviews_url):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что изменение отзыва меняет ETag `{url}`.'
+            )
+
+        etag = client.get(comments_url)['ETag']
+        admin_client.patch(f'{reviews_url}{review_id}/', {'text': 'Другой'})
+        response = client.get(comments_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение текста отзыва меняет ETag списка '
+            'комментариев: в нём выводится текст отзыва.'
+        )
+        assert response.json()['results'][0]['review'] == 'Другой'
+
+        admin_client.post(comments_url, {'text': 'Новый'})
+        response = client.get(
+            comments_url, HTTP_IF_NONE_MATCH=etags[comments_url]
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что новый комментарий меняет ETag списка '
+            'комментариев.'
+        )
+
+    def test_03_etag_depends_on_query(self, client, admin_client):
+        create_titles(admin_client)
+        first = client.get('/api/v1/titles/', {'limit': 1})['ETag']
+        second = client.get('/api/v1/titles/', {'limit': 2})['ETag']
+        assert first != second, (
+            'Проверьте, что ETag зависит от параметров запроса.'
+        )
+
+    def test_04_category_change_updates_titles(self, client, admin_client):
+        create_titles(admin_client)
+        etag = client.get('/api/v1/titles/')['ETag']
+        admin_client.delete('/api/v1/categories/films/')
+        response = client.get('/api/v1/titles/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение категорий меняет ETag произведений.'
+        )
+
+    def test_05_genre_change_updates_titles(self, client, admin_client):
+        from reviews.models import Genre, Title
+
+        titles, _, _ = create_titles(admin_client)
+        title = Title.objects.get(pk=titles[0]['id'])
+        genre = Genre.objects.exclude(titles=title).first()
+        urls = ('/api/v1/titles/', f'/api/v1/titles/{title.pk}/')
+        etags = {url: client.get(url)['ETag'] for url in urls}
+        title.genre.add(genre)
+        for url in urls:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что изменение только жанров меняет ETag `{url}`.'
+            )
+
+    def test_06_etag_not_ahead_of_data(self, client, admin, admin_client):
+        from django.db import transaction
+
+        from api.v1.cache import comments_namespace, generation_key, get_cache
+        from reviews.models import Comment, Review, Title
+
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        review = Review.objects.get(pk=reviews[0]['id'])
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        comments_url = f'{reviews_url}{review.pk}/comments/'
+        etag = client.get(comments_url)['ETag']
+        key = generation_key(comments_namespace(review.pk))
+        before = get_cache().get(key)
+        with transaction.atomic():
+            Comment.objects.create(review=review, author=admin, text='Новый')
+            assert get_cache().get(key) == before, (
+                'Проверьте, что поколение кеша комментариев меняется '
+                'после фиксации транзакции: иначе GET до фиксации '
+                'получит новый ETag со старыми данными.'
+            )
+        response = client.get(comments_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+
+        etag = client.get(reviews_url)['ETag']
+        Title.objects.filter(pk=review.title_id).bump_versions()
+        response = client.get(reviews_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что ETag отзывов строится по версии произведения.'
+        )
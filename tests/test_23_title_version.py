@@ -0,0 +1,142 @@
+from http import HTTPStatus
+
+import pytest
+
+from .utils import create_single_comment, create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23TitleVersion:
+
+    def version(self, title_id):
+        from reviews.models import Title
+
+        return Title.objects.get(pk=title_id).version
+
+    def assert_bumped(self, title_id, before, action):
+        after = self.version(title_id)
+        assert after > before, (
+            f'Проверьте, что {action} увеличивает версию произведения.'
+        )
+        return after
+
+    def test_01_version_bumped(self, admin_client):
+        titles, _, genres = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/'
+        version = self.version(title_id)
+
+        admin_client.patch(url, {'name': 'Новое название'})
+        version = self.assert_bumped(title_id, version, 'изменение')
+        admin_client.patch(url, {'genre': [genres[2]['slug']]})
+        version = self.assert_bumped(title_id, version, 'смена жанров')
+        review = create_single_review(admin_client, title_id, 'Отзыв', 5)
+        review_url = f'{url}reviews/{review.json()["id"]}/'
+        version = self.assert_bumped(title_id, version, 'новый отзыв')
+        admin_client.patch(review_url, {'text': 'Другой текст'})
+        version = self.assert_bumped(
+            title_id, version, 'изменение текста отзыва'
+        )
+        comment = create_single_comment(
+            admin_client, title_id, review.json()['id'], 'Комментарий'
+        )
+        version = self.assert_bumped(title_id, version, 'новый комментарий')
+        admin_client.delete(f'{review_url}comments/{comment.json()["id"]}/')
+        version = self.assert_bumped(
+            title_id, version, 'удаление комментария'
+        )
+        admin_client.patch(
+            f'/api/v1/genres/{genres[2]["slug"]}/', {'name': 'Жанр'}
+        )
+        admin_client.delete(f'/api/v1/genres/{genres[2]["slug"]}/')
+        self.assert_bumped(title_id, version, 'удаление жанра')
+
+        response = admin_client.get(url)
+        assert response.json()['version'] == self.version(title_id), (
+            'Проверьте, что версия произведения есть в ответе API.'
+        )
+
+    def test_02_save_keeps_counters(self, admin_client):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        title = Title.objects.get(pk=titles[0]['id'])
+        create_single_review(admin_client, title.pk, 'Отзыв', 7)
+        title.name = 'Сохранено из устаревшей копии'
+        title.save()
+        title.refresh_from_db()
+        assert (title.review_count, title.rating) == (1, 7), (
+            'Проверьте, что сохранение произведения не перезаписывает '
+            'счётчики отзывов значениями из памяти.'
+        )
+
+    def test_03_cached_by_version(
+            self, client, admin_client, query_budget):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        for url in (
+            f'/api/v1/titles/{title_id}/',
+            f'/api/v1/titles/{title_id}/reviews/',
+        ):
+            assert client.get(url)['X-Cache'] == 'MISS'
+            before = query_budget.count
+            response = client.get(url)
+            assert response['X-Cache'] == 'HIT'
+            assert query_budget.count - before == 1, (
+                f'Проверьте, что повторный GET-запрос к `{url}` читает из '
+                'БД только версию произведения.'
+            )
+
+        create_single_review(admin_client, title_id, 'Отзыв', 3)
+        response = client.get(f'/api/v1/titles/{title_id}/reviews/')
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что новый отзыв сбрасывает кеш отзывов произведения.'
+        )
+        assert response.json()['count'] == 1
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.json()['rating'] == 3
+        assert client.get('/api/v1/titles/0/').status_code == (
+            HTTPStatus.NOT_FOUND
+        )
+
+    # Смена имени: версии и списки сбрасываются за O(1) запросов.
+    @pytest.mark.query_budget(8, method='PATCH', path=r'^/api/v1/users/')
+    def test_04_username_change(self, client, admin_client, user,
+                                user_client):
+        titles, _, _ = create_titles(admin_client)
+        reviewed, commented = titles[0]['id'], titles[1]['id']
+        create_single_review(user_client, reviewed, 'Отзыв', 5)
+        review = create_single_review(admin_client, commented, 'Чужой', 7)
+        create_single_comment(
+            user_client, commented, review.json()['id'], 'Комментарий'
+        )
+        reviews_url = f'/api/v1/titles/{reviewed}/reviews/'
+        comments_url = (
+            f'/api/v1/titles/{commented}/reviews/{review.json()["id"]}'
+            '/comments/'
+        )
+        etags = {
+            url: client.get(url)['ETag'] for url in (reviews_url, comments_url)
+        }
+        versions = {
+            title_id: self.version(title_id)
+            for title_id in (reviewed, commented)
+        }
+
+        admin_client.patch(
+            f'/api/v1/users/{user.username}/', {'username': 'renamed'}
+        )
+        for title_id, action in (
+            (reviewed, 'смена имени автора отзыва'),
+            (commented, 'смена имени автора комментария'),
+        ):
+            self.assert_bumped(title_id, versions[title_id], action)
+        for url in (reviews_url, comments_url):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что смена имени автора меняет ETag `{url}`.'
+            )
+            assert response.get('X-Cache') != 'HIT'
+            assert response.json()['results'][0]['author'] == 'renamed', (
+                f'Проверьте, что `{url}` показывает новое имя автора.'
+            )
@@ -0,0 +1,44 @@
+from io import StringIO
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from django.core.management import call_command
+
+from .utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24FastTitleList:
+
+    def test_01_parity_with_serializer(self, admin, admin_client, client):
+        from api.v1.serializers import TitlesGetSerializer
+        from api.v1.views import TitlesViewSet
+        from reviews.models import Title
+
+        create_reviews(admin_client, {admin: admin_client})
+        Title.objects.create(name='Без категории', year=2000)
+
+        for params in ({}, {'limit': 1, 'offset': 1}, {'genre': 'drama'}):
+            response = client.get('/api/v1/titles/', params)
+            ids = [title['id'] for title in response.json()['results']]
+            titles = TitlesViewSet.queryset.in_bulk(ids)
+            expected = TitlesGetSerializer(
+                [titles[pk] for pk in ids], many=True,
+                context={'request': APIRequestFactory().get('/')}
+            ).data
+            assert JSONRenderer().render(
+                response.json()['results']
+            ) == JSONRenderer().render(expected), (
+                'Проверьте, что быстрый путь списка произведений выдаёт тот '
+                'же JSON, что и `TitlesGetSerializer`.'
+            )
+
+    def test_02_benchmark_title_list(self, admin, admin_client):
+        create_reviews(admin_client, {admin: admin_client})
+        out = StringIO()
+        call_command(
+            'benchmark_title_list', '--iterations', '3', stdout=out
+        )
+        assert 'Ускорение' in out.getvalue()
@@ -0,0 +1,80 @@
+from http import HTTPStatus
+
+import pytest
+from rest_framework.test import APIClient
+
+from .utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25ReviewQueries:
+
+    def test_01_review_list_constant_queries(
+            self, client, admin_client, django_assert_num_queries):
+        from reviews.models import Review, User
+
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        User.objects.bulk_create(
+            User(username=f'author_{i}', email=f'author_{i}@yamdb.fake')
+            for i in range(20)
+        )
+        authors = User.objects.filter(username__startswith='author_')
+        Review.objects.bulk_create(
+            Review(title_id=titles[0]['id'], author=author, text='Отзыв',
+                   score=5)
+            for author in authors
+        )
+        for limit in (1, 20):
+            with django_assert_num_queries(3):
+                response = client.get(url, {'limit': limit})
+            assert len(response.json()['results']) == limit, (
+                f'Проверьте, что число запросов к БД при GET-запросе к '
+                f'`{url}` не зависит от размера страницы.'
+            )
+        assert response.json()['results'][0]['author'] == 'author_0'
+
+    def test_02_review_create_queries(
+            self, admin_client, user, revocation_cache,
+            django_assert_max_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        user_client = APIClient()
+        user_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {user.create_jwt_token()}'
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data = {'text': 'Отзыв', 'score': 7}
+
+        with django_assert_max_num_queries(7):
+            response = user_client.post(url, data)
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что отзыв создаётся одной проверкой произведения и '
+            'одной вставкой (плюс обновление рейтинга, статистики оценок, '
+            'рейтинга лучших и индекса).'
+        )
+        with django_assert_max_num_queries(4):
+            response = user_client.post(url, data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что повторный отзыв отклоняется по ограничению '
+            '`uq_author_title` без предварительной проверки.'
+        )
+        assert 'non_field_errors' in response.json()
+        response = user_client.post('/api/v1/titles/0/reviews/', data)
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_03_duplicate_under_admin_transaction(self, admin_client):
+        """Повторный отзыв не ломает внешнюю транзакцию."""
+        from django.db import transaction
+
+        titles, _, _ = create_titles(admin_client)
+        with transaction.atomic():
+            create_single_review(admin_client, titles[0]['id'], 'Раз', 5)
+            response = admin_client.post(
+                f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+                data={'text': 'Два', 'score': 6}
+            )
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+            response = admin_client.get(
+                f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            )
+            assert response.json()['count'] == 1
@@ -0,0 +1,102 @@
+from http import HTTPStatus
+
+import pytest
+
+from django.test import override_settings
+
+from .utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26TitleExpand:
+
+    def create_reviews(self, title_id, scores):
+        from reviews.models import Review, User
+
+        User.objects.bulk_create(
+            User(username=f'reader_{i}', email=f'reader_{i}@yamdb.fake')
+            for i in range(len(scores))
+        )
+        readers = User.objects.filter(
+            username__startswith='reader_'
+        ).order_by('pk')
+        for reader, score in zip(readers, scores):
+            Review.objects.create(
+                title_id=title_id, author=reader, text='Отзыв', score=score
+            )
+
+    def test_01_expand(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        self.create_reviews(title_id, [10, 10, 7, 1])
+        url = f'/api/v1/titles/{title_id}/'
+
+        plain = client.get(url).json()
+        assert 'reviews' not in plain and 'score_histogram' not in plain, (
+            'Проверьте, что без `?expand=` ответ о произведении не меняется.'
+        )
+        with override_settings(TITLE_EXPAND_REVIEWS=3):
+            response = client.get(url, {'expand': 'reviews,score_histogram'})
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert {
+            key: value for key, value in data.items()
+            if key not in ('reviews', 'score_histogram')
+        } == plain, (
+            'Проверьте, что `?expand=` только добавляет поля к ответу.'
+        )
+        expected = {str(score): 0 for score in range(1, 11)}
+        expected.update({'10': 2, '7': 1, '1': 1})
+        assert data['score_histogram'] == expected, (
+            'Проверьте, что `score_histogram` содержит число отзывов с '
+            'каждой оценкой от 1 до 10.'
+        )
+        assert data['reviews']['count'] == 4
+        assert [
+            (review['author'], review['score'])
+            for review in data['reviews']['results']
+        ] == [('reader_0', 10), ('reader_1', 10), ('reader_2', 7)], (
+            'Проверьте, что встраиваются первые TITLE_EXPAND_REVIEWS '
+            'отзывов по дате публикации вместе с авторами.'
+        )
+        only_histogram = client.get(url, {'expand': 'score_histogram'})
+        assert 'reviews' not in only_histogram.json()
+
+    def test_02_expand_queries(
+            self, client, admin_client, django_assert_max_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        self.create_reviews(title_id, list(range(1, 11)) * 2)
+        url = f'/api/v1/titles/{title_id}/'
+        with django_assert_max_num_queries(5):
+            response = client.get(url, {'expand': 'reviews,score_histogram'})
+        assert len(response.json()['reviews']['results']) == 10, (
+            'Проверьте, что число запросов к БД при `?expand=` не зависит '
+            'от числа отзывов.'
+        )
+
+    def test_03_expand_invalidated_and_validated(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/'
+        params = {'expand': 'reviews,score_histogram'}
+        response = client.get(url, params)
+        assert response.json()['reviews']['count'] == 0
+        etag = response['ETag']
+
+        create_single_review(admin_client, title_id, 'Отзыв', 8)
+        response = client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что новый отзыв меняет ETag ответа с `?expand=`.'
+        )
+        assert response.json()['reviews']['count'] == 1
+        assert response.json()['score_histogram']['8'] == 1
+
+        response = client.get(url, {'expand': 'comments'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что неизвестное значение `expand` возвращает 400.'
+        )
+        response = client.get(
+            '/api/v1/titles/', {'expand': 'reviews'}
+        )
+        assert response.status_code == HTTPStatus.OK
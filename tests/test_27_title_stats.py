@@ -0,0 +1,133 @@
+from http import HTTPStatus
+
+import pytest
+
+from django.core.management import CommandError, call_command
+
+from .utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27TitleStats:
+
+    def expected(self, title_id):
+        from reviews.models import Review
+
+        scores = list(
+            Review.objects.filter(title_id=title_id)
+            .values_list('score', flat=True)
+        )
+        histogram = {str(score): 0 for score in range(1, 11)}
+        for score in scores:
+            histogram[str(score)] += 1
+        mean = sum(scores) / len(scores) if scores else None
+        variance = (
+            sum((score - mean) ** 2 for score in scores) / len(scores)
+            if scores else None
+        )
+        return {
+            'title': title_id, 'count': len(scores), 'mean': mean,
+            'variance': variance, 'score_histogram': histogram,
+        }
+
+    def assert_stats(self, client, title_id, action):
+        response = client.get(f'/api/v1/titles/{title_id}/stats/')
+        assert response.status_code == HTTPStatus.OK
+        data, expected = response.json(), self.expected(title_id)
+        for key in ('mean', 'variance'):
+            if expected[key] is not None:
+                assert data[key] == pytest.approx(expected[key]), (
+                    f'Проверьте `{key}` статистики после: {action}.'
+                )
+                data[key] = expected[key]
+        assert data == expected, (
+            f'Проверьте, что статистика оценок совпадает с таблицей '
+            f'отзывов после: {action}.'
+        )
+
+    def test_01_stats_follow_reviews(
+            self, client, admin_client, user_client, moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        self.assert_stats(client, first, 'создание произведения')
+
+        review = create_single_review(admin_client, first, 'Отзыв', 10)
+        create_single_review(user_client, first, 'Отзыв', 3)
+        create_single_review(moderator_client, first, 'Отзыв', 3)
+        self.assert_stats(client, first, 'создание отзывов')
+
+        url = f'/api/v1/titles/{first}/reviews/{review.json()["id"]}/'
+        admin_client.patch(url, {'score': 4})
+        self.assert_stats(client, first, 'изменение оценки')
+        admin_client.patch(url, {'text': 'Другой текст'})
+        self.assert_stats(client, first, 'изменение текста')
+        admin_client.delete(url)
+        self.assert_stats(client, first, 'удаление отзыва')
+
+        from reviews.models import Review
+
+        moved = Review.objects.get(
+            title_id=first, author__username='TestUser'
+        )
+        moved.title_id = second
+        moved.save()
+        self.assert_stats(client, first, 'перенос отзыва (старое)')
+        self.assert_stats(client, second, 'перенос отзыва (новое)')
+
+    def test_02_stats_endpoint(
+            self, client, admin_client, django_assert_max_num_queries):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(admin_client, titles[0]['id'], 'Отзыв', 7)
+        with django_assert_max_num_queries(1):
+            response = client.get(f'/api/v1/titles/{titles[0]["id"]}/stats/')
+        assert response.json()['mean'] == 7
+        assert response.json()['variance'] == 0
+
+        bulk = Title.objects.bulk_create([Title(name='Без сигналов', year=1)])
+        bulk_id = bulk[0].pk or Title.objects.get(name='Без сигналов').pk
+        response = client.get(f'/api/v1/titles/{bulk_id}/stats/')
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что статистика произведения без отзывов нулевая.'
+        )
+        assert response.json()['count'] == 0
+        assert response.json()['mean'] is None
+
+        response = client.get('/api/v1/titles/0/stats/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_03_rebuild_and_check(self, client, admin_client):
+        from reviews.models import Review, TitleStats, User
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(admin_client, title_id, 'Отзыв', 9)
+        call_command('rebuild_title_stats', '--check')
+
+        author = User.objects.create(username='bulk', email='bulk@ya.fake')
+        Review.objects.bulk_create([
+            Review(title_id=title_id, author=author, text='Отзыв', score=2)
+        ])
+        with pytest.raises(CommandError):
+            call_command('rebuild_title_stats', '--check')
+        assert TitleStats.objects.get(title_id=title_id).review_count == 1
+
+        call_command('rebuild_title_stats')
+        call_command('rebuild_title_stats', '--check')
+        self.assert_stats(client, title_id, 'rebuild_title_stats')
+
+    def test_04_expand_histogram_from_stats(
+            self, client, admin_client, django_assert_max_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(admin_client, title_id, 'Отзыв', 6)
+        with django_assert_max_num_queries(3):
+            response = client.get(
+                f'/api/v1/titles/{title_id}/',
+                {'expand': 'score_histogram'}
+            )
+        assert response.json()['score_histogram']['6'] == 1, (
+            'Проверьте, что `?expand=score_histogram` читает статистику '
+            'оценок вместе с произведением.'
+        )
@@ -0,0 +1,190 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+
+from django.core.management import call_command
+
+from .utils import create_titles
+
+URL = '/api/v1/titles/top/'
+
+
+@pytest.fixture(autouse=True)
+def min_reviews(settings):
+    settings.TOP_MIN_REVIEWS = 2
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28TopTitles:
+
+    def add_reviews(self, title_id, scores):
+        from reviews.models import Review, User
+
+        for score in scores:
+            number = User.objects.count()
+            author = User.objects.create(
+                username=f'voter_{number}', email=f'voter_{number}@ya.fake'
+            )
+            Review.objects.create(
+                title_id=title_id, author=author, text='Отзыв', score=score
+            )
+
+    def expected_score(self, title_id):
+        from reviews.models import Title, TitleRanking
+
+        title = Title.objects.get(pk=title_id)
+        prior = TitleRanking.objects.prior_mean()
+        return (title.score_sum + 2 * prior) / (title.review_count + 2)
+
+    def test_01_leaderboard(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        self.add_reviews(first, [10, 9])
+        self.add_reviews(second, [10, 10, 10])
+        call_command('refresh_rankings')
+
+        response = client.get(URL)
+        assert response.status_code == HTTPStatus.OK
+        results = response.json()['results']
+        assert [row['id'] for row in results] == [second, first], (
+            'Проверьте, что `/titles/top/` упорядочен по байесовской '
+            'оценке.'
+        )
+        assert results[0]['rank'] == 1
+        assert results[0]['score'] == pytest.approx(
+            self.expected_score(second)
+        )
+        assert results[0]['review_count'] == 3
+        assert results[0]['rating'] == 10
+
+        response = client.get(URL, {'limit': 1})
+        assert [row['id'] for row in response.json()['results']] == [second]
+        response = client.get(URL, {'category': categories[0]['slug']})
+        assert [row['id'] for row in response.json()['results']] == [
+            title['id'] for title in (titles[1], titles[0])
+            if title['category'] == categories[0]['slug']
+        ], 'Проверьте фильтр `/titles/top/?category=`.'
+        response = client.get(URL, {'genre': genres[1]['slug']})
+        assert [row['id'] for row in response.json()['results']] == [
+            title['id'] for title in (titles[1], titles[0])
+            if genres[1]['slug'] in title['genre']
+        ], 'Проверьте фильтр `/titles/top/?genre=`.'
+        response = client.get(URL, {'limit': 0})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_02_minimum_reviews_and_incremental(self, client, admin_client):
+        from reviews.models import Review
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        self.add_reviews(title_id, [8])
+        assert client.get(URL).json()['count'] == 0, (
+            'Проверьте, что произведения с числом отзывов меньше '
+            'TOP_MIN_REVIEWS не попадают в рейтинг.'
+        )
+        self.add_reviews(title_id, [6])
+        results = client.get(URL).json()['results']
+        assert [row['id'] for row in results] == [title_id], (
+            'Проверьте, что новый отзыв обновляет рейтинг без '
+            '`refresh_rankings`.'
+        )
+        assert results[0]['score'] == pytest.approx(
+            self.expected_score(title_id)
+        )
+
+        review = Review.objects.filter(title_id=title_id).first()
+        review.score = 1
+        review.save()
+        assert client.get(URL).json()['results'][0]['score'] == (
+            pytest.approx(self.expected_score(title_id))
+        ), 'Проверьте, что изменение оценки обновляет рейтинг.'
+        review.delete()
+        assert client.get(URL).json()['count'] == 0, (
+            'Проверьте, что произведение выпадает из рейтинга, когда '
+            'отзывов становится меньше TOP_MIN_REVIEWS.'
+        )
+
+    def test_03_category_follows_title(self, client, admin_client):
+        titles, categories, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        self.add_reviews(title_id, [7, 7])
+        other = next(
+            category['slug'] for category in categories
+            if category['slug'] != titles[0]['category']
+        )
+        admin_client.patch(f'/api/v1/titles/{title_id}/', {'category': other})
+        response = client.get(URL, {'category': other})
+        assert [row['id'] for row in response.json()['results']] == [
+            title_id
+        ], 'Проверьте, что смена категории произведения видна в рейтинге.'
+
+    def test_04_top_queries(
+            self, client, admin_client, django_assert_num_queries):
+        titles, _, genres = create_titles(admin_client)
+        for title in titles:
+            self.add_reviews(title['id'], [5, 6, 7])
+        with django_assert_num_queries(1):
+            response = client.get(URL, {'genre': genres[0]['slug']})
+        assert response.status_code == HTTPStatus.OK
+
+    def test_05_stale_rows(self, client, admin_client):
+        from reviews.models import Review, Title, TitleRanking
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        self.add_reviews(title_id, [7, 8, 9])
+        # Расхождение после записи в обход сигналов.
+        Title.objects.filter(pk=title_id).update(
+            score_sum=0, review_count=0, rating=None
+        )
+        response = client.get(URL)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['results'][0]['rating'] is None, (
+            'Проверьте, что `/titles/top/` не падает на произведении без '
+            'рейтинга.'
+        )
+
+        TitleRanking.objects.refresh_title(title_id)
+        assert not TitleRanking.objects.filter(title_id=title_id).exists(), (
+            'Проверьте, что строка рейтинга удаляется при любом числе '
+            'отзывов меньше TOP_MIN_REVIEWS.'
+        )
+
+        call_command('rebuild_ratings', stdout=StringIO())
+        results = client.get(URL).json()['results']
+        assert [row['id'] for row in results] == [title_id], (
+            'Проверьте, что `rebuild_ratings` пересчитывает рейтинг лучших.'
+        )
+        assert results[0]['review_count'] == Review.objects.filter(
+            title_id=title_id
+        ).count()
+        assert results[0]['rating'] == 8
+
+    def test_06_stored_prior_mean(
+            self, admin_client, django_assert_max_num_queries):
+        from api.v1.cache import get_cache
+        from reviews.models import Title, TitleRanking
+
+        titles, _, _ = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        self.add_reviews(first, [10, 10])
+        self.add_reviews(second, [2, 2])
+        call_command('refresh_rankings')
+        prior = TitleRanking.objects.prior_mean()
+        assert prior == pytest.approx(6)
+
+        # Средняя по таблице теперь другая, но рейтинг считается с C
+        # последнего пересчёта, даже если кеш ответов сброшен.
+        Title.objects.filter(pk=second).update(score_sum=20, review_count=2)
+        get_cache().clear()
+        # SELECT строки произведения вместе с C и UPDATE рейтинга.
+        with django_assert_max_num_queries(2):
+            TitleRanking.objects.refresh_title(first)
+        assert TitleRanking.objects.prior_mean() == prior
+        assert TitleRanking.objects.get(title_id=first).score == (
+            pytest.approx((20 + 2 * prior) / 4)
+        ), (
+            'Проверьте, что обновление рейтинга произведения берёт среднюю '
+            'оценку из последнего `refresh_rankings`, не пересчитывая её.'
+        )
@@ -0,0 +1,167 @@
+import math
+from http import HTTPStatus
+
+import pytest
+
+pytest.importorskip('numpy')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29SimilarTitles:
+
+    def create_catalogue(self):
+        from reviews.models import Category, Genre, Title
+
+        films = Category.objects.create(name='Фильм', slug='films')
+        books = Category.objects.create(name='Книга', slug='books')
+        drama, comedy, horror = (
+            Genre.objects.create(name=name, slug=slug)
+            for name, slug in (
+                ('Драма', 'drama'), ('Комедия', 'comedy'),
+                ('Ужасы', 'horror'),
+            )
+        )
+        catalogue = {}
+        for name, category, genres in (
+                ('base', films, (drama, comedy)),
+                ('twin', films, (drama, comedy)),
+                ('cousin', films, (drama,)),
+                ('book', books, (horror,)),
+                ('other', books, ())):
+            title = Title.objects.create(
+                name=name, year=2000, category=category
+            )
+            title.genre.set(genres)
+            catalogue[name] = title
+        return catalogue
+
+    def review(self, title, username, score=5):
+        from reviews.models import Review, User
+
+        author, _ = User.objects.get_or_create(
+            username=username, defaults={'email': f'{username}@ya.fake'}
+        )
+        Review.objects.create(
+            title=title, author=author, text='Отзыв', score=score
+        )
+
+    def expected(self, titles, weight):
+        """Сходство по определению, без NumPy."""
+        def content(title):
+            vector = {f'g{pk}': 1.0 for pk in title.genre.values_list(
+                'pk', flat=True)}
+            if title.category_id:
+                vector[f'c{title.category_id}'] = 1.0
+            return vector
+
+        def cosine(a, b):
+            dot = sum(a[key] * b.get(key, 0) for key in a)
+            norm = math.sqrt(sum(v * v for v in a.values())) * math.sqrt(
+                sum(v * v for v in b.values())
+            )
+            return dot / norm if norm else 0.0
+
+        def authors(title):
+            return set(title.reviews.values_list('author_id', flat=True))
+
+        result = {}
+        for a in titles:
+            for b in titles:
+                if a.pk == b.pk:
+                    continue
+                shared = len(authors(a) & authors(b))
+                both = len(authors(a)) * len(authors(b))
+                coreview = shared / math.sqrt(both) if both else 0.0
+                result[a.pk, b.pk] = (
+                    (1 - weight) * cosine(content(a), content(b))
+                    + weight * coreview
+                )
+        return result
+
+    def test_01_similar_by_genres_and_reviews(self, client, settings):
+        from reviews import similarity
+        from reviews.models import Title, TitleSimilarity
+
+        settings.SIMILAR_TITLES_COREVIEW_WEIGHT = 0.5
+        catalogue = self.create_catalogue()
+        for username in ('reader', 'critic'):
+            self.review(catalogue['base'], username)
+            self.review(catalogue['other'], username)
+        self.review(catalogue['cousin'], 'reader')
+
+        assert similarity.refresh(full=True, batch_size=2) == 5
+        expected = self.expected(list(Title.objects.all()), 0.5)
+        for row in TitleSimilarity.objects.all():
+            assert row.score == pytest.approx(
+                expected[row.title_id, row.similar_id], abs=1e-5
+            ), (
+                'Проверьте, что сходство — взвешенная сумма косинусов '
+                'жанров с категорией и общих рецензентов.'
+            )
+
+        url = f'/api/v1/titles/{catalogue["base"].pk}/similar/'
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        results = response.json()['results']
+        scores = [row['score'] for row in results]
+        assert scores == sorted(scores, reverse=True)
+        assert results[0]['id'] == catalogue['cousin'].pk, (
+            'Проверьте порядок соседей по убыванию сходства.'
+        )
+        assert catalogue['base'].pk not in [row['id'] for row in results]
+        assert catalogue['other'].pk in [row['id'] for row in results], (
+            'Проверьте, что общие рецензенты делают произведения похожими.'
+        )
+        assert catalogue['book'].pk not in [row['id'] for row in results], (
+            'Проверьте, что произведения без общего не попадают в соседи.'
+        )
+        assert results[0]['category'] == {'name': 'Фильм', 'slug': 'films'}
+
+        response = client.get(url, {'limit': 1})
+        assert len(response.json()['results']) == 1
+        response = client.get('/api/v1/titles/0/similar/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_02_incremental_refresh(self, settings):
+        from reviews import similarity
+        from reviews.models import Genre, TitleSimilarity
+
+        settings.SIMILAR_TITLES_COREVIEW_WEIGHT = 0.5
+        catalogue = self.create_catalogue()
+        similarity.refresh(full=True)
+        assert similarity.refresh() == 0, (
+            'Проверьте, что без изменений ничего не пересчитывается.'
+        )
+
+        catalogue['book'].genre.add(Genre.objects.get(slug='drama'))
+        recomputed = similarity.refresh()
+        stale = set(
+            TitleSimilarity.objects.filter(similar=catalogue['book'])
+            .values_list('title_id', flat=True)
+        )
+        assert recomputed <= 2 + len(stale), (
+            'Проверьте, что инкрементальный пересчёт затрагивает только '
+            'изменившиеся произведения и их соседей.'
+        )
+        assert TitleSimilarity.objects.filter(
+            title=catalogue['book'], similar=catalogue['cousin']
+        ).exists(), 'Проверьте, что новые жанры учитываются в соседях.'
+
+        self.review(catalogue['book'], 'reader')
+        assert similarity.refresh() >= 1, (
+            'Проверьте, что новый отзыв помечает произведение к пересчёту.'
+        )
+
+    def test_03_command_and_queries(
+            self, client, django_assert_max_num_queries):
+        from django.core.management import call_command
+
+        catalogue = self.create_catalogue()
+        call_command('refresh_similar_titles', '--full', '--count', '2')
+        with django_assert_max_num_queries(1):
+            response = client.get(
+                f'/api/v1/titles/{catalogue["base"].pk}/similar/'
+            )
+        assert len(response.json()['results']) == 2, (
+            'Проверьте, что `--count` ограничивает число соседей.'
+        )
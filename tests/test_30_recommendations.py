@@ -0,0 +1,133 @@
+from http import HTTPStatus
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+URL = '/api/v1/users/me/recommendations/'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test30Recommendations:
+
+    def create_catalogue(self):
+        """Два лагеря читателей: любители драм и любители комедий."""
+        from reviews.models import Review, Title, User
+
+        dramas = [
+            Title.objects.create(name=f'Драма {number}', year=2000)
+            for number in range(4)
+        ]
+        comedies = [
+            Title.objects.create(name=f'Комедия {number}', year=2000)
+            for number in range(4)
+        ]
+        for number in range(6):
+            liked, disliked = (
+                (dramas, comedies) if number % 2 else (comedies, dramas)
+            )
+            author = User.objects.create(
+                username=f'reader_{number}', email=f'reader_{number}@ya.fake'
+            )
+            for title in liked:
+                Review.objects.create(
+                    title=title, author=author, text='Отзыв', score=10
+                )
+            for title in disliked:
+                Review.objects.create(
+                    title=title, author=author, text='Отзыв', score=2
+                )
+        return dramas, comedies
+
+    def test_01_unseen_titles_by_taste(self, user, user_client):
+        from reviews import recommendations
+        from reviews.models import Review
+
+        dramas, comedies = self.create_catalogue()
+        Review.objects.create(
+            title=dramas[0], author=user, text='Отзыв', score=10
+        )
+        Review.objects.create(
+            title=comedies[0], author=user, text='Отзыв', score=1
+        )
+        _, _, saved = recommendations.build(count=20, factors=4)
+        assert saved > 0
+
+        response = user_client.get(URL)
+        assert response.status_code == HTTPStatus.OK
+        results = response.json()['results']
+        ids = [row['id'] for row in results]
+        assert dramas[0].pk not in ids and comedies[0].pk not in ids, (
+            'Проверьте, что в рекомендации не попадают произведения, на '
+            'которые пользователь уже написал отзыв.'
+        )
+        assert len(ids) == 6
+        scores = [row['score'] for row in results]
+        assert scores == sorted(scores, reverse=True)
+        assert all(1 <= score <= 10 for score in scores)
+        assert set(ids[:3]) == {title.pk for title in dramas[1:]}, (
+            'Проверьте, что пользователю, которому нравятся драмы, первыми '
+            'рекомендуются драмы.'
+        )
+        assert results[0]['category'] is None
+
+        response = user_client.get(URL, {'limit': 2})
+        assert len(response.json()['results']) == 2
+
+    def test_02_auth_and_empty(self, client, user_client):
+        assert client.get(URL).status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что рекомендации доступны только '
+            'аутентифицированным пользователям.'
+        )
+        response = user_client.get(URL)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {'count': 0, 'results': []}
+
+    def test_03_als_normal_equations(self, monkeypatch):
+        """После шага ALS факторы решают нормальные уравнения."""
+        from reviews import recommendations
+
+        monkeypatch.setattr(recommendations, 'BLOCK_SIZE', 7)
+        rng = np.random.default_rng(1)
+        keys = np.unique(rng.integers(0, 40 * 15, size=200))
+        matrix = recommendations.RatingMatrix(
+            keys // 15, keys % 15, rng.integers(1, 11, size=len(keys))
+        )
+        users, titles = recommendations.factorize(
+            matrix, factors=3, iterations=2, regularization=0.5, workers=3
+        )
+        pointers, columns, values = matrix.by_title
+        for row in range(len(pointers) - 1):
+            part = slice(pointers[row], pointers[row + 1])
+            fixed = users[columns[part]].astype(np.float64)
+            expected = np.linalg.solve(
+                fixed.T @ fixed
+                + 0.5 * (part.stop - part.start) * np.eye(3),
+                fixed.T @ values[part],
+            )
+            assert titles[row] == pytest.approx(expected, abs=1e-4), (
+                'Проверьте решение систем ALS пачками строк разной длины.'
+            )
+
+    def test_04_command_and_queries(
+            self, user, user_client, django_assert_max_num_queries):
+        from django.core.management import call_command
+
+        from reviews.models import Review, UserRecommendation
+
+        dramas, _ = self.create_catalogue()
+        Review.objects.create(
+            title=dramas[0], author=user, text='Отзыв', score=9
+        )
+        call_command('build_recommendations', '--count', '3')
+        assert not UserRecommendation.objects.filter(rank__gt=3).exists(), (
+            'Проверьте, что `--count` ограничивает число рекомендаций.'
+        )
+        with django_assert_max_num_queries(2):
+            response = user_client.get(URL)
+        assert len(response.json()['results']) == 3
+
+        call_command('build_recommendations')
+        assert UserRecommendation.objects.filter(user=user).count() == 7, (
+            'Проверьте, что повторный запуск заменяет рекомендации.'
+        )
@@ -0,0 +1,146 @@
+import csv
+import io
+import json
+from http import HTTPStatus
+
+import pytest
+
+from .utils import create_comments, create_single_review, create_titles
+
+
+def read(response):
+    assert response.status_code == HTTPStatus.OK, response.content
+    assert response.streaming, (
+        'Проверьте, что выгрузка отдаётся через StreamingHttpResponse.'
+    )
+    return b''.join(response.streaming_content).decode()
+
+
+def read_ndjson(response):
+    return [json.loads(line) for line in read(response).splitlines()]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test31Export:
+
+    def test_01_titles_ndjson(self, client, user_client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        assert client.get('/api/v1/export/titles/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+        assert user_client.get('/api/v1/export/titles/').status_code == (
+            HTTPStatus.FORBIDDEN
+        ), 'Проверьте, что выгрузка доступна только администратору.'
+        assert admin_client.get('/api/v1/export/users/').status_code == (
+            HTTPStatus.NOT_FOUND
+        )
+
+        response = admin_client.get('/api/v1/export/titles/')
+        assert response['Content-Type'].startswith('application/x-ndjson')
+        rows = read_ndjson(response)
+        assert [row['id'] for row in rows] == sorted(
+            title['id'] for title in titles
+        )
+        exported = {row['id']: row for row in rows}
+        for title in titles:
+            row = exported[title['id']]
+            assert row['category'] == title['category'], (
+                'Проверьте, что категория выгружается слагом.'
+            )
+            assert sorted(row['genre']) == sorted(title['genre']), (
+                'Проверьте, что жанры выгружаются списком слагов.'
+            )
+            assert row['rating'] is None
+            assert row['name'] == title['name']
+
+        response = admin_client.get(
+            '/api/v1/export/titles/', {'since_id': titles[0]['id']}
+        )
+        assert [row['id'] for row in read_ndjson(response)] == sorted(
+            title['id'] for title in titles[1:]
+        ), 'Проверьте, что произведения выгружаются после since_id.'
+        response = admin_client.get(
+            '/api/v1/export/titles/', {'since': '2020-01-01T00:00:00Z'}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_02_reviews_csv(self, admin_client, user, user_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'Отзыв, с "ним"', 7)
+        create_single_review(admin_client, titles[0]['id'], 'Второй', 9)
+
+        response = admin_client.get(
+            '/api/v1/export/reviews/', {'format': 'csv'}
+        )
+        assert response['Content-Type'].startswith('text/csv')
+        rows = list(csv.DictReader(io.StringIO(read(response))))
+        assert [row['text'] for row in rows] == ['Отзыв, с "ним"', 'Второй']
+        assert rows[0]['author'] == user.username
+        assert rows[0]['score'] == '7'
+        assert rows[0]['title'] == str(titles[0]['id'])
+
+        response = admin_client.get(
+            '/api/v1/export/titles/', {'format': 'csv'}
+        )
+        rows = list(csv.DictReader(io.StringIO(read(response))))
+        assert rows[0]['genre'] == ','.join(titles[0]['genre']), (
+            'Проверьте, что в CSV жанры перечислены через запятую.'
+        )
+
+    def test_03_incremental_comments(
+            self, admin_client, admin, user_client, user, moderator_client,
+            moderator):
+        author_map = {
+            admin: admin_client, user: user_client, moderator: moderator_client
+        }
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        rows = read_ndjson(admin_client.get('/api/v1/export/comments/'))
+        assert [row['id'] for row in rows] == [
+            comment['id'] for comment in comments
+        ]
+        assert rows[0]['review'] == reviews[0]['id']
+        assert rows[0]['title'] == titles[0]['id']
+
+        last = rows[-1]
+        response = admin_client.get('/api/v1/export/comments/', {
+            'since': last['pub_date'], 'since_id': last['id'],
+        })
+        assert read_ndjson(response) == [], (
+            'Проверьте, что выгрузка с курсором последней строки пуста.'
+        )
+        response = admin_client.get(
+            '/api/v1/export/comments/', {'since': last['pub_date']}
+        )
+        assert last['id'] in [row['id'] for row in read_ndjson(response)], (
+            'Проверьте, что `since` без `since_id` включает границу.'
+        )
+
+        admin_client.post(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}'
+            '/comments/', {'text': 'Новый'}
+        )
+        response = admin_client.get('/api/v1/export/comments/', {
+            'since': last['pub_date'], 'since_id': last['id'],
+        })
+        assert [row['text'] for row in read_ndjson(response)] == ['Новый'], (
+            'Проверьте инкрементальную выгрузку по `since`/`since_id`.'
+        )
+        response = admin_client.get(
+            '/api/v1/export/comments/', {'since_id': last['id']}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    @pytest.mark.query_budget(20)
+    def test_04_chunked_queries(
+            self, admin_client, settings, django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        settings.EXPORT_CHUNK_SIZE = 2
+        response = admin_client.get('/api/v1/export/titles/')
+        # Пачки по 2 строки: на каждую запрос строк и запрос жанров;
+        # выгрузку завершает неполная пачка или пустой запрос.
+        full, rest = divmod(len(titles), 2)
+        with django_assert_num_queries(2 * full + (2 if rest else 1)):
+            rows = read_ndjson(response)
+        assert [row['id'] for row in rows] == sorted(
+            title['id'] for title in titles
+        ), 'Проверьте, что выгрузка пачками не теряет и не повторяет строки.'
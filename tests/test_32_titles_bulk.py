@@ -0,0 +1,114 @@
+from http import HTTPStatus
+
+import pytest
+
+from .utils import create_categories, create_genre
+
+URL = '/api/v1/titles/bulk/'
+
+
+def items(count, genres=('horror', 'comedy'), category='films'):
+    return [
+        {
+            'name': f'Океан {number}',
+            'year': 1990 + number,
+            'genre': list(genres),
+            'category': category,
+            'description': f'Описание {number}',
+        }
+        for number in range(count)
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test32TitlesBulk:
+
+    def test_01_partial_success(self, client, admin_client):
+        from reviews.models import Title, TitleStats
+
+        create_genre(admin_client)
+        create_categories(admin_client)
+        data = items(3) + [
+            {**items(1)[0], 'category': 'unknown'},
+            {'year': 2000, 'genre': ['drama'], 'category': 'books'},
+            'не словарь',
+        ]
+        response = admin_client.post(URL, data=data, format='json')
+        assert response.status_code == HTTPStatus.CREATED, response.json()
+        created, errors = response.json()['created'], response.json()['errors']
+        assert [item['name'] for item in created] == [
+            'Океан 0', 'Океан 1', 'Океан 2'
+        ]
+        assert created[0]['genre'] == ['horror', 'comedy']
+        assert created[0]['category'] == 'films'
+        assert created[0]['description'] == 'Описание 0'
+        assert [error['index'] for error in errors] == [3, 4, 5], (
+            'Проверьте, что ошибки возвращаются с индексом элемента.'
+        )
+        assert 'category' in errors[0]['errors']
+        assert 'name' in errors[1]['errors']
+
+        title = Title.objects.get(pk=created[0]['id'])
+        assert sorted(title.genre.values_list('slug', flat=True)) == [
+            'comedy', 'horror'
+        ], 'Проверьте, что жанры созданных произведений сохранены.'
+        assert TitleStats.objects.filter(
+            title_id__in=[item['id'] for item in created]
+        ).count() == 3, 'Проверьте, что у новых произведений есть статистика.'
+
+        response = client.get(f'/api/v1/titles/{created[1]["id"]}/')
+        assert response.json()['category'] == {'name': 'Фильм', 'slug': 'films'}
+        response = client.get('/api/v1/titles/', {'q': 'океан'})
+        assert response.json()['count'] == 3, (
+            'Проверьте, что созданные произведения попадают в поиск.'
+        )
+
+    def test_02_atomic_and_validation(self, admin_client, user_client,
+                                      settings):
+        from reviews.models import Title
+
+        create_genre(admin_client)
+        create_categories(admin_client)
+        data = items(2) + [{**items(1)[0], 'genre': ['unknown']}]
+        response = admin_client.post(
+            f'{URL}?atomic=true', data=data, format='json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json()['errors'][0]['index'] == 2
+        assert not Title.objects.exists(), (
+            'Проверьте, что с `?atomic=true` ошибка отменяет весь список.'
+        )
+
+        response = admin_client.post(
+            URL, data=[{'name': 'Без года'}], format='json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        for body in ({'name': 'Не список'}, []):
+            response = admin_client.post(URL, data=body, format='json')
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+        settings.TITLES_BULK_LIMIT = 2
+        response = admin_client.post(URL, data=items(3), format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert not Title.objects.exists()
+
+        response = user_client.post(URL, data=items(1), format='json')
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+    def test_03_cache_invalidated(self, client, admin_client):
+        create_genre(admin_client)
+        create_categories(admin_client)
+        assert client.get('/api/v1/titles/').json()['count'] == 0
+        admin_client.post(URL, data=items(2), format='json')
+        assert client.get('/api/v1/titles/').json()['count'] == 2, (
+            'Проверьте, что массовое создание сбрасывает кеш списка.'
+        )
+
+    def test_04_constant_queries(
+            self, admin_client, django_assert_max_num_queries):
+        create_genre(admin_client)
+        create_categories(admin_client)
+        with django_assert_max_num_queries(10):
+            response = admin_client.post(URL, data=items(50), format='json')
+        assert len(response.json()['created']) == 50, (
+            'Проверьте, что число запросов не зависит от числа произведений.'
+        )